@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AlertsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'alerts'
+    verbose_name = 'Alertas'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
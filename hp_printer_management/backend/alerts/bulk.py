@@ -0,0 +1,157 @@
+"""Reconhecimento, resolução e fechamento de alertas em lote por filtro
+
+A seleção é descrita pelos mesmos filtros da listagem (AlertFilter), e não
+por uma lista de ids. A tarefa bulk_update_alerts percorre a seleção em
+blocos por chave (id > último id), cada bloco com um único UPDATE em sua
+própria transação, aplicando o mesmo efeito das ações individuais: filhos
+de incidentes acompanham o incidente, escalonamentos pendentes são
+cancelados, o rollup diário registra as resoluções e o dashboard recebe os
+ids de cada bloco. No fim é gravada uma única atividade do usuário.
+
+O autor de cada operação fica no cache (bulk:<task_id>) pelo mesmo prazo do
+resultado no Celery: só ele consulta o progresso.
+"""
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .filters import AlertFilter
+from .models import Alert
+
+# Ação -> status de origem aceitos e status final
+BULK_ACTIONS = {
+    'acknowledge': {'from': ['new', 'escalated'], 'to': 'acknowledged', 'verb': 'reconhecidos'},
+    'resolve': {'from': Alert.OPEN_STATUSES, 'to': 'resolved', 'verb': 'resolvidos'},
+    'close': {'from': Alert.OPEN_STATUSES + ['resolved'], 'to': 'closed', 'verb': 'fechados'},
+}
+
+ROW_FIELDS = ('id', 'rule_id', 'printer_id', 'severity', 'is_incident')
+
+# Prazo (s) do autor da operação no cache: o do resultado no Celery
+OWNER_TTL = 86400
+
+
+def set_owner(task_id: str, user_id: int):
+    cache.set(f'bulk:{task_id}', user_id, OWNER_TTL)
+
+
+def is_owner(task_id: str, user_id: int) -> bool:
+    return cache.get(f'bulk:{task_id}') == user_id
+
+
+def chunk_size() -> int:
+    return getattr(settings, 'ALERT_BULK_CHUNK_SIZE', 1000)
+
+
+def selection(action: str, filters: Dict):
+    """Alertas selecionados pelos filtros que a ação ainda altera
+
+    Exige ao menos um filtro de AlertFilter com valor e recusa chaves
+    desconhecidas: sem isso a operação alcançaria todos os alertas.
+    """
+    if not isinstance(filters, dict):
+        raise ValueError('os filtros devem ser um objeto')
+
+    unknown = sorted(set(filters) - set(AlertFilter.base_filters))
+    if unknown:
+        raise ValueError(f"filtros desconhecidos: {', '.join(unknown)}")
+
+    if not any(value is not None and str(value).strip() for value in filters.values()):
+        raise ValueError('informe ao menos um filtro com valor')
+
+    filterset = AlertFilter(data=filters, queryset=Alert.objects.all())
+    if not filterset.is_valid():
+        raise ValueError(dict(filterset.errors))
+    return filterset.qs.filter(status__in=BULK_ACTIONS[action]['from'])
+
+
+def _updates(action: str, user_id: int, now, resolution_notes: str) -> Dict:
+    updates = {'status': BULK_ACTIONS[action]['to']}
+    if action == 'acknowledge':
+        updates.update(acknowledged_at=now, acknowledged_by_id=user_id)
+    elif action == 'resolve':
+        updates.update(resolved_at=now, resolved_by_id=user_id, resolution_notes=resolution_notes)
+    return updates
+
+
+def _apply_chunk(action: str, rows: List[Dict], updates: Dict, now) -> int:
+    """Atualizar um bloco (e os filhos dos incidentes do bloco); retorna quantos mudaram
+
+    As linhas ainda no status de origem são travadas antes do UPDATE: só os
+    alertas que de fato mudaram entram no rollup, nos cancelamentos e no
+    dashboard.
+    """
+    from hp_management import realtime
+    from . import escalation, rollup
+
+    config = BULK_ACTIONS[action]
+    ids = [row['id'] for row in rows]
+    incident_ids = [row['id'] for row in rows if row['is_incident']]
+
+    with transaction.atomic():
+        changing = Alert.objects.select_for_update().filter(status__in=config['from'])
+        if incident_ids:
+            changing = changing.filter(Q(id__in=ids) | Q(parent_id__in=incident_ids))
+        else:
+            changing = changing.filter(id__in=ids)
+
+        rows = list(changing.values(*ROW_FIELDS))
+        ids = [row['id'] for row in rows]
+        if not ids:
+            return 0
+
+        Alert.objects.filter(id__in=ids).update(**updates)
+
+        if action == 'resolve':
+            rollup.record([Alert(**row) for row in rows], 'resolved_count', when=now)
+
+    escalation.cancel(ids)
+    realtime.alerts_status_changed(ids, config['to'])
+    return len(ids)
+
+
+def run(action: str, filters: Dict, user_id: int, resolution_notes: str = '',
+        progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Aplicar a ação aos alertas dos filtros, bloco a bloco
+
+    `progress(alterados, total)` é chamado após cada bloco.
+    """
+    from . import stats
+
+    queryset = selection(action, filters)
+    total = queryset.count()
+    now = timezone.now()
+    updates = _updates(action, user_id, now, resolution_notes)
+    size = chunk_size()
+
+    last_id, updated = 0, 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values(*ROW_FIELDS)[:size])
+        if not rows:
+            break
+
+        last_id = rows[-1]['id']
+        updated += _apply_chunk(action, rows, updates, now)
+        if progress:
+            progress(min(updated, total), total)
+
+    if updated:
+        stats.invalidate()
+    return {'total': total, 'updated': updated}
+
+
+def record_activity(action: str, filters: Dict, updated: int, user_id: int, ip_address: str = None):
+    """Registrar a operação em lote como uma única atividade do usuário"""
+    from users.models import UserActivity
+
+    criteria = ', '.join(f'{key}={value}' for key, value in sorted(filters.items()))
+    UserActivity.objects.create(
+        user_id=user_id,
+        action='maintenance',
+        description=f"{updated} alertas {BULK_ACTIONS[action]['verb']} em lote ({criteria})",
+        ip_address=ip_address
+    )
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """O cache precisa ser compartilhado entre a API e os workers Celery
+
+    Destinatários, índice de regras, cooldowns, versão das estatísticas,
+    janelas de digest e vagas de drenagem são invalidados por um processo e
+    lidos por outros.
+    """
+    if settings.CACHES['default']['BACKEND'] != LOCAL_CACHE_BACKEND:
+        return []
+
+    return [Warning(
+        'O cache é local a cada processo: invalidações da API não chegam aos workers Celery.',
+        hint='Defina CACHE_URL (ex.: redis://localhost:6379/1); sem ele, use apenas um processo.',
+        id='alerts.W001',
+    )]
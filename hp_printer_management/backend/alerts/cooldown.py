@@ -0,0 +1,80 @@
+"""Índice de tempo de espera (cooldown) por regra e impressora
+
+Cada alerta criado grava a chave (regra, impressora) no cache com expiração
+igual ao cooldown da regra. A verificação de todas as impressoras candidatas
+de uma regra é um único get_many. Se o cache perdeu o índice da regra
+(reinício do Redis, expiração), ele é reconstruído a partir da tabela de
+alertas com uma consulta, pela última ocorrência de cada alerta (um alerta
+repetido só atualiza last_seen_at).
+"""
+from datetime import timedelta
+from typing import Iterable, Set
+
+from django.core.cache import cache
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+KEY = 'alerts:cooldown:{rule_id}:{printer_id}'
+SEEDED_KEY = 'alerts:cooldown:{rule_id}:seeded'
+
+
+class CooldownIndex:
+    """Consulta e registro de cooldown por (regra, impressora)"""
+
+    def __init__(self, backend=None):
+        self.cache = backend or cache
+
+    @staticmethod
+    def _timeout(rule) -> int:
+        return rule.cooldown_minutes * 60
+
+    def active(self, rule, printer_ids: Iterable[int]) -> Set[int]:
+        """Impressoras de `printer_ids` ainda em cooldown para a regra"""
+        printer_ids = list(printer_ids)
+        if not printer_ids or self._timeout(rule) <= 0:
+            return set()
+
+        seeded_key = SEEDED_KEY.format(rule_id=rule.pk)
+        keys = {KEY.format(rule_id=rule.pk, printer_id=printer_id): printer_id for printer_id in printer_ids}
+        found = self.cache.get_many([seeded_key, *keys])
+
+        if seeded_key not in found:
+            return self._seed(rule) & set(printer_ids)
+
+        return {printer_id for key, printer_id in keys.items() if key in found}
+
+    def start(self, rule, printer_ids: Iterable[int]):
+        """Iniciar o cooldown da regra para as impressoras alertadas"""
+        timeout = self._timeout(rule)
+        if timeout <= 0:
+            return
+
+        self.cache.set_many({
+            KEY.format(rule_id=rule.pk, printer_id=printer_id): 1
+            for printer_id in printer_ids
+        }, timeout)
+
+    def _seed(self, rule) -> Set[int]:
+        """Reconstruir o índice da regra a partir dos alertas recentes"""
+        from .models import Alert
+
+        timeout = self._timeout(rule)
+        now = timezone.now()
+        recent = Alert.objects.filter(rule=rule).annotate(
+            seen_at=Coalesce('last_seen_at', 'created_at')
+        ).filter(
+            seen_at__gte=now - timedelta(seconds=timeout)
+        ).values_list('printer_id', 'seen_at')
+
+        entries = {}
+        for printer_id, seen_at in recent:
+            remaining = timeout - int((now - seen_at).total_seconds())
+            key = KEY.format(rule_id=rule.pk, printer_id=printer_id)
+            if remaining > 0 and remaining > entries.get(key, (0, 0))[1]:
+                entries[key] = (printer_id, remaining)
+
+        for key, (printer_id, remaining) in entries.items():
+            self.cache.set(key, 1, remaining)
+        self.cache.set(SEEDED_KEY.format(rule_id=rule.pk), 1, timeout)
+
+        return {printer_id for printer_id, remaining in entries.values()}
@@ -0,0 +1,112 @@
+"""Correlação de alertas simultâneos em incidentes
+
+Quando um switch cai, todas as impressoras da sub-rede ficam offline ao mesmo
+tempo. Em vez de um alerta notificado por impressora, os alertas do mesmo
+tipo que compartilham uma sub-rede, um departamento ou uma localização são
+agrupados sob um alerta pai (incidente): só o incidente gera notificações, e
+os alertas de cada impressora são gravados como filhos, sem notificação.
+
+Os escopos são tentados na ordem de ALERT_CORRELATION_KEYS; um grupo vira
+incidente com ALERT_CORRELATION_MIN_SIZE impressoras ou mais. Enquanto o
+incidente estiver aberto, novos alertas da mesma regra no mesmo escopo são
+anexados a ele.
+"""
+import hashlib
+import ipaddress
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+SCOPE_LABELS = {
+    'subnet': 'sub-rede',
+    'department': 'departamento',
+    'location': 'localização',
+}
+
+
+def correlation_enabled(rule) -> bool:
+    if not getattr(settings, 'ALERT_CORRELATION_ENABLED', False):
+        return False
+    return rule.trigger_type in getattr(settings, 'ALERT_CORRELATION_TRIGGERS', ['printer_offline', 'error_code'])
+
+
+def correlation_keys() -> List[str]:
+    keys = getattr(settings, 'ALERT_CORRELATION_KEYS', ['subnet', 'department', 'location'])
+    return [key for key in keys if key in SCOPE_LABELS]
+
+
+def min_group_size() -> int:
+    return max(2, getattr(settings, 'ALERT_CORRELATION_MIN_SIZE', 5))
+
+
+def scope_value(printer, key: str) -> Optional[str]:
+    """Valor do escopo `key` da impressora (None se não definido)"""
+    if key == 'subnet':
+        try:
+            address = ipaddress.ip_address(printer.ip_address)
+        except ValueError:
+            return None
+        prefix = getattr(settings, 'ALERT_CORRELATION_SUBNET_PREFIX', 24) if address.version == 4 else 64
+        return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+    value = getattr(printer, key, None)
+    return value.strip() if value and value.strip() else None
+
+
+def incident_fingerprint(rule, key: str, value: str) -> str:
+    """Impressão digital do incidente de uma regra em um escopo"""
+    return hashlib.sha256(f"incident:{rule.pk}:{key}:{value}".encode()).hexdigest()
+
+
+def scope_fingerprints(rule, printer) -> List[str]:
+    """Impressões digitais dos incidentes que podem conter a impressora"""
+    fingerprints = []
+    for key in correlation_keys():
+        value = scope_value(printer, key)
+        if value is not None:
+            fingerprints.append(incident_fingerprint(rule, key, value))
+    return fingerprints
+
+
+def group(printers: List) -> Tuple[List[Tuple[str, str, List]], List]:
+    """Separar as impressoras em grupos correlacionados e impressoras avulsas
+
+    Retorna ([(escopo, valor, impressoras)], restantes). Cada impressora entra
+    no máximo em um grupo, pelo primeiro escopo em que ele atinge o tamanho
+    mínimo.
+    """
+    remaining = list(printers)
+    groups = []
+    minimum = min_group_size()
+
+    for key in correlation_keys():
+        by_value: Dict[str, List] = {}
+        for printer in remaining:
+            value = scope_value(printer, key)
+            if value is not None:
+                by_value.setdefault(value, []).append(printer)
+
+        grouped_ids = set()
+        for value, members in by_value.items():
+            if len(members) >= minimum:
+                groups.append((key, value, members))
+                grouped_ids.update(printer.pk for printer in members)
+
+        remaining = [printer for printer in remaining if printer.pk not in grouped_ids]
+
+    return groups, remaining
+
+
+def incident_content(rule, key: str, value: str, printers: List) -> Tuple[str, str]:
+    """Título e mensagem do incidente"""
+    label = f"{SCOPE_LABELS[key]} {value}"
+    title = f"{rule.get_trigger_type_display()} - {len(printers)} impressoras ({label})"
+
+    names = [f"- {printer.name} ({printer.ip_address})" for printer in printers[:20]]
+    if len(printers) > 20:
+        names.append(f"... e mais {len(printers) - 20}")
+    message = (
+        f"{len(printers)} impressoras na {label} dispararam a regra '{rule.name}' ao mesmo tempo:\n"
+        + '\n'.join(names)
+    )
+    return title, message
@@ -0,0 +1,173 @@
+"""Resumo (digest) de notificações por destinatário e canal
+
+A primeira notificação de um destinatário em um canal sai imediatamente e
+abre uma janela de ALERT_NOTIFICATION_DIGEST_WINDOW segundos; as seguintes
+dentro da janela são agendadas para o fim dela. Ao vencer, as retidas são
+reservadas juntas e agrupadas por (destinatário, canal): cada grupo vira uma
+única mensagem de resumo, e todos os logs do grupo são marcados como
+enviados com o resultado dessa mensagem. Em uma queda de rede com centenas
+de impressoras offline, cada técnico recebe um email em vez de centenas.
+Alertas críticos (ALERT_NOTIFICATION_DIGEST_BYPASS_SEVERITIES) nunca são
+retidos.
+"""
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+WINDOW_KEY = 'alerts:digest:{channel}:{recipient_id}'
+
+# Canais com mensagem de resumo; webhooks e notificações do sistema são por alerta
+DIGEST_CAPABLE_CHANNELS = ('email', 'sms')
+
+
+def digest_window() -> int:
+    return getattr(settings, 'ALERT_NOTIFICATION_DIGEST_WINDOW', 0)
+
+
+def digest_channels() -> List[str]:
+    channels = getattr(settings, 'ALERT_NOTIFICATION_DIGEST_CHANNELS', DIGEST_CAPABLE_CHANNELS)
+    return [channel for channel in channels if channel in DIGEST_CAPABLE_CHANNELS]
+
+
+class Digest:
+    """Grupo de notificações de um destinatário enviado como uma mensagem
+
+    Expõe a interface de NotificationLog usada pelos canais de envio; o
+    resultado é registrado com o id da primeira notificação do grupo.
+    """
+
+    def __init__(self, notifications):
+        self.notifications = notifications
+        self.carrier = notifications[0]
+
+    def __len__(self):
+        return len(self.notifications)
+
+    @property
+    def id(self):
+        return self.carrier.id
+
+    @property
+    def notification_type(self):
+        return self.carrier.notification_type
+
+    @property
+    def recipient(self):
+        return self.carrier.recipient
+
+    @property
+    def recipient_address(self):
+        return self.carrier.recipient_address
+
+    @property
+    def alerts(self):
+        return [notification.alert for notification in self.notifications]
+
+    @property
+    def subject(self):
+        return f"{len(self)} novos alertas de impressoras"
+
+    @property
+    def content(self):
+        if self.notification_type == 'sms':
+            titles = '; '.join(alert.title for alert in self.alerts[:3])
+            more = f" (+{len(self) - 3})" if len(self) > 3 else ''
+            return f"{len(self)} alertas: {titles}{more}"
+
+        return '\n'.join(
+            f"[{alert.get_severity_display()}] {alert.printer.name}: {alert.title}"
+            for alert in self.alerts
+        )
+
+    @property
+    def error_message(self):
+        return self.carrier.error_message
+
+    @error_message.setter
+    def error_message(self, value):
+        for notification in self.notifications:
+            notification.error_message = value
+
+
+def bypass_priorities() -> List[int]:
+    from .models import NotificationLog
+
+    severities = getattr(settings, 'ALERT_NOTIFICATION_DIGEST_BYPASS_SEVERITIES', ['critical'])
+    return [NotificationLog.PRIORITY_BY_SEVERITY[severity] for severity in severities]
+
+
+def schedule(notifications):
+    """Definir next_attempt_at das notificações novas conforme a janela de digest
+
+    Uma consulta ao cache por (destinatário, canal): se não há janela aberta,
+    a primeira notificação sai agora e abre a janela; as demais são retidas
+    até o fim da janela.
+    """
+    window = digest_window()
+    if window <= 0:
+        return
+
+    channels = digest_channels()
+    bypass = bypass_priorities()
+    now = timezone.now()
+    window_end = now + timedelta(seconds=window)
+    groups: Dict[str, list] = {}
+
+    for notification in notifications:
+        if notification.notification_type in channels and notification.priority not in bypass:
+            key = WINDOW_KEY.format(channel=notification.notification_type, recipient_id=notification.recipient_id)
+            groups.setdefault(key, []).append(notification)
+
+    for key, group in groups.items():
+        if cache.add(key, window_end, window):
+            opened, held, held_until = group[:1], group[1:], window_end
+        else:
+            opened, held, held_until = [], group, cache.get(key) or window_end
+
+        for notification in opened:
+            notification.next_attempt_at = now
+        for notification in held:
+            notification.next_attempt_at = held_until
+
+
+def collapse(notifications) -> list:
+    """Agrupar as notificações reservadas por (destinatário, canal)
+
+    Grupos com ALERT_NOTIFICATION_DIGEST_MIN_SIZE ou mais notificações em um
+    canal de digest viram um Digest; as demais seguem individualmente.
+    """
+    if digest_window() <= 0:
+        return list(notifications)
+
+    channels = digest_channels()
+    min_size = max(2, getattr(settings, 'ALERT_NOTIFICATION_DIGEST_MIN_SIZE', 2))
+    groups: Dict[tuple, list] = {}
+    units = []
+
+    for notification in notifications:
+        if notification.notification_type in channels:
+            groups.setdefault((notification.recipient_id, notification.notification_type), []).append(notification)
+        else:
+            units.append(notification)
+
+    for group in groups.values():
+        if len(group) >= min_size:
+            units.append(Digest(group))
+        else:
+            units.extend(group)
+
+    return units
+
+
+def expand(units, results: Dict[int, bool]) -> Dict[int, bool]:
+    """Estender o resultado de cada digest a todas as notificações do grupo"""
+    expanded = dict(results)
+    for unit in units:
+        if isinstance(unit, Digest):
+            success = results.get(unit.id, False)
+            for notification in unit.notifications:
+                expanded[notification.id] = success
+    return expanded
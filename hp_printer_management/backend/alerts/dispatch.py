@@ -0,0 +1,268 @@
+"""Entrega de notificações particionada por canal
+
+Cada canal (email, sms, system, webhook) tem a própria fila Celery, com
+concorrência e limite de taxa independentes. Os workers reservam lotes de
+notificações pendentes com SELECT ... FOR UPDATE SKIP LOCKED: linhas já
+travadas por outro worker são puladas, e a reserva marca o lote como
+'processing' antes de qualquer envio, de modo que vários workers drenam a
+fila em paralelo sem enviar a mesma notificação duas vezes.
+
+Dentro de cada canal, as notificações saem por prioridade (severidade do
+alerta: críticas e altas primeiro) e respeitam os limites de taxa por canal
+e por destinatário (alerts.ratelimit); um envio sem ficha é adiado, sem
+contar como tentativa.
+
+Só são reservadas as notificações vencidas (next_attempt_at <= agora), uma
+busca por intervalo no índice (status, next_attempt_at). A reserva adia
+next_attempt_at pelo prazo ALERT_NOTIFICATION_LEASE_SECONDS: se o worker for
+encerrado no meio do lote, a notificação volta a vencer ao fim do prazo. Uma
+falha reagenda a notificação com backoff exponencial do canal
+(ALERT_NOTIFICATION_RETRY_BACKOFF), para não insistir em um servidor SMTP ou
+endpoint de webhook fora do ar.
+
+Cada canal tem no máximo ALERT_NOTIFICATION_MAX_PARALLEL drenagens em
+andamento (enfileiradas, executando ou reagendadas): cada uma ocupa uma vaga
+no cache, liberada ao terminar ou expirada se o worker cair.
+"""
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from hp_management import metrics
+
+from .models import NotificationLog
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = [channel for channel, label in NotificationLog.NOTIFICATION_TYPES]
+QUEUE_NAME = 'notifications.{channel}'
+DRAIN_SLOT_KEY = 'alerts:dispatch:drain:{channel}:{slot}'
+CLAIMABLE_STATUSES = ['pending', 'processing']
+SEVERITY_BY_PRIORITY = {priority: severity for severity, priority in NotificationLog.PRIORITY_BY_SEVERITY.items()}
+
+
+def queue_name(channel: str) -> str:
+    return QUEUE_NAME.format(channel=channel)
+
+
+def batch_size() -> int:
+    return max(1, getattr(settings, 'ALERT_NOTIFICATION_BATCH_SIZE', 100))
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'ALERT_NOTIFICATION_LEASE_SECONDS', 300))
+
+
+def max_parallel() -> int:
+    return max(1, getattr(settings, 'ALERT_NOTIFICATION_MAX_PARALLEL', 4))
+
+
+def _slot_ttl(delay: float = 0) -> int:
+    """Validade de uma vaga: espera até começar, uma drenagem e a reserva do lote"""
+    drain_seconds = getattr(settings, 'ALERT_NOTIFICATION_DRAIN_SECONDS', 50)
+    return int(delay + drain_seconds + _lease().total_seconds())
+
+
+def acquire_drain_slots(channel: str, wanted: int) -> List[int]:
+    """Ocupar vagas livres até o canal ter `wanted` drenagens em andamento"""
+    slots, busy = [], 0
+    for slot in range(max_parallel()):
+        if busy + len(slots) >= wanted:
+            break
+        if cache.add(DRAIN_SLOT_KEY.format(channel=channel, slot=slot), 1, _slot_ttl()):
+            slots.append(slot)
+        else:
+            busy += 1
+    return slots
+
+
+def hold_drain_slot(channel: str, slot: int, delay: float = 0):
+    """Manter a vaga de uma drenagem reagendada para daqui a `delay` segundos"""
+    cache.set(DRAIN_SLOT_KEY.format(channel=channel, slot=slot), 1, _slot_ttl(delay))
+
+
+def release_drain_slot(channel: str, slot: int):
+    cache.delete(DRAIN_SLOT_KEY.format(channel=channel, slot=slot))
+
+
+def retry_delay(channel: str, attempts: int) -> float:
+    """Atraso até a próxima tentativa após `attempts` falhas
+
+    Exponencial a partir do atraso base do canal, limitado ao máximo, com
+    metade do valor sorteada para espalhar as novas tentativas.
+    """
+    backoff = getattr(settings, 'ALERT_NOTIFICATION_RETRY_BACKOFF', {})
+    base, cap = backoff.get(channel, (60, 3600))
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claimable(channel: str = None, now=None):
+    """Notificações vencidas: pendentes ou com reserva expirada"""
+    now = now or timezone.now()
+    queryset = NotificationLog.objects.filter(
+        status__in=CLAIMABLE_STATUSES,
+        next_attempt_at__lte=now,
+        attempts__lt=F('max_attempts')
+    )
+    if channel is not None:
+        queryset = queryset.filter(notification_type=channel)
+    return queryset
+
+
+def backlog() -> Dict[str, int]:
+    """Notificações elegíveis por canal, em uma consulta"""
+    counts = claimable().values('notification_type').annotate(total=Count('id'))
+    return {row['notification_type']: row['total'] for row in counts}
+
+
+def record_queue_metrics():
+    """Atualizar profundidade e idade da fila por canal e severidade (uma consulta)"""
+    now = timezone.now()
+    rows = NotificationLog.objects.filter(status__in=CLAIMABLE_STATUSES).values(
+        'notification_type', 'priority'
+    ).annotate(total=Count('id'), oldest=Min('created_at'))
+
+    seen = set()
+    for row in rows:
+        labels = (row['notification_type'], SEVERITY_BY_PRIORITY.get(row['priority'], 'medium'))
+        seen.add(labels)
+        metrics.NOTIFICATION_QUEUE_DEPTH.labels(*labels).set(row['total'])
+        metrics.NOTIFICATION_QUEUE_AGE.labels(*labels).set((now - row['oldest']).total_seconds())
+
+    # Zerar as combinações que esvaziaram
+    for channel in CHANNELS:
+        for severity in NotificationLog.PRIORITY_BY_SEVERITY:
+            if (channel, severity) not in seen:
+                metrics.NOTIFICATION_QUEUE_DEPTH.labels(channel, severity).set(0)
+                metrics.NOTIFICATION_QUEUE_AGE.labels(channel, severity).set(0)
+
+
+def claim(channel: str, limit: int = None) -> List[NotificationLog]:
+    """Reservar um lote do canal para este worker
+
+    As linhas travadas por outra transação são puladas (SKIP LOCKED) e as
+    reservadas passam a 'processing', com o prazo da reserva em
+    next_attempt_at, na mesma transação.
+    """
+    limit = limit or batch_size()
+    now = timezone.now()
+
+    with transaction.atomic():
+        ids = list(
+            claimable(channel, now)
+            .select_for_update(skip_locked=True)
+            .order_by('priority', 'next_attempt_at', 'recipient_id', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        NotificationLog.objects.filter(id__in=ids).update(
+            status='processing', next_attempt_at=now + _lease()
+        )
+
+    return list(
+        NotificationLog.objects.filter(id__in=ids)
+        .select_related('alert__printer', 'recipient')
+        .order_by('priority', 'next_attempt_at', 'recipient_id', 'id')
+    )
+
+
+def complete(notifications: List[NotificationLog], results: Dict[int, bool],
+             deferred: Dict[int, float] = None):
+    """Gravar o resultado do lote, liberar a reserva e reagendar as falhas
+
+    `deferred` (id -> segundos) são as notificações barradas pelo limite de
+    taxa: voltam para a fila sem consumir tentativa.
+    """
+    now = timezone.now()
+    deferred = deferred or {}
+    for notification in notifications:
+        if notification.id in deferred:
+            notification.status = 'pending'
+            notification.next_attempt_at = now + timedelta(seconds=deferred[notification.id])
+        elif results.get(notification.id, False):
+            notification.status = 'sent'
+            notification.sent_at = now
+        else:
+            notification.attempts += 1
+            if notification.attempts >= notification.max_attempts:
+                notification.status = 'failed'
+            else:
+                notification.status = 'pending'
+                notification.next_attempt_at = now + timedelta(
+                    seconds=retry_delay(notification.notification_type, notification.attempts)
+                )
+
+    NotificationLog.objects.bulk_update(
+        notifications,
+        ['status', 'sent_at', 'attempts', 'error_message', 'next_attempt_at'],
+        batch_size=500
+    )
+
+
+def drain(channel: str, time_budget: float = None) -> Dict[str, int]:
+    """Reservar e enviar lotes do canal até esvaziar a fila ou esgotar o tempo
+
+    Notificações do mesmo destinatário no lote são enviadas como um único
+    resumo (ver alerts.digest). Se o balde do canal esvaziar, a drenagem
+    para e `retry_in` indica em quantos segundos retomá-la.
+
+    Retorna as contagens de enviadas e não enviadas e se o tempo acabou com
+    notificações ainda na fila (`has_more`), para que a tarefa se reagende.
+    """
+    from . import digest
+    from .ratelimit import RateLimiter
+    from .services import NotificationService
+
+    if time_budget is None:
+        time_budget = getattr(settings, 'ALERT_NOTIFICATION_DRAIN_SECONDS', 50)
+
+    notification_service = NotificationService()
+    limiter = RateLimiter()
+    started_at = time.monotonic()
+    sent = failed = 0
+
+    while True:
+        notifications = claim(channel)
+        if not notifications:
+            return {'sent': sent, 'failed': failed, 'has_more': False}
+
+        units = digest.collapse(notifications)
+
+        # Um resumo é uma única mensagem: consome uma ficha
+        waits = limiter.acquire([(unit.notification_type, unit.recipient.pk) for unit in units])
+        allowed, deferred, channel_wait = [], {}, 0.0
+        for unit, (wait, scope) in zip(units, waits):
+            if not wait:
+                allowed.append(unit)
+                continue
+            members = unit.notifications if isinstance(unit, digest.Digest) else [unit]
+            deferred.update({notification.id: wait for notification in members})
+            if scope == 'channel':
+                channel_wait = max(channel_wait, wait)
+
+        try:
+            results = digest.expand(allowed, notification_service.send_batch(allowed)) if allowed else {}
+        except Exception as e:
+            logger.error(f"Error sending {channel} notification batch: {e}")
+            results = {}
+
+        complete(notifications, results, deferred)
+        batch_sent = sum(1 for notification in notifications if results.get(notification.id, False))
+        sent += batch_sent
+        failed += len(notifications) - batch_sent - len(deferred)
+
+        if channel_wait:
+            return {'sent': sent, 'failed': failed, 'has_more': True, 'retry_in': channel_wait}
+
+        if time.monotonic() - started_at >= time_budget:
+            return {'sent': sent, 'failed': failed, 'has_more': True}
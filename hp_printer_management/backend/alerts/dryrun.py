@@ -0,0 +1,116 @@
+"""Simulação (dry-run) de uma regra de alerta
+
+Avalia a regra como a tarefa check_alert_rules faria, sem criar alertas nem
+notificações, e relata o custo da avaliação: tempo, número de consultas ao
+banco, o plano (EXPLAIN) da consulta compilada e uma estimativa das
+notificações que a regra geraria agora, considerando cooldown, alertas já
+abertos, correlação em incidentes e os destinatários da regra.
+"""
+import time
+from typing import Dict, List
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .models import Alert
+
+
+def explain(rule) -> Dict:
+    """SQL e plano da consulta compilada da regra (None se não compila)"""
+    from .rules import compile_rule, triggered_printers
+
+    compiled = compile_rule(rule)
+    if compiled is None:
+        return {'compiled': False, 'sql': None, 'plan': None}
+
+    queryset = triggered_printers(rule)
+    try:
+        plan = queryset.explain()
+    except Exception as e:
+        plan = f'EXPLAIN indisponível: {e}'
+
+    return {'compiled': True, 'rule': repr(compiled), 'sql': str(queryset.query), 'plan': plan}
+
+
+def _notified_alerts(rule, printers: List, service) -> Dict[str, int]:
+    """Quantos alertas seriam criados e quantos seriam notificados"""
+    from . import correlation
+
+    eligible = service.exclude_in_cooldown(rule, printers)
+
+    fingerprints = {printer.pk: service.alert_fingerprint(rule, printer) for printer in eligible}
+    open_fingerprints = set(Alert.objects.filter(
+        fingerprint__in=list(fingerprints.values()),
+        status__in=Alert.OPEN_STATUSES
+    ).values_list('fingerprint', flat=True))
+    new_printers = [printer for printer in eligible if fingerprints[printer.pk] not in open_fingerprints]
+
+    incidents, attached = 0, 0
+    if correlation.correlation_enabled(rule) and new_printers:
+        open_incidents = set(Alert.objects.filter(
+            rule=rule,
+            is_incident=True,
+            status__in=Alert.OPEN_STATUSES
+        ).values_list('fingerprint', flat=True))
+        loose = [
+            printer for printer in new_printers
+            if not open_incidents.intersection(correlation.scope_fingerprints(rule, printer))
+        ]
+        attached = len(new_printers) - len(loose)
+        groups, remaining = correlation.group(loose)
+        incidents = len(groups)
+        notified = incidents + len(remaining)
+    else:
+        notified = len(new_printers)
+
+    return {
+        'in_cooldown': len(printers) - len(eligible),
+        'already_open': len(eligible) - len(new_printers),
+        'new_alerts': len(new_printers),
+        'incidents': incidents,
+        'attached_to_open_incidents': attached,
+        'notified_alerts': notified,
+    }
+
+
+def fan_out(rule, printers: List, service) -> Dict:
+    """Estimativa das notificações que a regra geraria agora"""
+    from .recipients import rule_recipients
+
+    alerts = _notified_alerts(rule, printers, service)
+    recipients = rule_recipients(rule)
+
+    per_alert = {
+        'email': sum(1 for user in recipients if user['email']) if rule.send_email else 0,
+        'sms': sum(1 for user in recipients if user['phone']) if rule.send_sms else 0,
+        'system': len(recipients) if rule.send_system_notification else 0,
+    }
+    notifications = {channel: count * alerts['notified_alerts'] for channel, count in per_alert.items()}
+    notifications['total'] = sum(notifications.values())
+
+    return {
+        **alerts,
+        'recipients': len(recipients),
+        'notifications': notifications,
+    }
+
+
+def dry_run(rule) -> Dict:
+    """Avaliar a regra sem efeitos colaterais e medir o custo da avaliação"""
+    from .services import AlertService
+
+    service = AlertService()
+
+    with CaptureQueriesContext(connection) as queries:
+        started_at = time.perf_counter()
+        triggered = service.check_rule_conditions(rule)
+        elapsed = time.perf_counter() - started_at
+
+    return {
+        'printers': triggered,
+        'evaluation_ms': round(elapsed * 1000, 2),
+        'query_count': len(queries.captured_queries),
+        'query_time_ms': round(sum(float(query['time']) for query in queries.captured_queries) * 1000, 2),
+        'explain': explain(rule),
+        'fan_out': fan_out(rule, triggered, service),
+    }
@@ -0,0 +1,62 @@
+"""Renderização dos emails de alerta
+
+O corpo HTML de um alerta é o mesmo para todos os destinatários, exceto o
+nome na saudação. Cada alerta é renderizado uma única vez com um marcador no
+lugar do nome, e a mensagem de cada destinatário é obtida substituindo o
+marcador. Nos resumos (digest), a linha de cada alerta também é renderizada
+uma vez e reaproveitada em todos os resumos que a incluem. Os templates vêm
+do loader em cache, compilados uma vez por processo.
+"""
+from typing import Dict
+
+from django.template.loader import get_template
+from django.utils.html import escape
+
+RECIPIENT_TOKEN = '%%recipient_name%%'
+
+
+def recipient_name(recipient) -> str:
+    return recipient.get_full_name() or recipient.username
+
+
+class AlertEmailRenderer:
+    """Corpos HTML dos emails de alerta, renderizados uma vez por alerta"""
+
+    def __init__(self):
+        self._bodies: Dict[int, str] = {}
+        self._rows: Dict[int, str] = {}
+
+    def alert_body(self, alert) -> str:
+        """HTML do alerta com o marcador do destinatário"""
+        if alert.pk not in self._bodies:
+            self._bodies[alert.pk] = get_template('alerts/email_alert.html').render({
+                'alert': alert,
+                'printer': alert.printer,
+                'recipient_name': RECIPIENT_TOKEN,
+                'content': alert.message,
+            })
+        return self._bodies[alert.pk]
+
+    def alert_row(self, alert) -> str:
+        """Linha do alerta na tabela do resumo"""
+        if alert.pk not in self._rows:
+            self._rows[alert.pk] = get_template('alerts/email_alert_row.html').render({'alert': alert})
+        return self._rows[alert.pk]
+
+    def digest_body(self, alerts) -> str:
+        """HTML do resumo montado a partir das linhas já renderizadas"""
+        return get_template('alerts/email_digest.html').render({
+            'count': len(alerts),
+            'rows': [self.alert_row(alert) for alert in alerts],
+            'recipient_name': RECIPIENT_TOKEN,
+        })
+
+    def html(self, notification) -> str:
+        """HTML final da notificação (ou resumo) para o seu destinatário"""
+        from .digest import Digest
+
+        if isinstance(notification, Digest):
+            body = self.digest_body(notification.alerts)
+        else:
+            body = self.alert_body(notification.alert)
+        return body.replace(RECIPIENT_TOKEN, escape(recipient_name(notification.recipient)))
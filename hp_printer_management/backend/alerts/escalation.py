@@ -0,0 +1,295 @@
+"""Escalonamento de alertas não reconhecidos
+
+Os alertas notificados (incidentes e alertas sem pai) cuja severidade tem
+níveis em ALERT_ESCALATION_TIERS entram em um sorted set do Redis com o
+instante do próximo escalonamento como score. A tarefa process_escalations
+lê apenas o início do conjunto (ZRANGEBYSCORE até agora): o custo é o dos
+alertas vencidos, e não o do histórico de alertas abertos.
+
+Cada nível define o atraso (a partir da criação, ou do nível anterior), os
+perfis de usuário notificados e os canais. Ao vencer, o alerta ainda sem
+reconhecimento passa a 'escalated', sobe de nível e é reagendado para o
+nível seguinte, se houver. Reconhecer, resolver ou fechar o alerta o retira
+do conjunto; um membro que sobrar é descartado na leitura, pois o status é
+conferido no banco.
+
+A leitura reserva os membros vencidos adiando o score pelo prazo
+ALERT_ESCALATION_LEASE_SECONDS (script Lua atômico): se o worker cair antes
+de concluir, os alertas voltam a vencer. A escalada é uma atualização
+condicional ao status e ao nível lidos: um alerta reconhecido ou escalado
+por outro worker nesse intervalo não muda nem gera notificações. Se o Redis
+perder o conjunto, ele é reconstruído uma vez a partir dos alertas abertos.
+
+Requer Redis (ALERT_ESCALATION_REDIS_URL ou o cache); sem ele o
+escalonamento fica inativo e as demais operações seguem normalmente.
+"""
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DUE_KEY = 'hp:escalation:due'
+SEEDED_KEY = 'hp:escalation:seeded'
+SEEDING_KEY = 'hp:escalation:seeding'
+
+# Alertas que ainda podem escalar (sem reconhecimento)
+ESCALATABLE_STATUSES = ['new', 'escalated']
+
+# KEYS: conjunto; ARGV: agora, limite, fim da reserva.
+# Retorna os membros vencidos, já adiados até o fim da reserva.
+CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+  redis.call('ZADD', KEYS[1], 'XX', ARGV[3], member)
+end
+return due
+"""
+
+
+@lru_cache(maxsize=1)
+def _client() -> redis.Redis:
+    url = getattr(settings, 'ALERT_ESCALATION_REDIS_URL', None) or settings.CACHES['default'].get('LOCATION', '')
+    return redis.Redis.from_url(url)
+
+
+def escalation_enabled() -> bool:
+    return getattr(settings, 'ALERT_ESCALATION_ENABLED', False)
+
+
+def tiers_for(severity: str) -> List[Dict]:
+    """Níveis de escalonamento da severidade: after_minutes, roles e channels"""
+    return getattr(settings, 'ALERT_ESCALATION_TIERS', {}).get(severity, [])
+
+
+def batch_size() -> int:
+    return getattr(settings, 'ALERT_ESCALATION_BATCH_SIZE', 500)
+
+
+def _lease() -> int:
+    return getattr(settings, 'ALERT_ESCALATION_LEASE_SECONDS', 300)
+
+
+def next_due(alert) -> Optional[datetime]:
+    """Instante do próximo nível do alerta, ou None se não há mais níveis"""
+    tiers = tiers_for(alert.severity)
+    if alert.escalation_level >= len(tiers):
+        return None
+    started_at = alert.escalated_at or alert.created_at
+    return started_at + timedelta(minutes=tiers[alert.escalation_level]['after_minutes'])
+
+
+def schedule(alerts: Iterable):
+    """Agendar o próximo nível dos alertas após o commit da transação corrente"""
+    if not escalation_enabled():
+        return
+
+    due = {}
+    for alert in alerts:
+        if alert.parent_id is None and alert.status in ESCALATABLE_STATUSES:
+            due_at = next_due(alert)
+            if due_at is not None:
+                due[str(alert.pk)] = due_at.timestamp()
+
+    if due:
+        transaction.on_commit(lambda: _add(due))
+
+
+def _add(due: Dict[str, float]):
+    try:
+        _client().zadd(DUE_KEY, due)
+    except (redis.RedisError, ValueError) as e:
+        logger.error(f"Error scheduling {len(due)} alert escalations: {e}")
+
+
+def cancel(alert_ids: Iterable[int]):
+    """Retirar os alertas do conjunto (reconhecidos, resolvidos ou fechados)"""
+    members = [str(alert_id) for alert_id in alert_ids]
+    if not members or not escalation_enabled():
+        return
+
+    try:
+        _client().zrem(DUE_KEY, *members)
+    except (redis.RedisError, ValueError) as e:
+        logger.error(f"Error cancelling {len(members)} alert escalations: {e}")
+
+
+def ensure_seeded():
+    """Reconstruir o conjunto a partir do banco se o Redis o perdeu (ou na primeira vez)
+
+    Nenhum alerta recebe score antes de agora + o atraso do seu próximo
+    nível: na primeira ativação (ou após a perda do conjunto) os alertas
+    antigos não escalam todos de uma vez. Membros já agendados mantêm o
+    score (ZADD NX). A marca SEEDED_KEY só é gravada depois da carga
+    completa; uma trava curta evita duas cargas simultâneas.
+    """
+    from .models import Alert
+
+    client = _client()
+    if client.exists(SEEDED_KEY):
+        return
+    if not client.set(SEEDING_KEY, 1, nx=True, ex=_lease()):
+        return
+
+    try:
+        alerts = Alert.objects.filter(
+            status__in=ESCALATABLE_STATUSES,
+            parent__isnull=True,
+            severity__in=list(getattr(settings, 'ALERT_ESCALATION_TIERS', {}))
+        ).only('id', 'severity', 'status', 'created_at', 'escalated_at', 'escalation_level', 'parent_id')
+
+        now = timezone.now()
+        due = {}
+        for alert in alerts.iterator(chunk_size=2000):
+            due_at = next_due(alert)
+            if due_at is None:
+                continue
+            tier = tiers_for(alert.severity)[alert.escalation_level]
+            due_at = max(due_at, now + timedelta(minutes=tier['after_minutes']))
+            due[str(alert.pk)] = due_at.timestamp()
+            if len(due) >= 2000:
+                client.zadd(DUE_KEY, due, nx=True)
+                due = {}
+        if due:
+            client.zadd(DUE_KEY, due, nx=True)
+
+        client.set(SEEDED_KEY, 1)
+    finally:
+        client.delete(SEEDING_KEY)
+    logger.info("Alert escalation schedule rebuilt from the database")
+
+
+def claim_due(now: datetime, limit: int = None) -> List[int]:
+    """Reservar os alertas vencidos (adiando o score pelo prazo da reserva)"""
+    client = _client()
+    script = client.register_script(CLAIM_SCRIPT)
+    members = script(
+        keys=[DUE_KEY],
+        args=[now.timestamp(), limit or batch_size(), now.timestamp() + _lease()]
+    )
+    return [int(member) for member in members]
+
+
+def _tier_recipients(roles: List[str], cache: Dict) -> List[Dict]:
+    from users.models import User
+
+    key = tuple(sorted(roles))
+    if key not in cache:
+        cache[key] = list(
+            User.objects.filter(is_active=True, role__in=roles)
+            .order_by('id')
+            .values('id', 'username', 'email', 'phone')
+        )
+    return cache[key]
+
+
+def _tier_notifications(alert, tier: Dict, level: int, recipients: List[Dict]) -> List:
+    from .models import NotificationLog
+
+    subject = f"[Escalonamento {level}] {alert.title}"
+    priority = NotificationLog.PRIORITY_BY_SEVERITY.get(alert.severity, 2)
+    channels = tier.get('channels', ['email', 'system'])
+
+    notifications = []
+    for user in recipients:
+        if 'email' in channels and user['email']:
+            notifications.append(NotificationLog(
+                alert=alert, recipient_id=user['id'], priority=priority,
+                notification_type='email', recipient_address=user['email'],
+                subject=subject, content=alert.message
+            ))
+        if 'sms' in channels and user['phone']:
+            notifications.append(NotificationLog(
+                alert=alert, recipient_id=user['id'], priority=priority,
+                notification_type='sms', recipient_address=user['phone'],
+                content=subject
+            ))
+        if 'system' in channels:
+            notifications.append(NotificationLog(
+                alert=alert, recipient_id=user['id'], priority=priority,
+                notification_type='system', recipient_address=user['username'],
+                subject=subject, content=alert.message
+            ))
+    return notifications
+
+
+def escalate_due(now: datetime = None) -> Dict[str, int]:
+    """Escalar os alertas vencidos e reagendar os que têm próximo nível
+
+    Retorna quantos alertas foram escalados e quantas notificações criadas.
+    """
+    from hp_management import realtime
+    from . import stats
+    from .models import Alert, NotificationLog
+
+    now = now or timezone.now()
+    ensure_seeded()
+    ids = claim_due(now)
+    if not ids:
+        return {'escalated': 0, 'notifications': 0}
+
+    alerts = list(
+        Alert.objects.filter(id__in=ids, status__in=ESCALATABLE_STATUSES).select_related('printer')
+    )
+
+    escalated, notifications, skipped, recipients_cache = [], [], set(), {}
+    with transaction.atomic():
+        for alert in alerts:
+            # O banco decide: um membro adiantado (reserva expirada, nível já aplicado) só é reagendado
+            due_at = next_due(alert)
+            if due_at is None or due_at > now:
+                continue
+
+            # Condicional ao status e ao nível lidos: se o alerta foi reconhecido, resolvido
+            # ou escalado por outro worker desde a leitura, nada muda e ninguém é notificado
+            level = alert.escalation_level
+            updated = Alert.objects.filter(
+                pk=alert.pk, status__in=ESCALATABLE_STATUSES, escalation_level=level
+            ).update(status='escalated', escalation_level=level + 1, escalated_at=now)
+            if not updated:
+                skipped.add(alert.pk)
+                continue
+
+            tier = tiers_for(alert.severity)[level]
+            alert.escalation_level = level + 1
+            alert.escalated_at = now
+            alert.status = 'escalated'
+            escalated.append(alert)
+
+            recipients = _tier_recipients(tier.get('roles', ['admin']), recipients_cache)
+            notifications.extend(_tier_notifications(alert, tier, alert.escalation_level, recipients))
+
+        NotificationLog.objects.bulk_create(notifications, batch_size=1000)
+
+    # Próximo nível de quem tem; os demais membros reservados saem do conjunto
+    # (os que mudaram no banco ficam reservados e são relidos quando a reserva vencer)
+    rescheduled = {}
+    for alert in alerts:
+        if alert.pk in skipped:
+            continue
+        due_at = next_due(alert)
+        if due_at is not None:
+            rescheduled[str(alert.pk)] = due_at.timestamp()
+    finished = [
+        str(alert_id) for alert_id in ids
+        if str(alert_id) not in rescheduled and alert_id not in skipped
+    ]
+
+    pipeline = _client().pipeline(transaction=False)
+    if rescheduled:
+        pipeline.zadd(DUE_KEY, rescheduled)
+    if finished:
+        pipeline.zrem(DUE_KEY, *finished)
+    pipeline.execute()
+
+    if escalated:
+        stats.invalidate()
+    realtime.alerts_updated(escalated)
+    logger.info(f"Escalated {len(escalated)} alerts with {len(notifications)} notifications")
+    return {'escalated': len(escalated), 'notifications': len(notifications)}
@@ -0,0 +1,28 @@
+import django_filters
+from django.db.models import Q
+
+from .models import Alert
+
+
+class AlertFilter(django_filters.FilterSet):
+    """Filtros da listagem de alertas, reaproveitados pelas operações em lote"""
+
+    SEARCH_FIELDS = ['title', 'message', 'printer__name']
+
+    search = django_filters.CharFilter(method='filter_search')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+    department = django_filters.CharFilter(field_name='printer__department')
+
+    class Meta:
+        model = Alert
+        fields = ['status', 'severity', 'printer', 'rule', 'is_incident', 'parent']
+
+    def filter_search(self, queryset, name, value):
+        query = Q()
+        for term in value.split():
+            term_query = Q()
+            for field in self.SEARCH_FIELDS:
+                term_query |= Q(**{f'{field}__icontains': term})
+            query &= term_query
+        return queryset.filter(query)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from printers.models import Printer
 from users.models import User
@@ -65,8 +66,10 @@ class AlertRule(models.Model):
             ('eq', 'Igual'),
             ('ne', 'Diferente'),
         ],
-        default='lt',
-        verbose_name='Operador'
+        blank=True,
+        default='',
+        verbose_name='Operador',
+        help_text='Vazio usa o operador padrão do gatilho'
     )
     
     # Configurações de notificação
@@ -141,6 +144,9 @@ class Alert(models.Model):
         ('closed', 'Fechado'),
     ]
     
+    # Alertas ainda em aberto: repetições incrementam a ocorrência em vez de criar outro
+    OPEN_STATUSES = ['new', 'acknowledged', 'escalated']
+    
     rule = models.ForeignKey(
         AlertRule,
         on_delete=models.CASCADE,
@@ -184,6 +190,52 @@ class Alert(models.Model):
         verbose_name='Dados do Contexto'
     )
     
+    # Deduplicação
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        verbose_name='Impressão Digital'
+    )
+    
+    occurrence_count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Ocorrências'
+    )
+    
+    last_seen_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Visto por Último em'
+    )
+    
+    # Correlação: alertas simultâneos de um escopo agrupados sob um incidente
+    is_incident = models.BooleanField(
+        default=False,
+        verbose_name='Incidente'
+    )
+    
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='children',
+        verbose_name='Incidente Pai'
+    )
+    
+    # Escalonamento: último nível aplicado a um alerta sem reconhecimento
+    escalation_level = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Nível de Escalonamento'
+    )
+    
+    escalated_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Escalado em'
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -235,6 +287,13 @@ class Alert(models.Model):
             models.Index(fields=['printer', '-created_at']),
             models.Index(fields=['severity', '-created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint'],
+                condition=models.Q(status__in=['new', 'acknowledged', 'escalated']),
+                name='unique_open_alert_fingerprint',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.printer.name} ({self.get_status_display()})"
@@ -250,8 +309,17 @@ class NotificationLog(models.Model):
         ('webhook', 'Webhook'),
     ]
     
+    # Prioridade de entrega derivada da severidade do alerta (menor sai primeiro)
+    PRIORITY_BY_SEVERITY = {
+        'critical': 0,
+        'high': 1,
+        'medium': 2,
+        'low': 3,
+    }
+    
     STATUS_CHOICES = [
         ('pending', 'Pendente'),
+        ('processing', 'Processando'),
         ('sent', 'Enviada'),
         ('failed', 'Falhou'),
         ('delivered', 'Entregue'),
@@ -328,6 +396,16 @@ class NotificationLog(models.Model):
         verbose_name='Máximo de Tentativas'
     )
     
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Próxima Tentativa em'
+    )
+    
+    priority = models.PositiveSmallIntegerField(
+        default=2,
+        verbose_name='Prioridade'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Criada em'
@@ -337,6 +415,82 @@ class NotificationLog(models.Model):
         verbose_name = 'Log de Notificação'
         verbose_name_plural = 'Logs de Notificações'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['status', 'priority', 'next_attempt_at']),
+        ]
     
     def __str__(self):
         return f"{self.get_notification_type_display()} para {self.recipient.username} - {self.get_status_display()}"
+
+
+class AlertDailyCount(models.Model):
+    """Contagem diária de alertas por regra, impressora e severidade (rollup)"""
+    
+    date = models.DateField(
+        verbose_name='Data'
+    )
+    
+    rule = models.ForeignKey(
+        AlertRule,
+        on_delete=models.CASCADE,
+        related_name='daily_counts',
+        verbose_name='Regra'
+    )
+    
+    printer = models.ForeignKey(
+        Printer,
+        on_delete=models.CASCADE,
+        related_name='alert_daily_counts',
+        verbose_name='Impressora'
+    )
+    
+    severity = models.CharField(
+        max_length=20,
+        choices=AlertRule.SEVERITY_LEVELS,
+        verbose_name='Severidade'
+    )
+    
+    created_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Alertas Criados'
+    )
+    
+    resolved_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Alertas Resolvidos'
+    )
+    
+    class Meta:
+        verbose_name = 'Contagem Diária de Alertas'
+        verbose_name_plural = 'Contagens Diárias de Alertas'
+        unique_together = ['date', 'rule', 'printer', 'severity']
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'severity']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.printer.name} ({self.rule.name}): {self.created_count}"
+
+
+class AlertDataFix(models.Model):
+    """Correção de dados pontual já aplicada (executada uma única vez no migrate)"""
+    
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Nome'
+    )
+    
+    applied_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Aplicada em'
+    )
+    
+    class Meta:
+        verbose_name = 'Correção de Dados'
+        verbose_name_plural = 'Correções de Dados'
+    
+    def __str__(self):
+        return self.name
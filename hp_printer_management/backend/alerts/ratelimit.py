@@ -0,0 +1,125 @@
+"""Limites de taxa das notificações (token bucket no Redis)
+
+Cada envio consome uma ficha do balde do canal (todo o tráfego de SMS, por
+exemplo) e uma do balde do destinatário naquele canal. Os baldes são
+recarregados continuamente à taxa configurada e comportam rajadas até a
+capacidade. A verificação e o consumo dos dois baldes são atômicos (script
+Lua), e as verificações de um lote inteiro vão em um único pipeline.
+
+Um envio sem ficha não conta como falha: a notificação é adiada pelo tempo
+que falta para o balde ter uma ficha. Se o Redis estiver indisponível (ou
+o cache não for Redis e ALERT_RATE_LIMIT_REDIS_URL não estiver definido), os
+envios são liberados. Os limites vêm de ALERT_NOTIFICATION_RATE_LIMITS.
+"""
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import redis
+from django.conf import settings
+
+from hp_management import metrics
+
+logger = logging.getLogger(__name__)
+
+BUCKET_KEY = 'hp:ratelimit:{channel}'
+RECIPIENT_BUCKET_KEY = 'hp:ratelimit:{channel}:{recipient_id}'
+
+# KEYS: baldes; ARGV: agora, depois (fichas por segundo, capacidade) de cada balde.
+# Retorna {espera em segundos, índice do balde sem ficha}; espera "0" = liberado.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+local blocked = 0
+for i = 1, #KEYS do
+  local rate = tonumber(ARGV[2 * i])
+  local capacity = tonumber(ARGV[2 * i + 1])
+  local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+  local available = tonumber(state[1]) or capacity
+  local updated_at = tonumber(state[2]) or now
+  available = math.min(capacity, available + math.max(0, now - updated_at) * rate)
+  tokens[i] = available
+  if available < 1 and (1 - available) / rate > wait then
+    wait = (1 - available) / rate
+    blocked = i
+  end
+end
+if wait > 0 then
+  return {tostring(wait), blocked}
+end
+for i = 1, #KEYS do
+  local rate = tonumber(ARGV[2 * i])
+  local capacity = tonumber(ARGV[2 * i + 1])
+  redis.call('HSET', KEYS[i], 'tokens', tokens[i] - 1, 'ts', now)
+  redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate) + 1)
+end
+return {'0', 0}
+"""
+
+
+@lru_cache(maxsize=1)
+def _client() -> redis.Redis:
+    url = getattr(settings, 'ALERT_RATE_LIMIT_REDIS_URL', None) or settings.CACHES['default'].get('LOCATION', '')
+    return redis.Redis.from_url(url)
+
+
+class RateLimiter:
+    """Token buckets por canal e por destinatário"""
+
+    def __init__(self, client: Optional[redis.Redis] = None, limits: Optional[Dict] = None):
+        self.limits = limits if limits is not None else getattr(settings, 'ALERT_NOTIFICATION_RATE_LIMITS', {})
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or _client()
+
+    def buckets(self, channel: str, recipient_id: int) -> List[Tuple[str, str, float, int]]:
+        """Baldes do envio: (escopo, chave, fichas por segundo, capacidade)"""
+        limits = self.limits.get(channel) or {}
+        buckets = []
+        if limits.get('channel'):
+            per_minute, capacity = limits['channel']
+            buckets.append(('channel', BUCKET_KEY.format(channel=channel), per_minute / 60, capacity))
+        if limits.get('recipient'):
+            per_minute, capacity = limits['recipient']
+            key = RECIPIENT_BUCKET_KEY.format(channel=channel, recipient_id=recipient_id)
+            buckets.append(('recipient', key, per_minute / 60, capacity))
+        return buckets
+
+    def acquire(self, requests: Sequence[Tuple[str, int]]) -> List[Tuple[float, Optional[str]]]:
+        """Consumir uma ficha para cada (canal, destinatário), na ordem dada
+
+        Retorna, para cada pedido, (0, None) se liberado ou (segundos até haver
+        ficha, escopo do balde vazio: 'channel' ou 'recipient').
+        """
+        plans = [self.buckets(channel, recipient_id) for channel, recipient_id in requests]
+        waits = [(0.0, None)] * len(requests)
+        limited = [index for index, buckets in enumerate(plans) if buckets]
+        if not limited:
+            return waits
+
+        try:
+            script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+            pipeline = self.client.pipeline(transaction=False)
+            now = time.time()
+            for index in limited:
+                args = [now]
+                for _, _, rate, capacity in plans[index]:
+                    args.extend([rate, capacity])
+                script(keys=[key for _, key, _, _ in plans[index]], args=args, client=pipeline)
+            results = pipeline.execute()
+        except (redis.RedisError, ValueError) as e:
+            # ValueError: URL que não é do Redis (ex.: cache local)
+            logger.error(f"Rate limiter unavailable, sending without limits: {e}")
+            return waits
+
+        for index, (wait, blocked) in zip(limited, results):
+            wait = float(wait)
+            if wait > 0:
+                scope = plans[index][int(blocked) - 1][0]
+                waits[index] = (wait, scope)
+                metrics.NOTIFICATION_RATE_LIMITED.labels(channel=requests[index][0], scope=scope).inc()
+        return waits
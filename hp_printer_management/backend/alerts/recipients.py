@@ -0,0 +1,63 @@
+"""Destinatários das notificações de cada regra, em cache
+
+A lista é resolvida uma vez por regra (usuários assinantes ativos ou, sem
+assinantes, administradores e técnicos ativos) e mantida no cache. Os
+sinais de alteração em AlertRule.users_to_notify e em User invalidam as
+entradas: por regra, ou todas de uma vez ao trocar a versão global.
+"""
+from typing import Dict, List
+
+from django.core.cache import cache
+
+RECIPIENTS_KEY = 'alerts:recipients:{rule_id}'
+VERSION_KEY = 'alerts:recipients:version'
+RECIPIENTS_TTL = 3600
+
+RECIPIENT_FIELDS = ('id', 'username', 'email', 'phone')
+
+
+def _version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def _load(rule) -> List[Dict]:
+    from users.models import User
+
+    users = rule.users_to_notify.filter(is_active=True)
+
+    # Se não há usuários específicos, notificar admins e técnicos
+    if not users.exists():
+        users = User.objects.filter(
+            is_active=True,
+            role__in=['admin', 'technician']
+        )
+
+    return list(users.order_by('id').values(*RECIPIENT_FIELDS))
+
+
+def rule_recipients(rule) -> List[Dict]:
+    """Destinatários da regra como dicionários com id, username, email e phone"""
+    key = RECIPIENTS_KEY.format(rule_id=rule.pk)
+    version = _version()
+
+    recipients = cache.get(key, version=version)
+    if recipients is None:
+        recipients = _load(rule)
+        cache.set(key, recipients, RECIPIENTS_TTL, version=version)
+    return recipients
+
+
+def invalidate_rule(rule_id: int):
+    cache.delete(RECIPIENTS_KEY.format(rule_id=rule_id), version=_version())
+
+
+def invalidate_all():
+    """Descartar os destinatários de todas as regras (mudança em usuários)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
@@ -0,0 +1,145 @@
+"""Rollup diário de alertas (AlertDailyCount)
+
+Cada alerta de impressora criado ou resolvido incrementa o contador do dia
+para (regra, impressora, severidade); incidentes não contam, pois seus
+alertas filhos já são contados. Os incrementos de um lote são feitos com um
+INSERT ... ON CONFLICT DO NOTHING para as linhas que faltam e um UPDATE por
+(dia, regra, severidade, incremento). As tendências leem apenas esta
+tabela, que cresce com dias x impressoras com alertas, e não com o número de
+alertas. Na primeira migração com alertas e sem rollup, o histórico é
+carregado automaticamente (ver alerts.signals).
+
+O recálculo a partir da tabela de alertas fica limitado a DATA_RETENTION_DAYS:
+antes disso cleanup_old_data já apagou alertas resolvidos, e as linhas mais
+antigas do rollup são a única cópia desse histórico (nunca são apagadas).
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+# Dimensões das tendências: campos agrupados de AlertDailyCount
+TREND_GROUPS = {
+    'day': [],
+    'severity': ['severity'],
+    'rule': ['rule', 'rule__name'],
+    'printer': ['printer', 'printer__name'],
+    'department': ['printer__department'],
+}
+
+TREND_INTERVALS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Nomes dos campos relacionados na resposta
+TREND_FIELD_NAMES = {
+    'rule__name': 'rule_name',
+    'printer__name': 'printer_name',
+    'printer__department': 'department',
+}
+
+
+def record(alerts: Iterable, counter: str, when=None):
+    """Incrementar `counter` do dia de cada alerta (dia de criação, ou de `when`)"""
+    from .models import AlertDailyCount
+
+    increments = Counter()
+    for alert in alerts:
+        if alert.is_incident:
+            continue
+        day = timezone.localdate(when or alert.created_at)
+        increments[(day, alert.rule_id, alert.severity, alert.printer_id)] += 1
+
+    if not increments:
+        return
+
+    AlertDailyCount.objects.bulk_create([
+        AlertDailyCount(date=day, rule_id=rule_id, severity=severity, printer_id=printer_id)
+        for day, rule_id, severity, printer_id in increments
+    ], ignore_conflicts=True)
+
+    groups = defaultdict(list)
+    for (day, rule_id, severity, printer_id), amount in increments.items():
+        groups[(day, rule_id, severity, amount)].append(printer_id)
+
+    for (day, rule_id, severity, amount), printer_ids in groups.items():
+        AlertDailyCount.objects.filter(
+            date=day,
+            rule_id=rule_id,
+            severity=severity,
+            printer_id__in=printer_ids
+        ).update(**{counter: F(counter) + amount})
+
+
+def rebuild_days(days: Optional[int] = None) -> int:
+    """Dias recalculáveis: `days`, limitado à retenção dos alertas (padrão)"""
+    retention = settings.DATA_RETENTION_DAYS
+    return min(days, retention) if days else retention
+
+
+def rebuild(days: Optional[int] = None, using: str = 'default') -> int:
+    """Recalcular o rollup dos últimos `days` dias (no máximo a retenção) a partir da tabela de alertas"""
+    from .models import Alert, AlertDailyCount
+
+    days = rebuild_days(days)
+    start = timezone.localdate() - timedelta(days=days - 1)
+    alerts = Alert.objects.using(using).filter(is_incident=False)
+    rows: Dict[tuple, AlertDailyCount] = {}
+
+    for counter, field in (('created_count', 'created_at'), ('resolved_count', 'resolved_at')):
+        counts = (
+            alerts.annotate(day=TruncDate(field))
+            .filter(day__gte=start)
+            .values('day', 'rule_id', 'printer_id', 'severity')
+            .annotate(total=Count('id'))
+        )
+        for row in counts:
+            key = (row['day'], row['rule_id'], row['printer_id'], row['severity'])
+            if key not in rows:
+                rows[key] = AlertDailyCount(
+                    date=row['day'], rule_id=row['rule_id'], printer_id=row['printer_id'], severity=row['severity']
+                )
+            setattr(rows[key], counter, row['total'])
+
+    with transaction.atomic(using=using):
+        AlertDailyCount.objects.using(using).filter(date__gte=start).delete()
+        AlertDailyCount.objects.using(using).bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def trends(group_by: str = 'day', interval: str = 'day', days: int = 30,
+           filters: Optional[Dict] = None) -> List[Dict]:
+    """Séries de alertas criados e resolvidos por período e dimensão
+
+    `group_by` é uma chave de TREND_GROUPS e `interval` de TREND_INTERVALS;
+    `filters` são filtros adicionais de AlertDailyCount (ex.: severity).
+    """
+    from .models import AlertDailyCount
+
+    start = timezone.localdate() - timedelta(days=days - 1)
+    queryset = AlertDailyCount.objects.filter(date__gte=start, **(filters or {}))
+
+    truncate = TREND_INTERVALS[interval]
+    if truncate is not None:
+        queryset = queryset.annotate(period=truncate('date'))
+    else:
+        queryset = queryset.annotate(period=F('date'))
+
+    fields = TREND_GROUPS[group_by]
+    rows = (
+        queryset.values('period', *fields)
+        .annotate(created=Sum('created_count'), resolved=Sum('resolved_count'))
+        .order_by('period', *fields)
+    )
+
+    return [
+        {TREND_FIELD_NAMES.get(key, key): value for key, value in row.items()}
+        for row in rows
+    ]
@@ -0,0 +1,454 @@
+"""Compilação e avaliação das regras de alerta
+
+Cada regra (tipo de gatilho, operador, limite) é compilada uma única vez por
+versão em um CompiledRule, que serve tanto como expressão Q do Django (uma
+consulta por regra, com subconsultas correlacionadas para o status mais
+recente) quanto como máscara NumPy sobre o FleetState em memória (uma
+operação vetorizada por regra). A avaliação impressora a impressora de
+AlertService._check_printer_against_rule usa o mesmo predicado e fica apenas
+como alternativa.
+
+Sem threshold_value a regra mantém o limite e o operador históricos de cada
+gatilho. paper_jam, printer_offline e error_code são condições categóricas e
+ignoram operador e limite.
+"""
+import math
+import operator
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import (
+    Exact, GreaterThan, GreaterThanOrEqual, IsNull, LessThan, LessThanOrEqual,
+)
+from django.utils import timezone
+
+from hp_management import metrics
+
+# Limites padrão quando a regra não define threshold_value
+DEFAULT_THRESHOLDS = {
+    'supply_low': 25,
+    'supply_empty': 5,
+    'maintenance_due': 90,
+    'high_temperature': 60,
+    'queue_full': 10,
+}
+
+# Operadores históricos de cada gatilho, usados quando a regra não define
+# threshold_value ou deixa condition_operator vazio
+DEFAULT_OPERATORS = {
+    'supply_low': 'lte',
+    'supply_empty': 'lte',
+    'maintenance_due': 'gt',
+    'high_temperature': 'gt',
+    'queue_full': 'gt',
+}
+
+# Sem nenhuma manutenção preventiva, a idade da impressora é comparada a este limite
+DEFAULT_MAINTENANCE_AGE_DAYS = 30
+
+CATEGORICAL_TRIGGERS = frozenset({'paper_jam', 'printer_offline', 'error_code'})
+
+# Campo do snapshot de ingestão observado por cada gatilho (índice do modo
+# streaming); maintenance_due depende só do tempo e segue na tarefa periódica
+TRIGGER_FIELDS = {
+    'supply_low': 'supply_levels',
+    'supply_empty': 'supply_levels',
+    'paper_jam': 'paper_status',
+    'printer_offline': 'status',
+    'error_code': 'error_code',
+    'high_temperature': 'temperature',
+    'queue_full': 'queue_size',
+}
+
+ACTIVE_JOB_STATUSES = ['pending', 'printing']
+
+COMPARISONS = {
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'eq': operator.eq,
+    'ne': operator.ne,
+}
+
+LOOKUPS = {
+    'lt': LessThan,
+    'lte': LessThanOrEqual,
+    'gt': GreaterThan,
+    'gte': GreaterThanOrEqual,
+    'eq': Exact,
+}
+
+SECONDS_PER_DAY = 86400.0
+
+
+def candidate_printers(rule) -> QuerySet:
+    """Impressoras às quais a regra se aplica"""
+    from printers.models import Printer
+
+    if rule.printers.exists():
+        return rule.printers.all()
+    return Printer.objects.filter(is_monitored=True)
+
+
+def latest_status(field: str) -> Subquery:
+    """Subconsulta com o valor de `field` no status mais recente da impressora"""
+    from monitoring.models import PrinterStatus
+
+    return Subquery(
+        PrinterStatus.objects.filter(printer=OuterRef('pk'))
+        .order_by('-recorded_at')
+        .values(field)[:1]
+    )
+
+
+def last_maintenance() -> Subquery:
+    """Subconsulta com a conclusão da última manutenção preventiva"""
+    from monitoring.models import MaintenanceRecord
+
+    return Subquery(
+        MaintenanceRecord.objects.filter(
+            printer=OuterRef('pk'),
+            maintenance_type='preventive',
+            status='completed'
+        ).values('printer').annotate(last=Max('completed_at')).values('last')[:1]
+    )
+
+
+def active_jobs() -> Coalesce:
+    """Subconsulta com o número de trabalhos pendentes ou imprimindo"""
+    from printers.models import PrintJob
+
+    return Coalesce(
+        Subquery(
+            PrintJob.objects.filter(printer=OuterRef('pk'), status__in=ACTIVE_JOB_STATUSES)
+            .values('printer').annotate(total=Count('id')).values('total')[:1]
+        ),
+        Value(0),
+    )
+
+
+def compare_q(expression, operator_name: str, value) -> Q:
+    """Q de `expression <operador> value`; valores nulos nunca satisfazem"""
+    if operator_name == 'ne':
+        return Q(IsNull(expression, False)) & ~Q(Exact(expression, value))
+    return Q(LOOKUPS[operator_name](expression, value))
+
+
+def elapsed_days_q(expression, operator_name: str, days: float, now) -> Q:
+    """Q de `(now - expression).days <operador> days`, com dias inteiros como em timedelta.days"""
+    def cutoff(whole_days):
+        return now - timedelta(days=whole_days)
+
+    if operator_name == 'gt':
+        return Q(LessThanOrEqual(expression, cutoff(math.floor(days) + 1)))
+    if operator_name == 'gte':
+        return Q(LessThanOrEqual(expression, cutoff(math.ceil(days))))
+    if operator_name == 'lt':
+        return Q(GreaterThan(expression, cutoff(math.ceil(days))))
+    if operator_name == 'lte':
+        return Q(GreaterThan(expression, cutoff(math.floor(days) + 1)))
+
+    # eq / ne: só dias inteiros podem ser iguais
+    if days == math.floor(days):
+        equal = (Q(LessThanOrEqual(expression, cutoff(days)))
+                 & Q(GreaterThan(expression, cutoff(days + 1))))
+    else:
+        equal = Q(pk__in=[])
+    if operator_name == 'eq':
+        return equal
+    return Q(IsNull(expression, False)) & ~equal
+
+
+class FleetState:
+    """Estado da frota em arrays NumPy para avaliação vetorizada das regras
+
+    Carregado com poucas consultas (impressoras com status mais recente,
+    suprimentos, fila de impressão e manutenções); cada regra é então uma
+    única operação sobre os arrays.
+    """
+
+    def __init__(self, printer_ids, monitored, offline, paper_jam, has_error, temperature,
+                 active_jobs, maintenance_days, age_days, supply_owner, supply_level):
+        self.printer_ids = printer_ids
+        self.monitored = monitored
+        self.offline = offline
+        self.paper_jam = paper_jam
+        self.has_error = has_error
+        self.temperature = temperature
+        self.active_jobs = active_jobs
+        self.maintenance_days = maintenance_days
+        self.age_days = age_days
+        self.supply_owner = supply_owner
+        self.supply_level = supply_level
+
+    def __len__(self):
+        return len(self.printer_ids)
+
+    def index_of(self, printer_ids: Iterable[int]) -> np.ndarray:
+        """Máscara das posições de `printer_ids` no estado"""
+        return np.isin(self.printer_ids, np.fromiter(printer_ids, dtype=np.int64))
+
+    @classmethod
+    def load(cls, printers: QuerySet, now=None) -> 'FleetState':
+        from monitoring.models import MaintenanceRecord
+        from printers.models import PrinterSupplies, PrintJob
+
+        now = now or timezone.now()
+
+        rows = list(
+            printers.order_by('pk').annotate(
+                latest_paper_status=latest_status('paper_status'),
+                latest_error_code=latest_status('error_code'),
+                latest_temperature=latest_status('temperature'),
+            ).values_list(
+                'pk', 'is_monitored', 'status', 'created_at',
+                'latest_paper_status', 'latest_error_code', 'latest_temperature',
+            )
+        )
+        count = len(rows)
+        printer_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+
+        def positions(ids: List[int]) -> np.ndarray:
+            return np.searchsorted(printer_ids, np.asarray(ids, dtype=np.int64))
+
+        jobs = np.zeros(count, dtype=np.int64)
+        job_counts = list(
+            PrintJob.objects.filter(printer__in=printers, status__in=ACTIVE_JOB_STATUSES)
+            .values('printer').annotate(total=Count('id')).values_list('printer', 'total')
+        )
+        if job_counts:
+            owners, totals = zip(*job_counts)
+            jobs[positions(owners)] = totals
+
+        maintenance_days = np.full(count, np.nan)
+        last_maintenance_at = list(
+            MaintenanceRecord.objects.filter(
+                printer__in=printers,
+                maintenance_type='preventive',
+                status='completed',
+                completed_at__isnull=False,
+            ).values('printer').annotate(last=Max('completed_at')).values_list('printer', 'last')
+        )
+        if last_maintenance_at:
+            owners, completed = zip(*last_maintenance_at)
+            maintenance_days[positions(owners)] = [_elapsed_days(now, value) for value in completed]
+
+        supplies = list(
+            PrinterSupplies.objects.filter(printer__in=printers).values_list('printer', 'level')
+        )
+        if supplies:
+            owners, levels = zip(*supplies)
+            supply_owner = positions(owners)
+            supply_level = np.asarray(levels, dtype=np.float64)
+        else:
+            supply_owner = np.zeros(0, dtype=np.int64)
+            supply_level = np.zeros(0, dtype=np.float64)
+
+        return cls(
+            printer_ids=printer_ids,
+            monitored=np.fromiter((row[1] for row in rows), dtype=bool, count=count),
+            offline=np.fromiter((row[2] == 'offline' for row in rows), dtype=bool, count=count),
+            paper_jam=np.fromiter((row[4] == 'jam' for row in rows), dtype=bool, count=count),
+            has_error=np.fromiter((row[5] is not None for row in rows), dtype=bool, count=count),
+            temperature=np.fromiter(
+                (np.nan if row[6] is None else row[6] for row in rows), dtype=np.float64, count=count
+            ),
+            active_jobs=jobs,
+            maintenance_days=maintenance_days,
+            age_days=np.fromiter(
+                (_elapsed_days(now, row[3]) for row in rows), dtype=np.float64, count=count
+            ),
+            supply_owner=supply_owner,
+            supply_level=supply_level,
+        )
+
+
+def _elapsed_days(now, moment) -> float:
+    """Dias inteiros decorridos, como em timedelta.days"""
+    return float(math.floor((now - moment).total_seconds() / SECONDS_PER_DAY))
+
+
+class CompiledRule:
+    """Predicado compilado de uma regra de alerta"""
+
+    def __init__(self, trigger_type: str, operator_name: str, threshold: Optional[float],
+                 age_threshold: Optional[float] = None):
+        self.trigger_type = trigger_type
+        self.operator = operator_name
+        self.threshold = threshold
+        self.age_threshold = age_threshold
+        self._compare = COMPARISONS[operator_name]
+
+    def __repr__(self):
+        return f'CompiledRule({self.trigger_type!r}, {self.operator!r}, {self.threshold!r})'
+
+    def compare(self, value, threshold: Optional[float] = None):
+        """Aplicar operador e limite a um valor escalar ou a um array"""
+        return self._compare(value, self.threshold if threshold is None else threshold)
+
+    def q(self, now=None) -> Q:
+        """Expressão Q sobre Printer com as impressoras que disparam a regra"""
+        from printers.models import PrinterSupplies
+
+        trigger_type = self.trigger_type
+
+        if trigger_type in ('supply_low', 'supply_empty'):
+            return Q(Exists(PrinterSupplies.objects.filter(
+                compare_q(F('level'), self.operator, self.threshold),
+                printer=OuterRef('pk'),
+            )))
+
+        if trigger_type == 'paper_jam':
+            return Q(Exact(latest_status('paper_status'), 'jam'))
+
+        if trigger_type == 'printer_offline':
+            return Q(status='offline')
+
+        if trigger_type == 'error_code':
+            return Q(IsNull(latest_status('error_code'), False))
+
+        if trigger_type == 'high_temperature':
+            return compare_q(latest_status('temperature'), self.operator, self.threshold)
+
+        if trigger_type == 'queue_full':
+            return compare_q(active_jobs(), self.operator, self.threshold)
+
+        if trigger_type == 'maintenance_due':
+            now = now or timezone.now()
+            maintenance = last_maintenance()
+            return (
+                (Q(IsNull(maintenance, False))
+                 & elapsed_days_q(maintenance, self.operator, self.threshold, now))
+                | (Q(IsNull(maintenance, True))
+                   & elapsed_days_q(F('created_at'), self.operator, self.age_threshold, now))
+            )
+
+        raise ValueError(f'Unsupported trigger type: {trigger_type}')
+
+    def matches(self, snapshot: Dict) -> bool:
+        """Avaliar a regra sobre o snapshot de ingestão de uma impressora"""
+        trigger_type = self.trigger_type
+
+        if trigger_type in ('supply_low', 'supply_empty'):
+            return any(self.compare(level) for level in snapshot.get('supply_levels', {}).values())
+
+        if trigger_type == 'paper_jam':
+            return snapshot.get('paper_status') == 'jam'
+
+        if trigger_type == 'printer_offline':
+            return snapshot.get('status') == 'offline'
+
+        if trigger_type == 'error_code':
+            return snapshot.get('error_code') is not None
+
+        if trigger_type in ('high_temperature', 'queue_full'):
+            value = snapshot.get(TRIGGER_FIELDS[trigger_type])
+            return value is not None and bool(self.compare(value))
+
+        raise ValueError(f'Unsupported trigger type for snapshots: {trigger_type}')
+
+    def mask(self, state: FleetState) -> np.ndarray:
+        """Máscara booleana sobre o FleetState com as impressoras que disparam a regra"""
+        trigger_type = self.trigger_type
+
+        if trigger_type in ('supply_low', 'supply_empty'):
+            mask = np.zeros(len(state), dtype=bool)
+            mask[state.supply_owner[self.compare(state.supply_level)]] = True
+            return mask
+
+        if trigger_type == 'paper_jam':
+            return state.paper_jam.copy()
+
+        if trigger_type == 'printer_offline':
+            return state.offline.copy()
+
+        if trigger_type == 'error_code':
+            return state.has_error.copy()
+
+        if trigger_type == 'high_temperature':
+            return ~np.isnan(state.temperature) & self.compare(state.temperature)
+
+        if trigger_type == 'queue_full':
+            return self.compare(state.active_jobs)
+
+        if trigger_type == 'maintenance_due':
+            has_maintenance = ~np.isnan(state.maintenance_days)
+            return np.where(
+                has_maintenance,
+                self.compare(state.maintenance_days),
+                self.compare(state.age_days, self.age_threshold),
+            )
+
+        raise ValueError(f'Unsupported trigger type: {trigger_type}')
+
+
+@lru_cache(maxsize=512)
+def compile_definition(trigger_type: str, operator_name: str,
+                       threshold_value: Optional[float]) -> Optional[CompiledRule]:
+    """Compilar a definição (gatilho, operador, limite) de uma regra"""
+    if trigger_type in CATEGORICAL_TRIGGERS:
+        return CompiledRule(trigger_type, 'eq', None)
+
+    if trigger_type not in DEFAULT_THRESHOLDS:
+        return None
+
+    if threshold_value is None:
+        age_threshold = DEFAULT_MAINTENANCE_AGE_DAYS if trigger_type == 'maintenance_due' else None
+        return CompiledRule(
+            trigger_type, DEFAULT_OPERATORS[trigger_type], DEFAULT_THRESHOLDS[trigger_type], age_threshold
+        )
+
+    operator_name = operator_name or DEFAULT_OPERATORS[trigger_type]
+    if operator_name not in COMPARISONS:
+        return None
+
+    return CompiledRule(trigger_type, operator_name, threshold_value, threshold_value)
+
+
+def compile_rule(rule) -> Optional[CompiledRule]:
+    """Predicado compilado da regra, reaproveitado enquanto a regra não muda
+
+    Retorna None para tipos de gatilho ou operadores sem compilação.
+    """
+    return compile_definition(rule.trigger_type, rule.condition_operator, rule.threshold_value)
+
+
+def triggered_printers(rule, printers: Optional[QuerySet] = None) -> Optional[QuerySet]:
+    """Consulta única com as impressoras que disparam a regra
+
+    Retorna None quando a regra não pode ser compilada.
+    """
+    compiled = compile_rule(rule)
+    if compiled is None:
+        return None
+
+    if printers is None:
+        printers = candidate_printers(rule)
+    return printers.filter(compiled.q())
+
+
+def evaluate_rules(rules: Iterable, state: FleetState) -> Dict[int, List[int]]:
+    """Avaliar várias regras sobre o mesmo FleetState
+
+    Retorna regra.pk -> ids das impressoras disparadas. Regras sem compilação
+    ficam de fora e devem ser avaliadas com AlertService.check_rule_conditions.
+    As regras devem vir com `printers` pré-carregado (prefetch_related).
+    """
+    triggered = {}
+
+    for rule in rules:
+        compiled = compile_rule(rule)
+        if compiled is None:
+            continue
+
+        with metrics.ALERT_RULE_EVALUATION.labels(trigger_type=rule.trigger_type).time():
+            rule_printers = [printer.pk for printer in rule.printers.all()]
+            scope = state.index_of(rule_printers) if rule_printers else state.monitored
+            triggered[rule.pk] = state.printer_ids[scope & compiled.mask(state)].tolist()
+
+    return triggered
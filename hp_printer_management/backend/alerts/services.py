@@ -1,11 +1,12 @@
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
-from django.template.loader import render_to_string
 from django.utils import timezone
 from typing import List, Dict, Optional
+import hashlib
 import logging
-import requests
-import json
+import time
+
+from hp_management import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -18,42 +19,88 @@ class AlertService:
     
     def check_rule_conditions(self, rule) -> List:
         """Verificar condições de uma regra e retornar impressoras que atendem os critérios"""
-        from printers.models import Printer, PrinterSupplies
-        from monitoring.models import PrinterStatus
-        
-        triggered_printers = []
+        from .rules import candidate_printers, triggered_printers
         
         # Filtrar impressoras baseado na regra
-        printers = rule.printers.all() if rule.printers.exists() else Printer.objects.filter(is_monitored=True)
+        printers = candidate_printers(rule)
+        
+        try:
+            # Uma consulta por regra com todas as impressoras disparadas
+            triggered = triggered_printers(rule, printers)
+            if triggered is not None:
+                return list(triggered)
+        except Exception as e:
+            self.logger.error(f"Error evaluating rule {rule.name} in SQL, falling back to per-printer checks: {e}")
+        
+        triggered_printers_list = []
         
         for printer in printers:
             try:
                 if self._check_printer_against_rule(printer, rule):
-                    triggered_printers.append(printer)
+                    triggered_printers_list.append(printer)
             except Exception as e:
                 self.logger.error(f"Error checking printer {printer.name} against rule {rule.name}: {e}")
         
-        return triggered_printers
+        return triggered_printers_list
+    
+    def check_rules(self, rules) -> Dict:
+        """Avaliar várias regras de uma vez sobre o estado da frota em memória
+        
+        Carrega o FleetState com poucas consultas e aplica a máscara compilada
+        de cada regra. Retorna regra -> lista de impressoras disparadas.
+        """
+        from django.db.models import Q
+        from printers.models import Printer
+        from .rules import FleetState, evaluate_rules
+        
+        rules = list(rules)
+        if not rules:
+            return {}
+        
+        printers = Printer.objects.filter(
+            Q(is_monitored=True) | Q(alert_rules__in=rules)
+        ).distinct()
+        
+        triggered_ids = evaluate_rules(rules, FleetState.load(printers))
+        printers_by_id = Printer.objects.in_bulk(
+            {printer_id for ids in triggered_ids.values() for printer_id in ids}
+        )
+        
+        results = {}
+        for rule in rules:
+            if rule.pk in triggered_ids:
+                results[rule] = [printers_by_id[printer_id] for printer_id in triggered_ids[rule.pk]]
+            else:
+                results[rule] = self.check_rule_conditions(rule)
+        
+        return results
+    
+    def in_cooldown(self, rule, printer) -> bool:
+        """Verificar se a regra já alertou esta impressora dentro do tempo de espera"""
+        from .cooldown import CooldownIndex
+        return bool(CooldownIndex().active(rule, [printer.pk]))
+    
+    def exclude_in_cooldown(self, rule, printers: List) -> List:
+        """Remover as impressoras em cooldown para a regra (uma ida ao cache)"""
+        from .cooldown import CooldownIndex
+        
+        cooling_down = CooldownIndex().active(rule, [printer.pk for printer in printers])
+        return [printer for printer in printers if printer.pk not in cooling_down]
     
     def _check_printer_against_rule(self, printer, rule) -> bool:
         """Verificar se uma impressora atende as condições de uma regra"""
+        from .rules import ACTIVE_JOB_STATUSES, compile_rule
+        
+        compiled = compile_rule(rule)
+        if compiled is None:
+            return False
+        
         trigger_type = rule.trigger_type
-        threshold = rule.threshold_value
-        operator = rule.condition_operator
         
-        if trigger_type == 'supply_low':
+        if trigger_type in ('supply_low', 'supply_empty'):
             # Verificar níveis de suprimentos
-            low_supplies = printer.supplies.filter(
-                level__lte=threshold or 25
-            )
-            return low_supplies.exists()
-        
-        elif trigger_type == 'supply_empty':
-            # Verificar suprimentos vazios
-            empty_supplies = printer.supplies.filter(
-                level__lte=threshold or 5
-            )
-            return empty_supplies.exists()
+            levels = printer.supplies.values_list('level', flat=True)
+            return any(compiled.compare(level) for level in levels)
         
         elif trigger_type == 'paper_jam':
             # Verificar atolamento de papel
@@ -74,57 +121,90 @@ class AlertService:
         elif trigger_type == 'maintenance_due':
             # Verificar manutenção vencida
             from monitoring.models import MaintenanceRecord
-            from datetime import timedelta
             
             last_maintenance = MaintenanceRecord.objects.filter(
                 printer=printer,
                 maintenance_type='preventive',
-                status='completed'
+                status='completed',
+                completed_at__isnull=False
             ).order_by('-completed_at').first()
             
             if last_maintenance:
                 days_since = (timezone.now() - last_maintenance.completed_at).days
-                return days_since > (threshold or 90)
+                return compiled.compare(days_since)
             else:
                 # Se nunca teve manutenção, verificar idade da impressora
                 days_since_creation = (timezone.now() - printer.created_at).days
-                return days_since_creation > (threshold or 30)
+                return compiled.compare(days_since_creation, compiled.age_threshold)
         
         elif trigger_type == 'high_temperature':
             # Verificar temperatura alta
             latest_status = printer.status_history.order_by('-recorded_at').first()
-            if latest_status and latest_status.temperature:
-                return latest_status.temperature > (threshold or 60)
+            if latest_status and latest_status.temperature is not None:
+                return compiled.compare(latest_status.temperature)
         
         elif trigger_type == 'queue_full':
             # Verificar fila cheia
             queue_size = printer.print_jobs.filter(
-                status__in=['pending', 'printing']
+                status__in=ACTIVE_JOB_STATUSES
             ).count()
-            return queue_size > (threshold or 10)
+            return compiled.compare(queue_size)
         
         return False
     
     def create_alert(self, rule, printer, context_data: Optional[Dict] = None):
-        """Criar um novo alerta"""
+        """Criar um novo alerta
+        
+        Se já existe um alerta aberto com a mesma impressão digital, apenas
+        incrementa a ocorrência e retorna None, sem novas notificações.
+        """
+        from django.db import IntegrityError, transaction
         from alerts.models import Alert
+        from hp_management import realtime
+        from . import rollup
+        from .cooldown import CooldownIndex
         
         try:
+            fingerprint = self.alert_fingerprint(rule, printer)
+            
+            # Iniciar o tempo de espera da regra para esta impressora
+            CooldownIndex().start(rule, [printer.pk])
+            
+            if self._bump_open_alert(fingerprint, context_data):
+                return None
+            
+            # Anexar a um incidente aberto do mesmo escopo, sem notificar
+            incident = self._open_incident_for(rule, printer)
+            
             # Gerar título e mensagem baseados no tipo de trigger
             title, message = self._generate_alert_content(rule, printer, context_data)
             
             # Criar alerta
-            alert = Alert.objects.create(
-                rule=rule,
-                printer=printer,
-                title=title,
-                message=message,
-                severity=rule.severity,
-                context_data=context_data or {}
-            )
+            try:
+                with transaction.atomic():
+                    alert = Alert.objects.create(
+                        rule=rule,
+                        printer=printer,
+                        title=title,
+                        message=message,
+                        severity=rule.severity,
+                        context_data=context_data or {},
+                        fingerprint=fingerprint,
+                        last_seen_at=timezone.now(),
+                        parent=incident
+                    )
+                    rollup.record([alert], 'created_count')
+            except IntegrityError:
+                # Outro worker abriu o mesmo alerta entre a verificação e a inserção
+                self._bump_open_alert(fingerprint, context_data)
+                return None
             
             # Enviar notificações
-            self._schedule_notifications(alert)
+            if incident is not None:
+                Alert.objects.filter(pk=incident.pk).update(last_seen_at=alert.last_seen_at)
+            else:
+                self._schedule_notifications(alert)
+                realtime.alerts_created([alert])
             
             self.logger.info(f"Alert created: {alert.title} for printer {printer.name}")
             return alert
@@ -133,6 +213,46 @@ class AlertService:
             self.logger.error(f"Error creating alert for printer {printer.name}: {e}")
             return None
     
+    def alert_fingerprint(self, rule, printer) -> str:
+        """Impressão digital de (regra, impressora, condição de disparo)"""
+        key = f"{rule.pk}:{printer.pk}:{rule.trigger_type}:{rule.condition_operator}:{rule.threshold_value}"
+        return hashlib.sha256(key.encode()).hexdigest()
+    
+    def _open_incident_for(self, rule, printer):
+        """Incidente aberto da regra que cobre algum escopo da impressora"""
+        from alerts.models import Alert
+        from . import correlation
+        
+        if not correlation.correlation_enabled(rule):
+            return None
+        
+        fingerprints = correlation.scope_fingerprints(rule, printer)
+        if not fingerprints:
+            return None
+        
+        return Alert.objects.filter(
+            fingerprint__in=fingerprints,
+            is_incident=True,
+            status__in=Alert.OPEN_STATUSES
+        ).first()
+    
+    def _bump_open_alert(self, fingerprint: str, context_data: Optional[Dict]) -> bool:
+        """Registrar uma nova ocorrência no alerta aberto com esta impressão digital"""
+        from django.db.models import F
+        from alerts.models import Alert
+        
+        updates = {
+            'occurrence_count': F('occurrence_count') + 1,
+            'last_seen_at': timezone.now(),
+        }
+        if context_data:
+            updates['context_data'] = context_data
+        
+        return Alert.objects.filter(
+            fingerprint=fingerprint,
+            status__in=Alert.OPEN_STATUSES
+        ).update(**updates) > 0
+    
     def _generate_alert_content(self, rule, printer, context_data: Optional[Dict]) -> tuple:
         """Gerar título e mensagem do alerta"""
         trigger_type = rule.trigger_type
@@ -174,65 +294,342 @@ class AlertService:
         
         return title, message
     
-    def _schedule_notifications(self, alert):
-        """Agendar notificações para o alerta"""
-        from alerts.models import NotificationLog
+    def create_alerts(self, rule, printers: List, context_data: Optional[Dict] = None) -> List:
+        """Criar em lote os alertas de uma regra para várias impressoras
         
-        rule = alert.rule
+        Alertas abertos com a mesma impressão digital recebem uma nova
+        ocorrência em um único UPDATE; os novos são inseridos com um único
+        bulk_create, assim como todas as suas notificações. Retorna apenas os
+        alertas criados.
+        """
+        from django.db import IntegrityError, transaction
+        from django.db.models import F
+        from alerts.models import Alert
+        from hp_management import realtime
+        from . import correlation, rollup, stats
+        from .cooldown import CooldownIndex
+        
+        if not printers:
+            return []
+        
+        now = timezone.now()
+        fingerprints = {printer.pk: self.alert_fingerprint(rule, printer) for printer in printers}
         
-        # Obter usuários para notificar
-        users_to_notify = rule.users_to_notify.filter(is_active=True)
+        CooldownIndex().start(rule, list(fingerprints))
         
-        # Se não há usuários específicos, notificar admins e técnicos
-        if not users_to_notify.exists():
-            from users.models import User
-            users_to_notify = User.objects.filter(
-                is_active=True,
-                role__in=['admin', 'technician']
+        open_alerts = Alert.objects.filter(
+            fingerprint__in=list(fingerprints.values()),
+            status__in=Alert.OPEN_STATUSES
+        )
+        open_fingerprints = set(open_alerts.values_list('fingerprint', flat=True))
+        if open_fingerprints:
+            open_alerts.filter(fingerprint__in=open_fingerprints).update(
+                occurrence_count=F('occurrence_count') + 1,
+                last_seen_at=now
             )
         
-        for user in users_to_notify:
-            # Email
-            if rule.send_email and user.email:
-                NotificationLog.objects.create(
-                    alert=alert,
-                    recipient=user,
-                    notification_type='email',
-                    recipient_address=user.email,
-                    subject=alert.title,
-                    content=alert.message
+        new_printers = [
+            printer for printer in printers
+            if fingerprints[printer.pk] not in open_fingerprints
+        ]
+        if not new_printers:
+            return []
+        
+        # Impressoras correlacionadas viram filhas de um incidente, sem notificação própria
+        incidents, parents = [], {}
+        if correlation.correlation_enabled(rule):
+            incidents, parents = self._correlate(rule, new_printers, now)
+        
+        new_alerts = []
+        for printer in new_printers:
+            title, message = self._generate_alert_content(rule, printer, context_data)
+            new_alerts.append(Alert(
+                rule=rule,
+                printer=printer,
+                title=title,
+                message=message,
+                severity=rule.severity,
+                context_data=context_data or {},
+                fingerprint=fingerprints[printer.pk],
+                last_seen_at=now,
+                parent=parents.get(printer.pk)
+            ))
+        
+        try:
+            with transaction.atomic():
+                incidents = Alert.objects.bulk_create(incidents)
+                created = Alert.objects.bulk_create(new_alerts)
+                rollup.record(created, 'created_count')
+                self._schedule_notifications(
+                    *incidents, *[alert for alert in created if alert.parent is None]
                 )
+                created = incidents + created
+        except IntegrityError:
+            # Concorrência com outro worker: cair para a criação individual
+            created = []
+            for alert in new_alerts:
+                single = self.create_alert(rule, alert.printer, context_data)
+                if single:
+                    created.append(single)
+            return created
+        
+        stats.invalidate()
+        realtime.alerts_created(created)
+        self.logger.info(f"{len(created)} alerts created for rule {rule.name}")
+        return created
+    
+    def _correlate(self, rule, printers: List, now) -> tuple:
+        """Agrupar as impressoras em incidentes
+        
+        Impressoras de um escopo com incidente aberto são anexadas a ele;
+        as demais formam novos incidentes quando o grupo atinge o tamanho
+        mínimo. Retorna (incidentes novos ainda não salvos, impressora -> pai).
+        """
+        from alerts.models import Alert
+        from . import correlation
+        
+        open_incidents = {
+            incident.fingerprint: incident
+            for incident in Alert.objects.filter(
+                rule=rule,
+                is_incident=True,
+                status__in=Alert.OPEN_STATUSES
+            )
+        }
+        
+        parents = {}
+        for printer in printers:
+            for fingerprint in correlation.scope_fingerprints(rule, printer):
+                if fingerprint in open_incidents:
+                    parents[printer.pk] = open_incidents[fingerprint]
+                    break
+        
+        touched = {incident.pk for incident in parents.values()}
+        if touched:
+            Alert.objects.filter(pk__in=touched).update(last_seen_at=now)
+        
+        groups, _ = correlation.group([printer for printer in printers if printer.pk not in parents])
+        
+        incidents = []
+        for key, value, members in groups:
+            title, message = correlation.incident_content(rule, key, value, members)
+            incident = Alert(
+                rule=rule,
+                printer=members[0],
+                title=title,
+                message=message,
+                severity=rule.severity,
+                context_data={'correlation': {
+                    'scope': key,
+                    'value': value,
+                    'printer_ids': [printer.pk for printer in members],
+                }},
+                fingerprint=correlation.incident_fingerprint(rule, key, value),
+                last_seen_at=now,
+                is_incident=True
+            )
+            incidents.append(incident)
+            for printer in members:
+                parents[printer.pk] = incident
+        
+        return incidents, parents
+    
+    def _schedule_notifications(self, *alerts):
+        """Agendar notificações dos alertas com um único bulk_create"""
+        from alerts.models import NotificationLog
+        from . import digest, escalation
+        from .recipients import rule_recipients
+        
+        notifications = []
+        recipients_by_rule = {}
+        
+        for alert in alerts:
+            rule = alert.rule
             
-            # SMS
-            if rule.send_sms and user.phone:
-                NotificationLog.objects.create(
-                    alert=alert,
-                    recipient=user,
-                    notification_type='sms',
-                    recipient_address=user.phone,
-                    content=alert.title  # SMS com conteúdo mais curto
-                )
+            # Destinatários resolvidos uma vez por regra (com cache)
+            if rule.pk not in recipients_by_rule:
+                recipients_by_rule[rule.pk] = rule_recipients(rule)
             
-            # Notificação no sistema
-            if rule.send_system_notification:
-                NotificationLog.objects.create(
-                    alert=alert,
-                    recipient=user,
-                    notification_type='system',
-                    recipient_address=user.username,
-                    subject=alert.title,
-                    content=alert.message
-                )
+            priority = NotificationLog.PRIORITY_BY_SEVERITY.get(alert.severity, 2)
+            
+            for user in recipients_by_rule[rule.pk]:
+                # Email
+                if rule.send_email and user['email']:
+                    notifications.append(NotificationLog(
+                        alert=alert,
+                        recipient_id=user['id'],
+                        priority=priority,
+                        notification_type='email',
+                        recipient_address=user['email'],
+                        subject=alert.title,
+                        content=alert.message
+                    ))
+                
+                # SMS
+                if rule.send_sms and user['phone']:
+                    notifications.append(NotificationLog(
+                        alert=alert,
+                        recipient_id=user['id'],
+                        priority=priority,
+                        notification_type='sms',
+                        recipient_address=user['phone'],
+                        content=alert.title  # SMS com conteúdo mais curto
+                    ))
+                
+                # Notificação no sistema
+                if rule.send_system_notification:
+                    notifications.append(NotificationLog(
+                        alert=alert,
+                        recipient_id=user['id'],
+                        priority=priority,
+                        notification_type='system',
+                        recipient_address=user['username'],
+                        subject=alert.title,
+                        content=alert.message
+                    ))
+        
+        # Notificações retidas na janela de digest do destinatário
+        digest.schedule(notifications)
+        NotificationLog.objects.bulk_create(notifications, batch_size=1000)
+        
+        # Próximo nível de escalonamento, caso ninguém reconheça o alerta
+        escalation.schedule(alerts)
 
 
 class NotificationService:
     """Serviço para envio de notificações"""
     
     def __init__(self):
+        from .emails import AlertEmailRenderer
+        
         self.logger = logging.getLogger(__name__)
+        self.email_renderer = AlertEmailRenderer()
     
     def send_notification(self, notification) -> bool:
         """Enviar notificação"""
+        started_at = time.perf_counter()
+        success = self._dispatch(notification)
+        
+        # O despachante de webhooks registra a própria latência por entrega
+        if notification.notification_type == 'webhook':
+            return success
+        
+        metrics.NOTIFICATION_SEND_DURATION.labels(
+            channel=notification.notification_type,
+            result='sent' if success else 'failed'
+        ).observe(time.perf_counter() - started_at)
+        
+        return success
+    
+    def send_batch(self, notifications) -> Dict[int, bool]:
+        """Enviar várias notificações; emails compartilham conexões SMTP e webhooks
+        são enviados concorrentemente
+        
+        Retorna id da notificação -> sucesso.
+        """
+        from .webhooks import WebhookDispatcher
+        
+        emails = [n for n in notifications if n.notification_type == 'email']
+        webhooks = [n for n in notifications if n.notification_type == 'webhook']
+        
+        results = self.send_email_batch(emails) if emails else {}
+        
+        # Webhooks concorrentes; um endpoint lento não bloqueia o restante do lote
+        if webhooks:
+            try:
+                results.update(WebhookDispatcher().dispatch(webhooks))
+            except Exception as e:
+                self.logger.error(f"Error dispatching webhooks: {e}")
+        
+        for notification in notifications:
+            if notification.notification_type not in ('email', 'webhook'):
+                results[notification.id] = self.send_notification(notification)
+        
+        return results
+    
+    def send_email_batch(self, notifications) -> Dict[int, bool]:
+        """Enviar emails um a um sobre uma conexão SMTP reaproveitada
+        
+        Cada mensagem tem o próprio resultado: uma falha não reenvia as já
+        entregues. A conexão é renovada a cada ALERT_EMAIL_CONNECTION_LIFETIME
+        segundos e depois de um erro de envio.
+        """
+        lifetime = getattr(settings, 'ALERT_EMAIL_CONNECTION_LIFETIME', 300)
+        
+        results = {}
+        connection = None
+        opened_at = 0.0
+        
+        try:
+            for notification in notifications:
+                if connection is None or time.monotonic() - opened_at > lifetime:
+                    if connection is not None:
+                        connection.close()
+                    connection = get_connection(fail_silently=False)
+                    connection.open()
+                    opened_at = time.monotonic()
+                
+                try:
+                    message = self._build_email(notification, connection)
+                except Exception as e:
+                    self.logger.error(f"Error rendering email for notification {notification.id}: {e}")
+                    notification.error_message = str(e)
+                    results[notification.id] = False
+                    continue
+                
+                started_at = time.perf_counter()
+                try:
+                    success = connection.send_messages([message]) == 1
+                    if not success:
+                        notification.error_message = 'Mensagem não enviada pelo servidor SMTP'
+                except Exception as e:
+                    self.logger.error(f"Error sending email to {notification.recipient_address}: {e}")
+                    notification.error_message = str(e)
+                    success = False
+                    # A conexão pode ter caído: a próxima mensagem abre outra
+                    connection.close()
+                    connection = None
+                
+                metrics.NOTIFICATION_SEND_DURATION.labels(
+                    channel='email', result='sent' if success else 'failed'
+                ).observe(time.perf_counter() - started_at)
+                results[notification.id] = success
+        
+        except Exception as e:
+            # Falha ao abrir a conexão: as mensagens restantes ficam para a próxima tentativa
+            self.logger.error(f"Error opening SMTP connection: {e}")
+            for notification in notifications:
+                if notification.id not in results:
+                    notification.error_message = str(e)
+                    results[notification.id] = False
+        
+        finally:
+            if connection is not None:
+                connection.close()
+        
+        self.logger.info(f"Email batch sent: {sum(results.values())}/{len(notifications)}")
+        return results
+    
+    def _build_email(self, notification, connection=None) -> EmailMultiAlternatives:
+        """Montar a mensagem de email (texto e HTML) de uma notificação ou resumo
+        
+        O HTML de cada alerta é renderizado uma vez por instância do serviço
+        e reaproveitado para todos os destinatários.
+        """
+        html_content = self.email_renderer.html(notification)
+        
+        message = EmailMultiAlternatives(
+            subject=notification.subject,
+            body=notification.content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[notification.recipient_address],
+            connection=connection
+        )
+        message.attach_alternative(html_content, 'text/html')
+        return message
+    
+    def _dispatch(self, notification) -> bool:
+        """Encaminhar a notificação para o canal correspondente"""
         try:
             if notification.notification_type == 'email':
                 return self._send_email(notification)
@@ -253,22 +650,7 @@ class NotificationService:
     def _send_email(self, notification) -> bool:
         """Enviar email"""
         try:
-            # Renderizar template HTML
-            html_content = render_to_string('alerts/email_alert.html', {
-                'alert': notification.alert,
-                'printer': notification.alert.printer,
-                'recipient': notification.recipient,
-                'content': notification.content
-            })
-            
-            send_mail(
-                subject=notification.subject,
-                message=notification.content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[notification.recipient_address],
-                html_message=html_content,
-                fail_silently=False
-            )
+            self._build_email(notification).send(fail_silently=False)
             
             self.logger.info(f"Email sent to {notification.recipient_address}")
             return True
@@ -292,13 +674,21 @@ class NotificationService:
             return False
     
     def _send_system_notification(self, notification) -> bool:
-        """Criar notificação no sistema"""
+        """Entregar notificação do sistema ao navegador do destinatário (WebSocket)"""
+        from hp_management import realtime
+        
         try:
-            # Implementar sistema de notificações em tempo real
-            # Pode usar WebSockets, Server-Sent Events, etc.
-            
-            # Por enquanto, marcar como enviada
-            self.logger.info(f"System notification created for {notification.recipient.username}")
+            alert = notification.alert
+            published = realtime.notify_user(notification.recipient_id, {
+                'id': notification.id,
+                'alert': alert.id,
+                'title': notification.subject or alert.title,
+                'message': notification.content,
+                'severity': alert.severity,
+                'printer': alert.printer_id,
+            })
+            if not published:
+                self.logger.info(f"System notification created for {notification.recipient.username} (no realtime channel)")
             return True
             
         except Exception as e:
@@ -307,38 +697,10 @@ class NotificationService:
     
     def _send_webhook(self, notification) -> bool:
         """Enviar webhook"""
+        from .webhooks import WebhookDispatcher
+        
         try:
-            webhook_url = getattr(settings, 'ALERT_WEBHOOK_URL', None)
-            if not webhook_url:
-                return False
-            
-            payload = {
-                'alert_id': notification.alert.id,
-                'title': notification.alert.title,
-                'message': notification.alert.message,
-                'severity': notification.alert.severity,
-                'printer': {
-                    'id': notification.alert.printer.id,
-                    'name': notification.alert.printer.name,
-                    'ip_address': notification.alert.printer.ip_address,
-                },
-                'timestamp': notification.alert.created_at.isoformat(),
-            }
-            
-            response = requests.post(
-                webhook_url,
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                self.logger.info(f"Webhook sent successfully")
-                return True
-            else:
-                self.logger.error(f"Webhook failed with status {response.status_code}")
-                return False
-                
+            return WebhookDispatcher().dispatch([notification]).get(notification.id, False)
         except Exception as e:
             self.logger.error(f"Error sending webhook: {e}")
             return False
@@ -0,0 +1,121 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import User
+
+from . import recipients, stats
+from .models import Alert, AlertDataFix, AlertRule
+from .streaming import invalidate_rule_index
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=AlertRule)
+@receiver(post_delete, sender=AlertRule)
+def alert_rule_changed(sender, **kwargs):
+    """Reconstruir o índice de regras do modo streaming"""
+    invalidate_rule_index()
+
+
+@receiver(m2m_changed, sender=AlertRule.printers.through)
+def alert_rule_printers_changed(sender, instance, action, reverse, pk_set=None, **kwargs):
+    """Reconstruir o índice e pedir a varredura completa das regras afetadas
+
+    Mudar as impressoras da regra não altera updated_at; sem a marcação, uma
+    impressora recém-incluída que já está na condição só seria avaliada na
+    varredura periódica.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    invalidate_rule_index()
+    if not reverse:
+        rule_ids = [instance.pk]
+    elif pk_set:
+        rule_ids = list(pk_set)
+    else:
+        # clear() a partir da impressora: regras já desvinculadas
+        return
+    AlertRule.objects.filter(pk__in=rule_ids).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=AlertRule.users_to_notify.through)
+def alert_rule_recipients_changed(sender, instance, action, reverse, **kwargs):
+    """Descartar os destinatários em cache das regras afetadas"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        # Alterado a partir do usuário (user.alert_subscriptions)
+        recipients.invalidate_all()
+    else:
+        recipients.invalidate_rule(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, update_fields=None, **kwargs):
+    # O login só grava last_login, que não afeta os destinatários
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    recipients.invalidate_all()
+
+
+@receiver(post_save, sender=Alert)
+def alert_changed(sender, **kwargs):
+    """Recalcular as estatísticas do dashboard na próxima leitura"""
+    stats.invalidate()
+
+
+@receiver(post_migrate)
+def reset_legacy_rule_operators(sender, app_config=None, using='default', **kwargs):
+    """Devolver ao operador padrão do gatilho as regras antigas com 'lt'
+
+    Antes de condition_operator ser honrado, o campo tinha default 'lt' e era
+    ignorado: regras de temperatura, fila, manutenção e suprimentos gravadas
+    assim disparavam pelo operador do gatilho. Executa uma única vez por
+    banco (marca em AlertDataFix); um operador 'lt' escolhido depois disso
+    nunca é alterado. Bancos em que a correção já rodou antes da marca
+    existir (há regras com operador vazio) só recebem a marca.
+    """
+    from .rules import DEFAULT_OPERATORS
+
+    if app_config is None or app_config.name != 'alerts':
+        return
+
+    rules = AlertRule.objects.using(using)
+    with transaction.atomic(using=using):
+        _, created = AlertDataFix.objects.using(using).get_or_create(name='reset_legacy_rule_operators')
+        if not created or rules.filter(condition_operator='').exists():
+            return
+
+        updated = rules.filter(
+            condition_operator='lt',
+            trigger_type__in=[trigger for trigger, name in DEFAULT_OPERATORS.items() if name != 'lt']
+        ).update(condition_operator='')
+
+    if updated:
+        invalidate_rule_index()
+
+
+@receiver(post_migrate)
+def backfill_alert_daily_counts(sender, app_config=None, using='default', **kwargs):
+    """Carregar o rollup diário do histórico na primeira migração com alertas"""
+    from . import rollup
+    from .models import AlertDailyCount
+
+    if app_config is None or app_config.name != 'alerts':
+        return
+
+    if AlertDailyCount.objects.using(using).exists():
+        return
+    if not Alert.objects.using(using).filter(is_incident=False).exists():
+        return
+
+    rows = rollup.rebuild(using=using)
+    stats.invalidate()
+    logger.info(f"Alert daily counts backfilled: {rows} rows")
@@ -0,0 +1,99 @@
+"""Estatísticas de alertas e notificações para o dashboard
+
+Cada conjunto é calculado com uma única consulta de agregação condicional
+(Count com filter) e mantido no cache por poucos segundos. As estatísticas
+de alertas usam uma versão no cache, trocada a cada mudança de estado de
+alertas (criação, reconhecimento, resolução, escalonamento, limpeza): uma
+leitura depois de uma mudança já recalcula. As de notificações mudam a cada
+envio e valem apenas pelo TTL.
+"""
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+ALERT_STATS_KEY = 'alerts:stats:alerts'
+NOTIFICATION_STATS_KEY = 'alerts:stats:notifications'
+VERSION_KEY = 'alerts:stats:version'
+
+
+def _ttl() -> int:
+    return getattr(settings, 'ALERT_STATISTICS_TTL', 30)
+
+
+def _version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate():
+    """Descartar as estatísticas de alertas em cache (mudança de estado)"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def _alert_statistics() -> Dict[str, int]:
+    """Contagens dos alertas de impressora; incidentes ficam em `incidents`
+
+    Os alertas agrupados em um incidente já são contados, como no rollup
+    diário das tendências; o incidente não entra nos totais.
+    """
+    from .models import Alert
+
+    now = timezone.now()
+    alert = Q(is_incident=False)
+    return Alert.objects.aggregate(
+        total_alerts=Count('id', filter=alert),
+        new_alerts=Count('id', filter=alert & Q(status='new')),
+        acknowledged_alerts=Count('id', filter=alert & Q(status='acknowledged')),
+        resolved_alerts=Count('id', filter=alert & Q(status='resolved')),
+        escalated_alerts=Count('id', filter=alert & Q(status='escalated')),
+        critical_alerts=Count('id', filter=alert & Q(severity='critical')),
+        high_alerts=Count('id', filter=alert & Q(severity='high')),
+        medium_alerts=Count('id', filter=alert & Q(severity='medium')),
+        low_alerts=Count('id', filter=alert & Q(severity='low')),
+        alerts_last_24h=Count('id', filter=alert & Q(created_at__gte=now - timedelta(hours=24))),
+        alerts_last_week=Count('id', filter=alert & Q(created_at__gte=now - timedelta(days=7))),
+        alerts_last_month=Count('id', filter=alert & Q(created_at__gte=now - timedelta(days=30))),
+        incidents=Count('id', filter=Q(is_incident=True)),
+        open_incidents=Count('id', filter=Q(is_incident=True, status__in=Alert.OPEN_STATUSES)),
+    )
+
+
+def alert_statistics() -> Dict[str, int]:
+    version = _version()
+    stats = cache.get(ALERT_STATS_KEY, version=version)
+    if stats is None:
+        stats = _alert_statistics()
+        cache.set(ALERT_STATS_KEY, stats, _ttl(), version=version)
+    return stats
+
+
+def _notification_statistics() -> Dict[str, int]:
+    from .models import NotificationLog
+
+    return NotificationLog.objects.aggregate(
+        total_notifications=Count('id'),
+        sent_notifications=Count('id', filter=Q(status='sent')),
+        failed_notifications=Count('id', filter=Q(status='failed')),
+        pending_notifications=Count('id', filter=Q(status='pending')),
+        email_notifications=Count('id', filter=Q(notification_type='email')),
+        sms_notifications=Count('id', filter=Q(notification_type='sms')),
+        system_notifications=Count('id', filter=Q(notification_type='system')),
+    )
+
+
+def notification_statistics() -> Dict[str, int]:
+    stats = cache.get(NOTIFICATION_STATS_KEY)
+    if stats is None:
+        stats = _notification_statistics()
+        cache.set(NOTIFICATION_STATS_KEY, stats, _ttl())
+    return stats
@@ -0,0 +1,218 @@
+"""Avaliação de alertas na ingestão de status e suprimentos
+
+As tarefas de monitoramento publicam o snapshot de cada impressora com
+`on_snapshot`. Os campos que mudaram em relação ao snapshot anterior
+(guardado no cache) selecionam, pelo índice campo -> regras, apenas as
+regras afetadas, avaliadas em memória para aquela impressora. O custo passa
+a acompanhar a taxa de mudanças, e não frota × regras.
+
+Dentro de `batched()` os disparos de um ciclo de polling são acumulados e os
+alertas são criados em lote ao final, por regra, o que permite correlacionar
+falhas simultâneas (ver alerts.correlation).
+
+Uma transição suprimida pelo cooldown não volta a disparar enquanto o estado
+não muda; por isso a tarefa check_alert_rules repete a varredura completa de
+cada regra a cada ALERT_STREAMING_FULL_SCAN_INTERVAL segundos.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .rules import TRIGGER_FIELDS, compile_definition
+
+logger = logging.getLogger(__name__)
+
+RULE_INDEX_KEY = 'alerts:rule_index'
+RULE_INDEX_TTL = 300
+SNAPSHOT_KEY = 'alerts:snapshot:{printer_id}'
+EVALUATED_KEY = 'alerts:evaluated:{rule_id}'
+
+_batch = threading.local()
+
+
+def streaming_enabled() -> bool:
+    return getattr(settings, 'ALERT_STREAMING_EVALUATION', False)
+
+
+def build_rule_index() -> Dict[str, List[Dict]]:
+    """Índice campo do snapshot -> definições das regras ativas que o observam"""
+    from .models import AlertRule
+
+    index = {}
+    rules = AlertRule.objects.filter(
+        is_active=True, trigger_type__in=list(TRIGGER_FIELDS)
+    ).prefetch_related('printers')
+
+    for rule in rules:
+        index.setdefault(TRIGGER_FIELDS[rule.trigger_type], []).append({
+            'id': rule.pk,
+            'trigger_type': rule.trigger_type,
+            'condition_operator': rule.condition_operator,
+            'threshold_value': rule.threshold_value,
+            'printer_ids': [printer.pk for printer in rule.printers.all()],
+        })
+
+    return index
+
+
+def rule_index() -> Dict[str, List[Dict]]:
+    index = cache.get(RULE_INDEX_KEY)
+    if index is None:
+        index = build_rule_index()
+        cache.set(RULE_INDEX_KEY, index, RULE_INDEX_TTL)
+    return index
+
+
+def invalidate_rule_index():
+    cache.delete(RULE_INDEX_KEY)
+
+
+def full_scan_interval() -> int:
+    return getattr(settings, 'ALERT_STREAMING_FULL_SCAN_INTERVAL', 900)
+
+
+def needs_full_evaluation(rule) -> bool:
+    """Regras sem campo de ingestão, alteradas ou sem varredura completa recente
+
+    Uma regra nova ou editada precisa de uma varredura para alcançar as
+    impressoras que já estão na condição e não vão mudar de estado; a
+    varredura periódica alcança também as que ficaram na condição durante
+    o cooldown.
+    """
+    if rule.trigger_type not in TRIGGER_FIELDS:
+        return True
+
+    evaluated = cache.get(EVALUATED_KEY.format(rule_id=rule.pk))
+    if not isinstance(evaluated, dict) or evaluated['updated_at'] != rule.updated_at.isoformat():
+        return True
+    return time.time() - evaluated['at'] >= full_scan_interval()
+
+
+def mark_evaluated(rule):
+    cache.set(
+        EVALUATED_KEY.format(rule_id=rule.pk),
+        {'updated_at': rule.updated_at.isoformat(), 'at': time.time()},
+        None
+    )
+
+
+@contextmanager
+def batched():
+    """Acumular os disparos de vários snapshots e criar os alertas ao sair
+
+    Regras sem contexto por impressora usam AlertService.create_alerts, com
+    correlação em incidentes; as de suprimentos seguem criadas uma a uma.
+    """
+    if getattr(_batch, 'pending', None) is not None:
+        yield
+        return
+
+    _batch.pending = {}
+    try:
+        yield
+    finally:
+        pending, _batch.pending = _batch.pending, None
+        try:
+            _flush(pending)
+        except Exception as e:
+            logger.error(f"Error creating batched alerts: {e}")
+
+
+def _flush(pending: Dict[int, Dict]) -> int:
+    from .models import AlertRule
+    from .services import AlertService
+
+    if not pending:
+        return 0
+
+    alert_service = AlertService()
+    alerts_created = 0
+    for rule in AlertRule.objects.filter(pk__in=list(pending), is_active=True):
+        triggered = pending[rule.pk]
+        printers = alert_service.exclude_in_cooldown(rule, [printer for printer, _ in triggered.values()])
+
+        if TRIGGER_FIELDS[rule.trigger_type] == 'supply_levels':
+            for printer in printers:
+                if alert_service.create_alert(rule, printer, triggered[printer.pk][1]):
+                    alerts_created += 1
+        else:
+            alerts_created += len(alert_service.create_alerts(rule, printers))
+
+    return alerts_created
+
+
+def on_snapshot(printer, **fields) -> int:
+    """Registrar o snapshot de ingestão de uma impressora e avaliar as regras afetadas
+
+    Retorna o número de alertas criados (0 dentro de `batched()`, em que a
+    criação fica para o final do lote). Falhas são registradas e nunca
+    interrompem a ingestão.
+    """
+    if not streaming_enabled():
+        return 0
+
+    try:
+        return _evaluate_snapshot(printer, fields)
+    except Exception as e:
+        logger.error(f"Error evaluating alert rules for printer {printer.name}: {e}")
+        return 0
+
+
+def _evaluate_snapshot(printer, fields: Dict) -> int:
+    from .models import AlertRule
+    from .services import AlertService
+
+    key = SNAPSHOT_KEY.format(printer_id=printer.pk)
+    previous = cache.get(key) or {}
+    snapshot = {**previous, **fields}
+    cache.set(key, snapshot, getattr(settings, 'ALERT_SNAPSHOT_TTL', 86400))
+
+    changed = [field for field, value in fields.items() if field not in previous or previous[field] != value]
+    if not changed:
+        return 0
+
+    index = rule_index()
+    triggered_rule_ids = []
+    for field in changed:
+        for entry in index.get(field, ()):
+            if entry['printer_ids']:
+                if printer.pk not in entry['printer_ids']:
+                    continue
+            elif not printer.is_monitored:
+                continue
+
+            compiled = compile_definition(
+                entry['trigger_type'], entry['condition_operator'], entry['threshold_value']
+            )
+            if compiled is not None and compiled.matches(snapshot):
+                triggered_rule_ids.append(entry['id'])
+
+    if not triggered_rule_ids:
+        return 0
+
+    pending = getattr(_batch, 'pending', None)
+    if pending is not None:
+        for rule_id in triggered_rule_ids:
+            context_data = {'supply_levels': snapshot['supply_levels']} if 'supply_levels' in snapshot else None
+            pending.setdefault(rule_id, {})[printer.pk] = (printer, context_data)
+        return 0
+
+    alert_service = AlertService()
+    alerts_created = 0
+    for rule in AlertRule.objects.filter(pk__in=triggered_rule_ids, is_active=True):
+        if alert_service.in_cooldown(rule, printer):
+            continue
+
+        context_data = None
+        if TRIGGER_FIELDS[rule.trigger_type] == 'supply_levels':
+            context_data = {'supply_levels': snapshot['supply_levels']}
+
+        if alert_service.create_alert(rule, printer, context_data):
+            alerts_created += 1
+
+    return alerts_created
@@ -5,6 +5,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
+from datetime import timedelta
 from .models import (
     AlertRule, Alert, NotificationLog
 )
@@ -12,6 +13,9 @@ from .serializers import (
     AlertRuleSerializer, AlertSerializer, NotificationLogSerializer
 )
 from users.permissions import IsAdminOrTechnician
+from hp_management import realtime
+from . import bulk, escalation, rollup, stats
+from .filters import AlertFilter
 
 
 class AlertRuleViewSet(viewsets.ModelViewSet):
@@ -41,17 +45,28 @@ class AlertRuleViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def test_rule(self, request, pk=None):
-        """Testar regra de alerta"""
+        """Testar regra de alerta
+        
+        Com dry_run=true (no corpo ou na query string), relata também o tempo
+        de avaliação, as consultas ao banco, o EXPLAIN da consulta compilada e
+        a estimativa de notificações que a regra geraria.
+        """
         rule = self.get_object()
+        dry_run = str(request.data.get('dry_run', request.query_params.get('dry_run', ''))).lower() in ('1', 'true')
         
         try:
-            from .services import AlertService
-            alert_service = AlertService()
-            
-            # Verificar condições da regra
-            triggered_printers = alert_service.check_rule_conditions(rule)
+            if dry_run:
+                from .dryrun import dry_run as run_dry
+                report = run_dry(rule)
+                triggered_printers = report.pop('printers')
+            else:
+                from .services import AlertService
+                alert_service = AlertService()
+                
+                # Verificar condições da regra
+                triggered_printers = alert_service.check_rule_conditions(rule)
             
-            return Response({
+            response = {
                 'rule_name': rule.name,
                 'triggered_printers': len(triggered_printers),
                 'printers': [{
@@ -59,7 +74,11 @@ class AlertRuleViewSet(viewsets.ModelViewSet):
                     'name': p.name,
                     'ip_address': p.ip_address
                 } for p in triggered_printers]
-            })
+            }
+            if dry_run:
+                response['dry_run'] = report
+            
+            return Response(response)
             
         except Exception as e:
             return Response(
@@ -74,9 +93,8 @@ class AlertViewSet(viewsets.ModelViewSet):
     queryset = Alert.objects.all()
     serializer_class = AlertSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['status', 'severity', 'printer', 'rule']
-    search_fields = ['title', 'message', 'printer__name']
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = AlertFilter
     ordering_fields = ['created_at', 'severity']
     ordering = ['-created_at']
     
@@ -105,6 +123,17 @@ class AlertViewSet(viewsets.ModelViewSet):
         alert.acknowledged_by = request.user
         alert.save()
         
+        # Reconhecer um incidente reconhece os alertas agrupados nele
+        if alert.is_incident:
+            alert.children.filter(status='new').update(
+                status='acknowledged',
+                acknowledged_at=alert.acknowledged_at,
+                acknowledged_by=request.user
+            )
+        
+        escalation.cancel([alert.id])
+        realtime.alerts_updated([alert])
+        
         # Log da atividade
         from users.models import UserActivity
         UserActivity.objects.create(
@@ -135,6 +164,21 @@ class AlertViewSet(viewsets.ModelViewSet):
         alert.resolution_notes = resolution_notes
         alert.save()
         
+        resolved = [alert]
+        if alert.is_incident:
+            children = alert.children.filter(status__in=Alert.OPEN_STATUSES)
+            resolved.extend(children.only('id', 'rule_id', 'printer_id', 'severity', 'is_incident'))
+            children.update(
+                status='resolved',
+                resolved_at=alert.resolved_at,
+                resolved_by=request.user,
+                resolution_notes=resolution_notes
+            )
+        rollup.record(resolved, 'resolved_count', when=alert.resolved_at)
+        
+        escalation.cancel([alert.id])
+        realtime.alerts_updated([alert])
+        
         # Log da atividade
         from users.models import UserActivity
         UserActivity.objects.create(
@@ -148,35 +192,45 @@ class AlertViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Estatísticas de alertas"""
-        stats = {
-            'total_alerts': Alert.objects.count(),
-            'new_alerts': Alert.objects.filter(status='new').count(),
-            'acknowledged_alerts': Alert.objects.filter(status='acknowledged').count(),
-            'resolved_alerts': Alert.objects.filter(status='resolved').count(),
-            'critical_alerts': Alert.objects.filter(severity='critical').count(),
-            'high_alerts': Alert.objects.filter(severity='high').count(),
-            'medium_alerts': Alert.objects.filter(severity='medium').count(),
-            'low_alerts': Alert.objects.filter(severity='low').count(),
-        }
-        
-        # Alertas por período
-        from datetime import timedelta
-        now = timezone.now()
+        """Estatísticas de alertas (agregação condicional e rollup diário, em cache)"""
+        return Response(stats.alert_statistics())
+    
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """Tendência de alertas criados e resolvidos a partir do rollup diário
         
-        stats['alerts_last_24h'] = Alert.objects.filter(
-            created_at__gte=now - timedelta(hours=24)
-        ).count()
+        Parâmetros: group_by (day, severity, rule, printer, department),
+        interval (day, week, month), days (até 366) e os filtros severity,
+        rule, printer e department.
+        """
+        group_by = request.query_params.get('group_by', 'day')
+        interval = request.query_params.get('interval', 'day')
+        if group_by not in rollup.TREND_GROUPS or interval not in rollup.TREND_INTERVALS:
+            return Response(
+                {'error': 'group_by ou interval inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        stats['alerts_last_week'] = Alert.objects.filter(
-            created_at__gte=now - timedelta(days=7)
-        ).count()
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 366)
+        except ValueError:
+            return Response(
+                {'error': 'days deve ser um número inteiro'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        stats['alerts_last_month'] = Alert.objects.filter(
-            created_at__gte=now - timedelta(days=30)
-        ).count()
+        filters = {}
+        for param, field in (('severity', 'severity'), ('rule', 'rule_id'),
+                             ('printer', 'printer_id'), ('department', 'printer__department')):
+            if request.query_params.get(param):
+                filters[field] = request.query_params[param]
         
-        return Response(stats)
+        return Response({
+            'group_by': group_by,
+            'interval': interval,
+            'days': days,
+            'results': rollup.trends(group_by, interval, days, filters),
+        })
     
     @action(detail=False, methods=['post'])
     def bulk_acknowledge(self, request):
@@ -196,19 +250,97 @@ class AlertViewSet(viewsets.ModelViewSet):
         
         alerts = Alert.objects.filter(
             id__in=alert_ids,
-            status='new'
+            status__in=escalation.ESCALATABLE_STATUSES
         )
+        acknowledged_ids = list(alerts.values_list('id', flat=True))
         
-        acknowledged_count = alerts.update(
+        acknowledged_count = Alert.objects.filter(id__in=acknowledged_ids).update(
             status='acknowledged',
             acknowledged_at=timezone.now(),
             acknowledged_by=request.user
         )
+        escalation.cancel(acknowledged_ids)
+        stats.invalidate()
+        realtime.alerts_status_changed(acknowledged_ids, 'acknowledged')
         
         return Response({
             'message': f'{acknowledged_count} alertas reconhecidos com sucesso',
             'acknowledged_count': acknowledged_count
         })
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_by_filter(self, request):
+        """Reconhecer, resolver ou fechar em segundo plano os alertas de um filtro
+        
+        Corpo: action (acknowledge, resolve, close), filters (os mesmos
+        parâmetros da listagem) e, para resolve, resolution_notes.
+        """
+        from monitoring.tasks import bulk_update_alerts
+        
+        if not request.user.is_technician:
+            return Response(
+                {'error': 'Permissão negada'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        bulk_action = request.data.get('action')
+        filters = request.data.get('filters') or {}
+        if bulk_action not in bulk.BULK_ACTIONS:
+            return Response(
+                {'error': f"Ação inválida; use {', '.join(bulk.BULK_ACTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # selection() recusa filtros vazios ou desconhecidos
+        try:
+            total = bulk.selection(bulk_action, filters).count()
+        except ValueError as e:
+            return Response(
+                {'error': f'Filtros inválidos: {e}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        task = bulk_update_alerts.delay(
+            bulk_action,
+            filters,
+            request.user.id,
+            request.data.get('resolution_notes', ''),
+            request.META.get('REMOTE_ADDR')
+        )
+        bulk.set_owner(task.id, request.user.id)
+        
+        return Response({
+            'task_id': task.id,
+            'action': bulk_action,
+            'total': total
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'bulk/(?P<task_id>[^/.]+)')
+    def bulk_status(self, request, task_id=None):
+        """Progresso de uma operação em lote (apenas para quem a iniciou)"""
+        from celery.result import AsyncResult
+        
+        if not bulk.is_owner(task_id, request.user.id):
+            return Response(
+                {'error': 'Operação não encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+        
+        response = {
+            'task_id': task_id,
+            'state': result.state,
+            'done': info.get('done', info.get('total', 0) if result.successful() else 0),
+            'total': info.get('total', 0),
+        }
+        if result.successful():
+            response['updated'] = info.get('updated', 0)
+        elif result.failed():
+            response['error'] = str(result.info)
+        
+        return Response(response)
 
 
 class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -225,18 +357,8 @@ class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Estatísticas de notificações"""
-        stats = {
-            'total_notifications': NotificationLog.objects.count(),
-            'sent_notifications': NotificationLog.objects.filter(status='sent').count(),
-            'failed_notifications': NotificationLog.objects.filter(status='failed').count(),
-            'pending_notifications': NotificationLog.objects.filter(status='pending').count(),
-            'email_notifications': NotificationLog.objects.filter(notification_type='email').count(),
-            'sms_notifications': NotificationLog.objects.filter(notification_type='sms').count(),
-            'system_notifications': NotificationLog.objects.filter(notification_type='system').count(),
-        }
-        
-        return Response(stats)
+        """Estatísticas de notificações (uma consulta de agregação, em cache)"""
+        return Response(stats.notification_statistics())
     
     @action(detail=True, methods=['post'])
     def retry(self, request, pk=None):
@@ -266,7 +388,11 @@ class NotificationLogViewSet(viewsets.ReadOnlyModelViewSet):
                 notification.sent_at = timezone.now()
                 message = 'Notificação reenviada com sucesso'
             else:
+                from .dispatch import retry_delay
                 notification.attempts += 1
+                notification.next_attempt_at = timezone.now() + timedelta(
+                    seconds=retry_delay(notification.notification_type, notification.attempts)
+                )
                 message = 'Falha ao reenviar notificação'
             
             notification.save()
@@ -0,0 +1,129 @@
+"""Envio assíncrono de webhooks de alerta
+
+Um cliente httpx com pool de conexões (keep-alive) é compartilhado por todo
+o lote; cada host tem um limite próprio de requisições simultâneas, e um
+endpoint lento atrasa apenas as próprias entregas. Cada entrega é tentada
+uma vez; uma falha volta para a fila como não enviada e é reagendada pelo
+backoff do canal (alerts.dispatch), sem ocupar o worker esperando.
+
+Com ALERT_WEBHOOK_SECRET definido, cada requisição leva os cabeçalhos
+X-HP-Timestamp e X-HP-Signature (HMAC-SHA256 hexadecimal de
+"<timestamp>.<corpo>").
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+
+from hp_management import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def build_payload(notification) -> Dict:
+    """Corpo JSON do webhook de uma notificação"""
+    alert = notification.alert
+    return {
+        'alert_id': alert.id,
+        'title': alert.title,
+        'message': alert.message,
+        'severity': alert.severity,
+        'printer': {
+            'id': alert.printer.id,
+            'name': alert.printer.name,
+            'ip_address': alert.printer.ip_address,
+        },
+        'timestamp': alert.created_at.isoformat(),
+    }
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """Assinatura HMAC-SHA256 de "<timestamp>.<corpo>\""""
+    message = timestamp.encode() + b'.' + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class WebhookDispatcher:
+    """Despacho concorrente de webhooks com pool de conexões"""
+
+    def __init__(self, url: Optional[str] = None, secret: Optional[str] = None,
+                 connect_timeout: Optional[float] = None, timeout: Optional[float] = None,
+                 max_per_host: Optional[int] = None, max_connections: Optional[int] = None):
+        self.url = url or getattr(settings, 'ALERT_WEBHOOK_URL', None)
+        self.secret = secret if secret is not None else getattr(settings, 'ALERT_WEBHOOK_SECRET', '')
+        self.connect_timeout = connect_timeout or getattr(settings, 'ALERT_WEBHOOK_CONNECT_TIMEOUT', 2.0)
+        self.timeout = timeout or getattr(settings, 'ALERT_WEBHOOK_TIMEOUT', 10.0)
+        self.max_per_host = max_per_host or getattr(settings, 'ALERT_WEBHOOK_MAX_PER_HOST', 4)
+        self.max_connections = max_connections or getattr(settings, 'ALERT_WEBHOOK_MAX_CONNECTIONS', 50)
+
+    def dispatch(self, notifications) -> Dict[int, bool]:
+        """Enviar os webhooks do lote; retorna id da notificação -> sucesso"""
+        if not notifications:
+            return {}
+
+        if not self.url:
+            logger.warning("ALERT_WEBHOOK_URL not configured; webhook notifications not sent")
+            return {notification.id: False for notification in notifications}
+
+        # Montar os corpos fora do loop assíncrono (acesso ao ORM)
+        deliveries = [
+            (notification, self.url, json.dumps(build_payload(notification)).encode())
+            for notification in notifications
+        ]
+        return asyncio.run(self.dispatch_async(deliveries))
+
+    async def dispatch_async(self, deliveries: List[Tuple[object, str, bytes]]) -> Dict[int, bool]:
+        """Entregar (notificação, url, corpo) concorrentemente"""
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        timeout = httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            async def deliver(notification, url: str, body: bytes) -> Tuple[int, bool]:
+                host = urlsplit(url).netloc
+                semaphore = semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+                started_at = time.perf_counter()
+                success = await self._deliver(client, semaphore, notification, url, body)
+                metrics.NOTIFICATION_SEND_DURATION.labels(
+                    channel='webhook', result='sent' if success else 'failed'
+                ).observe(time.perf_counter() - started_at)
+                return notification.id, success
+
+            results = await asyncio.gather(*(deliver(*delivery) for delivery in deliveries))
+
+        return dict(results)
+
+    async def _deliver(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                       notification, url: str, body: bytes) -> bool:
+        try:
+            async with semaphore:
+                response = await client.post(url, content=body, headers=self._headers(body))
+        except httpx.HTTPError as e:
+            notification.error_message = f"{type(e).__name__}: {e}"
+            logger.warning(f"Webhook for notification {notification.id} failed: {e}")
+            return False
+
+        if response.is_success:
+            return True
+
+        notification.error_message = f"HTTP {response.status_code}"
+        logger.warning(f"Webhook for notification {notification.id} failed with status {response.status_code}")
+        return False
+
+    def _headers(self, body: bytes) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json'}
+        if self.secret:
+            timestamp = str(int(time.time()))
+            headers['X-HP-Timestamp'] = timestamp
+            headers['X-HP-Signature'] = sign(self.secret, timestamp, body)
+        return headers
@@ -0,0 +1 @@
+# Benchmarks de desempenho (polling, parsing SNMP)
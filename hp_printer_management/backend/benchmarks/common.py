@@ -0,0 +1,147 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def setup_django(database_url: Optional[str] = None) -> str:
+    """Configurar o Django para os benchmarks
+
+    Sem `database_url` usa um SQLite temporário, para nunca tocar no banco
+    de desenvolvimento. Retorna a URL efetivamente usada.
+    """
+    if database_url is None:
+        database_url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if database_url is None:
+        path = os.path.join(tempfile.gettempdir(), 'hp_management_benchmark.sqlite3')
+        database_url = f'sqlite:///{path}'
+
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hp_management.settings')
+
+    import django
+    django.setup()
+    return database_url
+
+
+def migrate():
+    """Criar o schema (apps sem migrations via run_syncdb)"""
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+class QueryCounter:
+    """Contar as instruções SQL executadas na conexão padrão"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        from django.db import connection
+        self._context = connection.execute_wrapper(self)
+        self._context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._context.__exit__(exc_type, exc_value, traceback)
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo atual em MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentil pelo método nearest-rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(**params) -> Dict:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': params,
+    }
+
+
+def append_results(path: str, run: Dict):
+    """Acrescentar uma execução ao arquivo JSON de resultados"""
+    data = {'runs': []}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as results_file:
+            data = json.load(results_file)
+
+    data['runs'].append(run)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(data, results_file, indent=2)
+
+
+def load_latest_run(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as results_file:
+        runs = json.load(results_file).get('runs', [])
+    return runs[-1] if runs else None
+
+
+def find_regressions(current: List[Dict], baseline: List[Dict], key_fields: List[str],
+                     metric: str, tolerance: float, higher_is_better: bool = True) -> List[str]:
+    """Comparar cenários com a mesma chave e listar as regressões acima da tolerância"""
+    baseline_by_key = {
+        tuple(scenario.get(field) for field in key_fields): scenario
+        for scenario in baseline
+    }
+
+    regressions = []
+    for scenario in current:
+        key = tuple(scenario.get(field) for field in key_fields)
+        reference = baseline_by_key.get(key)
+        if not reference or reference.get(metric) in (None, 0) or scenario.get(metric) is None:
+            continue
+
+        change = (scenario[metric] - reference[metric]) / reference[metric]
+        if not higher_is_better:
+            change = -change
+
+        if change < -tolerance:
+            label = ', '.join(f'{field}={value}' for field, value in zip(key_fields, key))
+            regressions.append(
+                f"{label}: {metric} {reference[metric]:.4g} -> {scenario[metric]:.4g} ({change:+.1%})"
+            )
+
+    return regressions
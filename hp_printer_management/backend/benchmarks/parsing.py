@@ -0,0 +1,152 @@
+"""Micro-benchmark de interpretação das respostas SNMP de suprimentos
+
+Usa as tabelas de suprimentos e colorantes dos walks gravados em modelos HP
+reais (simulator/walks) e mede, por snapshot, a conversão dos varBinds e a
+classificação dos suprimentos, com o cache de descrições frio e quente.
+
+    cd backend
+    python -m benchmarks.parsing --iterations 20000
+    python -m benchmarks.parsing --baseline benchmarks/results/baseline_parsing.json
+
+Com o pysnmp instalado os varBinds usam os tipos rfc1902, como no poller;
+sem ele são usados os valores nativos dos walks.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from . import common
+
+SUPPLY_COLUMNS = (6, 9, 8, 5, 3)  # descrição, nível, capacidade, tipo, colorante
+SUPPLY_TABLE_PREFIX = (1, 3, 6, 1, 2, 1, 43, 11, 1, 1)
+COLORANT_VALUE_PREFIX = (1, 3, 6, 1, 2, 1, 43, 12, 1, 1, 4, 1)
+
+
+def _has_pysnmp() -> bool:
+    try:
+        import pysnmp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _snmp_value(value):
+    if not _has_pysnmp():
+        return value
+
+    from pysnmp.proto import rfc1902
+
+    if isinstance(value, int):
+        return rfc1902.Integer32(value)
+    return rfc1902.OctetString(str(value))
+
+
+def recorded_snapshot(walk) -> Tuple[List[List[Tuple]], Dict[int, str]]:
+    """Extrair de um walk as linhas de varBinds da tabela de suprimentos"""
+    description_prefix = SUPPLY_TABLE_PREFIX + (SUPPLY_COLUMNS[0], 1)
+    indexes = [oid[-1] for oid in walk.oids if oid[:-1] == description_prefix]
+
+    rows = []
+    for index in indexes:
+        row = []
+        for column in SUPPLY_COLUMNS:
+            oid = SUPPLY_TABLE_PREFIX + (column, 1, index)
+            row.append((oid, _snmp_value(walk.values.get(oid, 0))))
+        rows.append(row)
+
+    colorants = {
+        oid[-1]: str(value)
+        for oid, value in walk.values.items()
+        if oid[:-1] == COLORANT_VALUE_PREFIX
+    }
+    return rows, colorants
+
+
+def parse_snapshot(rows: List[List[Tuple]], colorants: Dict[int, str]) -> Dict:
+    from printers.supplies import parse_supply_rows, supply_row
+    return parse_supply_rows([supply_row(row) for row in rows], colorants)
+
+
+def measure(rows, colorants, iterations: int, cold: bool) -> Dict:
+    from printers.supplies import classify_supply
+
+    samples = []
+    for _ in range(iterations):
+        if cold:
+            classify_supply.cache_clear()
+        started_at = time.perf_counter_ns()
+        parse_snapshot(rows, colorants)
+        samples.append(time.perf_counter_ns() - started_at)
+
+    return {
+        'ns_per_snapshot_p50': statistics.median(samples),
+        'ns_per_snapshot_p99': common.percentile(samples, 0.99),
+        'ns_per_snapshot_mean': round(statistics.fmean(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de interpretação SNMP de suprimentos')
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--walks', nargs='*', default=None, help='Arquivos .walk (padrão: todos)')
+    parser.add_argument('--output', default=os.path.join(common.RESULTS_DIR, 'parsing.json'))
+    parser.add_argument('--baseline', default=None,
+                        help='Arquivo de resultados de referência para detectar regressões')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Aumento máximo aceitável de ns_per_snapshot_p50 (fração)')
+    args = parser.parse_args()
+
+    from simulator import load_walks
+
+    scenarios = []
+    for walk in load_walks(args.walks):
+        rows, colorants = recorded_snapshot(walk)
+        supplies = parse_snapshot(rows, colorants)
+
+        for cache in ('cold', 'warm'):
+            scenario = {
+                'walk': walk.name,
+                'cache': cache,
+                'supplies': len(rows),
+                'classified': sorted(supplies),
+            }
+            scenario.update(measure(rows, colorants, args.iterations, cold=cache == 'cold'))
+            scenarios.append(scenario)
+            print(
+                f"{walk.name:<32} {cache:<5} supplies={len(rows):<3} "
+                f"p50={scenario['ns_per_snapshot_p50'] / 1000:>8.2f}us "
+                f"p99={scenario['ns_per_snapshot_p99'] / 1000:>8.2f}us "
+                f"-> {', '.join(scenario['classified'])}"
+            )
+
+    run = common.run_metadata(iterations=args.iterations, pysnmp=_has_pysnmp())
+    run['scenarios'] = scenarios
+    common.append_results(args.output, run)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = common.load_latest_run(args.baseline)
+        if baseline is None:
+            print(f"No baseline runs found in {args.baseline}")
+            return 0
+
+        regressions = common.find_regressions(
+            scenarios, baseline.get('scenarios', []),
+            key_fields=['walk', 'cache'],
+            metric='ns_per_snapshot_p50',
+            tolerance=args.tolerance,
+            higher_is_better=False,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Benchmark de vazão do polling SNMP
+
+Executa `monitor_printer_status` e `update_printer_supplies` contra uma frota
+simulada e registra tempo total, PDUs SNMP, instruções SQL, pico de RSS e
+latência p50/p99 por impressora.
+
+    cd backend
+    python -m benchmarks.polling --sizes 100 1000 10000 --workers 1 4
+    python -m benchmarks.polling --database-url postgresql://... --baseline benchmarks/results/baseline.json
+
+Sem --database-url usa um SQLite temporário. O SQLite aceita um único
+escritor; para comparar vários workers use PostgreSQL.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from . import common
+
+TASKS = {
+    'monitor': 'monitor_printer_status',
+    'supplies': 'update_printer_supplies',
+}
+
+SERIAL_PREFIX = 'SIM'
+
+
+def _init_worker(database_url: str):
+    common.setup_django(database_url)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_shard(task_name: str, printer_ids: List[int]) -> Dict:
+    """Executar a tarefa para um shard de impressoras no processo worker"""
+    from django.db import connection
+    from monitoring import tasks
+
+    task = getattr(tasks, task_name)
+    with common.QueryCounter() as counter:
+        result = task(printer_ids=printer_ids, collect_timings=True)
+    connection.close()
+
+    return {
+        'db_statements': counter.count,
+        'timings': result.get('timings', []),
+        'error_count': result.get('error_count', 0),
+        'peak_rss_mb': common.peak_rss_mb(),
+    }
+
+
+def register_printers(targets: List[Dict]) -> List[int]:
+    """Cadastrar (ou recadastrar) as impressoras simuladas"""
+    from printers.models import Printer
+
+    Printer.objects.filter(serial_number__startswith=SERIAL_PREFIX).delete()
+    Printer.objects.bulk_create([
+        Printer(
+            name=target['name'],
+            model=target['model'],
+            serial_number=target['serial_number'],
+            ip_address=target['ip_address'],
+            snmp_port=target['snmp_port'],
+            snmp_community=target['snmp_community'],
+            printer_type='laser',
+            status='active',
+            is_monitored=True,
+        )
+        for target in targets
+    ], batch_size=1000)
+
+    return list(
+        Printer.objects.filter(serial_number__startswith=SERIAL_PREFIX)
+        .order_by('id').values_list('id', flat=True)
+    )
+
+
+def reset_printer_state(printer_ids: List[int]):
+    """Voltar as impressoras para 'active' entre cenários"""
+    from printers.models import Printer
+    Printer.objects.filter(id__in=printer_ids).update(status='active')
+
+
+def run_scenario(task_name: str, fleet, printer_ids: List[int], workers: int,
+                 database_url: str) -> Dict:
+    shards = [printer_ids[index::workers] for index in range(workers)]
+    fleet.reset_stats()
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(database_url,)) as pool:
+        # Subir os workers (django.setup no initializer) fora da medição
+        for future in [pool.submit(_ping) for _ in range(workers)]:
+            future.result()
+
+        started_at = time.perf_counter()
+        shard_results = list(pool.map(_run_shard, [task_name] * workers, shards))
+        wall_time = time.perf_counter() - started_at
+
+    timings = [timing for shard in shard_results for timing in shard['timings']]
+    fleet_stats = fleet.stats()
+
+    return {
+        'task': task_name,
+        'fleet_size': len(printer_ids),
+        'workers': workers,
+        'wall_time_s': round(wall_time, 4),
+        'printers_per_second': round(len(printer_ids) / wall_time, 2) if wall_time else None,
+        'snmp_pdus_sent': fleet_stats['requests_received'],
+        'snmp_responses': fleet_stats['responses_sent'],
+        'db_statements': sum(shard['db_statements'] for shard in shard_results),
+        'peak_rss_mb': round(max(
+            [shard['peak_rss_mb'] for shard in shard_results] + [common.peak_rss_mb()]
+        ), 1),
+        'latency_p50_ms': _ms(common.percentile(timings, 0.50)),
+        'latency_p99_ms': _ms(common.percentile(timings, 0.99)),
+        'errors': sum(shard['error_count'] for shard in shard_results),
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de vazão do polling SNMP')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('--tasks', nargs='+', choices=sorted(TASKS), default=sorted(TASKS))
+    parser.add_argument('--database-url', default=None)
+    parser.add_argument('--base-port', type=int, default=20161)
+    parser.add_argument('--latency', type=float, default=0.001)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--loss', type=float, default=0.0)
+    parser.add_argument('--offline-ratio', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=os.path.join(common.RESULTS_DIR, 'polling.json'))
+    parser.add_argument('--baseline', default=None,
+                        help='Arquivo de resultados de referência para detectar regressões')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Queda máxima aceitável de printers_per_second (fração)')
+    args = parser.parse_args()
+
+    database_url = common.setup_django(args.database_url)
+    common.migrate()
+
+    from django.db import connection
+    from simulator import SimulatedFleet
+
+    scenarios = []
+    for size in args.sizes:
+        fleet = SimulatedFleet(
+            size,
+            base_port=args.base_port,
+            latency=args.latency,
+            jitter=args.jitter,
+            loss=args.loss,
+            offline_ratio=args.offline_ratio,
+            seed=args.seed,
+        )
+        with fleet:
+            printer_ids = register_printers(fleet.targets())
+            for workers in args.workers:
+                for task_key in args.tasks:
+                    reset_printer_state(printer_ids)
+                    connection.close()
+                    scenario = run_scenario(TASKS[task_key], fleet, printer_ids, workers, database_url)
+                    scenario['db_vendor'] = connection.vendor
+                    scenarios.append(scenario)
+                    print(
+                        f"{scenario['task']:<26} n={size:<6} workers={workers:<3} "
+                        f"{scenario['wall_time_s']:>9.2f}s {scenario['printers_per_second']:>9.1f}/s "
+                        f"pdus={scenario['snmp_pdus_sent']:<7} sql={scenario['db_statements']:<7} "
+                        f"rss={scenario['peak_rss_mb']}MB p50={scenario['latency_p50_ms']}ms "
+                        f"p99={scenario['latency_p99_ms']}ms errors={scenario['errors']}"
+                    )
+
+    run = common.run_metadata(
+        latency=args.latency, jitter=args.jitter, loss=args.loss,
+        offline_ratio=args.offline_ratio, seed=args.seed,
+    )
+    run['db_vendor'] = connection.vendor
+    run['scenarios'] = scenarios
+    common.append_results(args.output, run)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        baseline = common.load_latest_run(args.baseline)
+        if baseline is None:
+            print(f"No baseline runs found in {args.baseline}")
+            return 0
+
+        regressions = common.find_regressions(
+            scenarios, baseline.get('scenarios', []),
+            key_fields=['task', 'fleet_size', 'workers', 'db_vendor'],
+            metric='printers_per_second',
+            tolerance=args.tolerance,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+wsgi_app = 'hp_management.wsgi:application'
+
+
+def child_exit(server, worker):
+    """Liberar as métricas do worker no modo multiprocess do Prometheus"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
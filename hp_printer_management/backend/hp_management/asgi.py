@@ -0,0 +1,28 @@
+"""
+ASGI config for hp_management project.
+
+HTTP is served by Django; WebSocket connections (real-time dashboard
+updates) are routed to Channels consumers.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hp_management.settings')
+
+# Inicializar o Django antes de importar consumers e modelos
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from .routing import websocket_urlpatterns  # noqa: E402
+from .ws_auth import TokenAuthMiddlewareStack  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        TokenAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -0,0 +1,30 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .realtime import DASHBOARD_GROUP, USER_GROUP
+
+
+class RealtimeConsumer(AsyncJsonWebsocketConsumer):
+    """WebSocket do painel: alertas, estado das impressoras e notificações do usuário"""
+    
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        
+        self.groups_joined = [DASHBOARD_GROUP, USER_GROUP.format(user_id=user.pk)]
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+    
+    async def disconnect(self, code):
+        for group in getattr(self, 'groups_joined', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+    
+    async def receive_json(self, content, **kwargs):
+        # Canal somente de saída; responder ao ping de keep-alive do cliente
+        if content.get('type') == 'ping':
+            await self.send_json({'event': 'pong'})
+    
+    async def realtime_event(self, event):
+        await self.send_json({'event': event['event'], 'payload': event['payload']})
@@ -0,0 +1,167 @@
+"""Métricas Prometheus do poller, das notificações e da API
+
+Em produção (gunicorn e Celery prefork) defina PROMETHEUS_MULTIPROC_DIR com
+um diretório compartilhado e gravável, vazio na subida dos serviços; o
+endpoint /metrics agrega então os valores de todos os processos.
+
+O endpoint só responde aos endereços de METRICS_ALLOWED_IPS ou a quem envia
+o METRICS_TOKEN como Bearer no cabeçalho Authorization.
+"""
+import hmac
+import ipaddress
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CYCLE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+SNMP_REQUEST_DURATION = Histogram(
+    'hp_snmp_request_duration_seconds',
+    'Duração das requisições SNMP',
+    ['printer', 'oid_group'],
+    buckets=LATENCY_BUCKETS,
+)
+
+SNMP_TIMEOUTS = Counter(
+    'hp_snmp_timeouts_total',
+    'Requisições SNMP sem resposta dentro do timeout',
+    ['printer', 'oid_group'],
+)
+
+POLL_CYCLE_DURATION = Histogram(
+    'hp_poll_cycle_duration_seconds',
+    'Duração de um ciclo completo das tarefas de monitoramento',
+    ['task'],
+    buckets=CYCLE_BUCKETS,
+)
+
+ROWS_INGESTED = Counter(
+    'hp_rows_ingested_total',
+    'Linhas gravadas pelas tarefas de monitoramento',
+    ['table'],
+)
+
+ALERT_RULE_EVALUATION = Histogram(
+    'hp_alert_rule_evaluation_seconds',
+    'Tempo de avaliação de uma regra de alerta',
+    ['trigger_type'],
+    buckets=LATENCY_BUCKETS,
+)
+
+NOTIFICATION_SEND_DURATION = Histogram(
+    'hp_notification_send_duration_seconds',
+    'Latência de envio de notificações',
+    ['channel', 'result'],
+    buckets=LATENCY_BUCKETS,
+)
+
+NOTIFICATION_QUEUE_DEPTH = Gauge(
+    'hp_notification_queue_depth',
+    'Notificações pendentes por canal e severidade',
+    ['channel', 'severity'],
+    multiprocess_mode='mostrecent',
+)
+
+NOTIFICATION_QUEUE_AGE = Gauge(
+    'hp_notification_queue_oldest_age_seconds',
+    'Idade da notificação pendente mais antiga por canal e severidade',
+    ['channel', 'severity'],
+    multiprocess_mode='mostrecent',
+)
+
+NOTIFICATION_RATE_LIMITED = Counter(
+    'hp_notification_rate_limited_total',
+    'Envios adiados pelos limites de taxa',
+    ['channel', 'scope'],
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'hp_http_request_duration_seconds',
+    'Latência das requisições da API por view',
+    ['view', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+
+HTTP_DB_QUERIES = Histogram(
+    'hp_http_db_queries',
+    'Consultas SQL executadas por requisição',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+
+def printer_label(ip_address: str) -> str:
+    """Rótulo de impressora das métricas SNMP
+
+    Por padrão agregado em 'all' para limitar a cardinalidade; habilite
+    METRICS_PER_PRINTER_LABELS para uma série por impressora.
+    """
+    if getattr(settings, 'METRICS_PER_PRINTER_LABELS', False):
+        return ip_address
+    return 'all'
+
+
+@contextmanager
+def observe_snmp(ip_address: str, oid_group: str):
+    """Medir a duração de uma requisição SNMP"""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        SNMP_REQUEST_DURATION.labels(
+            printer=printer_label(ip_address), oid_group=oid_group
+        ).observe(time.perf_counter() - started_at)
+
+
+def record_snmp_timeout(ip_address: str, oid_group: str, count: int = 1):
+    SNMP_TIMEOUTS.labels(printer=printer_label(ip_address), oid_group=oid_group).inc(count)
+
+
+def is_timeout(error_indication) -> bool:
+    """Verificar se o errorIndication do pysnmp é um timeout"""
+    return error_indication is not None and 'timeout' in str(error_indication).lower()
+
+
+def _allowed(request) -> bool:
+    """Verificar o token Bearer ou o endereço de origem da requisição"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+
+    for network in getattr(settings, 'METRICS_ALLOWED_IPS', []):
+        try:
+            if address in ipaddress.ip_network(network, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def metrics_view(request):
+    """Endpoint /metrics no formato de exposição do Prometheus"""
+    if not _allowed(request):
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
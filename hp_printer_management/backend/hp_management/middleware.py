@@ -0,0 +1,39 @@
+import time
+
+from django.db import connection
+
+from .metrics import HTTP_DB_QUERIES, HTTP_REQUEST_DURATION
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Registrar latência e número de consultas SQL de cada view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        started_at = time.perf_counter()
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - started_at
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+
+        HTTP_REQUEST_DURATION.labels(
+            view=view, method=request.method, status=str(response.status_code)
+        ).observe(duration)
+        HTTP_DB_QUERIES.labels(view=view).observe(counter.count)
+
+        return response
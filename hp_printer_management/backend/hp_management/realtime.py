@@ -0,0 +1,98 @@
+"""Publicação de eventos em tempo real (Django Channels sobre Redis)
+
+Os eventos vão para o grupo `dashboard`, assinado por todo navegador
+autenticado, ou para o grupo pessoal `user_<id>` (notificações do sistema).
+Cada envio é um único group_send com a lista de itens do lote: uma
+tempestade de alertas vira uma mensagem por ciclo, e não uma por alerta.
+
+Tipos de evento enviados ao navegador:
+- `alerts.created`: alertas novos
+- `alerts.updated`: mudanças de status (reconhecido, resolvido...)
+- `printers.updated`: deltas de estado das impressoras (status, suprimentos)
+- `notification`: notificação do sistema para o usuário
+"""
+import logging
+from typing import Dict, Iterable, List
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_GROUP = 'dashboard'
+USER_GROUP = 'user_{user_id}'
+
+
+def _layer():
+    from channels.layers import get_channel_layer
+    return get_channel_layer()
+
+
+def publish(group: str, event: str, payload) -> bool:
+    """Enviar um evento ao grupo; retorna False se não houver camada de canais"""
+    layer = _layer()
+    if layer is None:
+        return False
+
+    try:
+        async_to_sync(layer.group_send)(group, {
+            'type': 'realtime.event',
+            'event': event,
+            'payload': payload,
+        })
+        return True
+    except Exception as e:
+        logger.error(f"Error publishing realtime event {event}: {e}")
+        return False
+
+
+def publish_on_commit(group: str, event: str, payload):
+    """Publicar após o commit da transação corrente (ou já, fora de uma)"""
+    transaction.on_commit(lambda: publish(group, event, payload))
+
+
+def alert_payload(alert) -> Dict:
+    return {
+        'id': alert.id,
+        'rule': alert.rule_id,
+        'printer': alert.printer_id,
+        'title': alert.title,
+        'status': alert.status,
+        'severity': alert.severity,
+        'is_incident': alert.is_incident,
+        'parent': alert.parent_id,
+        'created_at': alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
+def alerts_created(alerts: Iterable):
+    """Anunciar alertas criados (filhos de incidentes seguem no item do incidente)"""
+    items = [alert_payload(alert) for alert in alerts if alert.parent_id is None]
+    if items:
+        publish_on_commit(DASHBOARD_GROUP, 'alerts.created', items)
+
+
+def alerts_updated(alerts: Iterable):
+    items = [
+        {'id': alert.id, 'status': alert.status, 'parent': alert.parent_id}
+        for alert in alerts
+    ]
+    if items:
+        publish_on_commit(DASHBOARD_GROUP, 'alerts.updated', items)
+
+
+def alerts_status_changed(alert_ids: Iterable[int], status: str):
+    """Anunciar a mesma mudança de status para vários alertas (ações em lote)"""
+    items = [{'id': alert_id, 'status': status} for alert_id in alert_ids]
+    if items:
+        publish_on_commit(DASHBOARD_GROUP, 'alerts.updated', items)
+
+
+def printers_updated(deltas: List[Dict]):
+    """Anunciar deltas de impressoras: dicionários com `id` e os campos alterados"""
+    if deltas:
+        publish_on_commit(DASHBOARD_GROUP, 'printers.updated', deltas)
+
+
+def notify_user(user_id: int, payload: Dict) -> bool:
+    return publish(USER_GROUP.format(user_id=user_id), 'notification', payload)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import RealtimeConsumer
+
+websocket_urlpatterns = [
+    path('ws/notifications/', RealtimeConsumer.as_asgi()),
+]
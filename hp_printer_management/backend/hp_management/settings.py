@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -16,6 +17,7 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lamb
 
 # Application definition
 INSTALLED_APPS = [
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
     'django_auth_ldap',
     'django_celery_beat',
     'django_celery_results',
+    'channels',
     
     # Local apps
     'printers',
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hp_management.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'oauth2_provider.middleware.OAuth2TokenMiddleware',
@@ -61,7 +65,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -69,11 +72,29 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates compilados uma vez por processo (emails de alerta inclusive)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'hp_management.wsgi.application'
+ASGI_APPLICATION = 'hp_management.asgi.application'
+
+# Channels: eventos em tempo real (WebSocket) distribuídos via Redis pub/sub
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': [config('CHANNEL_LAYER_URL', default='redis://localhost:6379/2')],
+        },
+    },
+}
 
 # Database
 DATABASES = {
@@ -157,9 +178,83 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Sao_Paulo'
 
+# Entrega de notificações: uma fila por canal, com concorrência definida pelo
+# worker que a consome (limites de taxa em ALERT_NOTIFICATION_RATE_LIMITS)
+CELERY_TASK_ROUTES = {
+    'monitoring.tasks.send_email_notifications': {'queue': 'notifications.email'},
+    'monitoring.tasks.send_sms_notifications': {'queue': 'notifications.sms'},
+    'monitoring.tasks.send_system_notifications': {'queue': 'notifications.system'},
+    'monitoring.tasks.send_webhook_notifications': {'queue': 'notifications.webhook'},
+}
+
 # Celery Beat Configuration
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Cache: índice de regras, snapshots de ingestão e contadores dos alertas,
+# compartilhado entre a API e os workers. Obrigatório fora do DEBUG; em
+# desenvolvimento, sem CACHE_URL, cache local de cada processo (alerts.W001)
+CACHE_URL = config('CACHE_URL', default='')
+if not CACHE_URL and not DEBUG:
+    raise ImproperlyConfigured('CACHE_URL é obrigatório com DEBUG=False (ex.: redis://localhost:6379/1)')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'hp',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'hp',
+        }
+    }
+
+# Retenção (dias) de status, atividades, alertas resolvidos e notificações
+# (cleanup_old_data); o rollup diário de alertas só é recalculado dentro dela
+DATA_RETENTION_DAYS = config('DATA_RETENTION_DAYS', default=90, cast=int)
+
+# Alertas
+# Avaliar as regras na ingestão de status/suprimentos; a tarefa periódica
+# check_alert_rules passa a cobrir apenas manutenção, regras alteradas e a
+# varredura periódica de segurança (s) de cada regra
+ALERT_STREAMING_EVALUATION = config('ALERT_STREAMING_EVALUATION', default=True, cast=bool)
+ALERT_STREAMING_FULL_SCAN_INTERVAL = config('ALERT_STREAMING_FULL_SCAN_INTERVAL', default=900, cast=int)
+ALERT_SNAPSHOT_TTL = config('ALERT_SNAPSHOT_TTL', default=86400, cast=int)
+# Estatísticas do dashboard em cache (s); as de alertas são invalidadas a cada mudança de estado
+ALERT_STATISTICS_TTL = config('ALERT_STATISTICS_TTL', default=30, cast=int)
+# Operações em lote por filtro: alertas por UPDATE
+ALERT_BULK_CHUNK_SIZE = config('ALERT_BULK_CHUNK_SIZE', default=1000, cast=int)
+# Correlação: alertas simultâneos do mesmo tipo em uma sub-rede, departamento ou
+# localização são agrupados em um incidente (só o incidente é notificado)
+ALERT_CORRELATION_ENABLED = config('ALERT_CORRELATION_ENABLED', default=True, cast=bool)
+ALERT_CORRELATION_MIN_SIZE = config('ALERT_CORRELATION_MIN_SIZE', default=5, cast=int)
+ALERT_CORRELATION_SUBNET_PREFIX = config('ALERT_CORRELATION_SUBNET_PREFIX', default=24, cast=int)
+ALERT_CORRELATION_KEYS = ['subnet', 'department', 'location']
+ALERT_CORRELATION_TRIGGERS = ['printer_offline', 'error_code']
+# Escalonamento: alertas sem reconhecimento sobem de nível após after_minutes
+# (contados da criação ou do nível anterior); cada nível notifica os perfis
+# indicados pelos canais indicados. Agendado em um sorted set do Redis
+ALERT_ESCALATION_ENABLED = config('ALERT_ESCALATION_ENABLED', default=True, cast=bool)
+ALERT_ESCALATION_REDIS_URL = config('ALERT_ESCALATION_REDIS_URL', default='')
+ALERT_ESCALATION_BATCH_SIZE = config('ALERT_ESCALATION_BATCH_SIZE', default=500, cast=int)
+ALERT_ESCALATION_LEASE_SECONDS = config('ALERT_ESCALATION_LEASE_SECONDS', default=300, cast=int)
+ALERT_ESCALATION_TIERS = {
+    'critical': [
+        {'after_minutes': 15, 'roles': ['technician', 'admin'], 'channels': ['email', 'sms', 'system']},
+        {'after_minutes': 30, 'roles': ['admin'], 'channels': ['email', 'sms', 'system']},
+    ],
+    'high': [
+        {'after_minutes': 60, 'roles': ['technician', 'admin'], 'channels': ['email', 'system']},
+        {'after_minutes': 120, 'roles': ['admin'], 'channels': ['email', 'system']},
+    ],
+    'medium': [
+        {'after_minutes': 240, 'roles': ['admin'], 'channels': ['email', 'system']},
+    ],
+}
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -168,12 +263,58 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@hpprinters.com')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+
+# Envio de alertas por email: vida útil (s) da conexão SMTP reaproveitada
+ALERT_EMAIL_CONNECTION_LIFETIME = config('ALERT_EMAIL_CONNECTION_LIFETIME', default=300, cast=int)
+
+# Reserva de notificações pelos workers de cada canal
+ALERT_NOTIFICATION_BATCH_SIZE = config('ALERT_NOTIFICATION_BATCH_SIZE', default=100, cast=int)
+ALERT_NOTIFICATION_LEASE_SECONDS = config('ALERT_NOTIFICATION_LEASE_SECONDS', default=300, cast=int)
+ALERT_NOTIFICATION_DRAIN_SECONDS = config('ALERT_NOTIFICATION_DRAIN_SECONDS', default=50, cast=int)
+ALERT_NOTIFICATION_MAX_PARALLEL = config('ALERT_NOTIFICATION_MAX_PARALLEL', default=4, cast=int)
+# Digest: notificações de um destinatário dentro da janela (s) saem em um único
+# resumo por canal (email e SMS); 0 desativa
+ALERT_NOTIFICATION_DIGEST_WINDOW = config('ALERT_NOTIFICATION_DIGEST_WINDOW', default=120, cast=int)
+ALERT_NOTIFICATION_DIGEST_MIN_SIZE = config('ALERT_NOTIFICATION_DIGEST_MIN_SIZE', default=2, cast=int)
+ALERT_NOTIFICATION_DIGEST_CHANNELS = ['email', 'sms']
+# Severidades que nunca ficam retidas na janela de digest
+ALERT_NOTIFICATION_DIGEST_BYPASS_SEVERITIES = ['critical']
+# Backoff das novas tentativas por canal: (atraso base, atraso máximo) em segundos
+ALERT_NOTIFICATION_RETRY_BACKOFF = {
+    'email': (60, 3600),
+    'sms': (120, 3600),
+    'system': (30, 600),
+    'webhook': (30, 1800),
+}
+# Limites de taxa (token bucket no Redis): (envios por minuto, rajada) por canal
+# e por destinatário; um envio sem ficha é adiado, não conta como falha
+ALERT_NOTIFICATION_RATE_LIMITS = {
+    'email': {'channel': (600, 100), 'recipient': (20, 10)},
+    'sms': {'channel': (60, 10), 'recipient': (4, 2)},
+    'webhook': {'channel': (1200, 200)},
+}
+ALERT_RATE_LIMIT_REDIS_URL = config('ALERT_RATE_LIMIT_REDIS_URL', default='')
+
+# Webhooks de alerta (assinados com HMAC-SHA256 quando ALERT_WEBHOOK_SECRET definido)
+ALERT_WEBHOOK_URL = config('ALERT_WEBHOOK_URL', default='')
+ALERT_WEBHOOK_SECRET = config('ALERT_WEBHOOK_SECRET', default='')
+ALERT_WEBHOOK_CONNECT_TIMEOUT = config('ALERT_WEBHOOK_CONNECT_TIMEOUT', default=2.0, cast=float)
+ALERT_WEBHOOK_TIMEOUT = config('ALERT_WEBHOOK_TIMEOUT', default=10.0, cast=float)
+ALERT_WEBHOOK_MAX_PER_HOST = config('ALERT_WEBHOOK_MAX_PER_HOST', default=4, cast=int)
 
 # LDAP Configuration (optional)
 AUTH_LDAP_SERVER_URI = config('AUTH_LDAP_SERVER_URI', default='')
 AUTH_LDAP_BIND_DN = config('AUTH_LDAP_BIND_DN', default='')
 AUTH_LDAP_BIND_PASSWORD = config('AUTH_LDAP_BIND_PASSWORD', default='')
 
+# Métricas Prometheus (endpoint /metrics)
+# Para gunicorn/Celery prefork defina a variável de ambiente PROMETHEUS_MULTIPROC_DIR
+METRICS_PER_PRINTER_LABELS = config('METRICS_PER_PRINTER_LABELS', default=False, cast=bool)
+# Acesso ao /metrics: endereços/redes permitidos e token Bearer opcional
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # Logging
 LOGGING = {
     'version': 1,
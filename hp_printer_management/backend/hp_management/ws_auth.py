@@ -0,0 +1,42 @@
+"""Autenticação das conexões WebSocket
+
+Navegadores não enviam o cabeçalho Authorization no handshake WebSocket; o
+token OAuth2 do frontend vai no parâmetro `token` da URL. Sem token, vale a
+sessão do Django (AuthMiddlewareStack).
+"""
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+
+
+@database_sync_to_async
+def user_for_token(token: str):
+    from oauth2_provider.models import get_access_token_model
+    
+    access_token = get_access_token_model().objects.select_related('user').filter(
+        token=token,
+        expires__gt=timezone.now()
+    ).first()
+    if access_token is None or access_token.user is None or not access_token.user.is_active:
+        return AnonymousUser()
+    return access_token.user
+
+
+class TokenAuthMiddleware:
+    """Preencher scope['user'] a partir do parâmetro `token` da query string"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+        if token:
+            scope = dict(scope, user=await user_for_token(token))
+        return await self.app(scope, receive, send)
+
+
+def TokenAuthMiddlewareStack(app):
+    return AuthMiddlewareStack(TokenAuthMiddleware(app))
@@ -1,95 +1,169 @@
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
+from django.db import models
 from django.db.models import Q
 from datetime import timedelta
 import logging
+import time
+
+from hp_management import metrics
 
 logger = logging.getLogger(__name__)
 
 
 @shared_task
-def monitor_printer_status():
-    """Tarefa para monitorar status de todas as impressoras"""
+def monitor_printer_status(printer_ids=None, collect_timings=False):
+    """Tarefa para monitorar status de todas as impressoras
+    
+    `printer_ids` restringe a execução a um subconjunto (sharding entre
+    workers); `collect_timings` inclui no resultado o tempo de cada impressora.
+    """
     from printers.models import Printer
     from printers.services import SNMPService
     from monitoring.models import PrinterStatus
+    from alerts import streaming
+    from hp_management import realtime
     
+    cycle_started_at = time.perf_counter()
     monitored_count = 0
     error_count = 0
+    timings = []
+    deltas = []
     
-    for printer in Printer.objects.filter(is_monitored=True):
-        try:
-            snmp_service = SNMPService(printer.ip_address, printer.snmp_community)
-            
-            # Testar conexão
-            is_online = snmp_service.test_connection()
-            
-            # Obter status detalhado se online
-            if is_online:
-                printer_status = snmp_service.get_printer_status()
-                paper_status = snmp_service.get_paper_status()
+    printers = Printer.objects.filter(is_monitored=True)
+    if printer_ids is not None:
+        printers = printers.filter(id__in=printer_ids)
+    printers = list(printers)
+    
+    # Testar conexão de todas as impressoras em uma única varredura
+    liveness = SNMPService.test_connections([
+        (printer.ip_address, printer.snmp_port, printer.snmp_community)
+        for printer in printers
+    ])
+    
+    # Alertas do ciclo criados em lote ao final, correlacionando falhas simultâneas
+    with streaming.batched():
+        for printer in printers:
+            started_at = time.perf_counter()
+            try:
+                snmp_service = SNMPService(printer.ip_address, printer.snmp_community, printer.snmp_port)
+                previous_status = printer.status
                 
-                # Criar registro de status
-                PrinterStatus.objects.create(
-                    printer=printer,
-                    is_online=True,
-                    paper_status=paper_status.get('status', 'unknown'),
-                    paper_level=paper_status.get('percentage', 0),
-                    queue_size=printer.print_jobs.filter(
-                        status__in=['pending', 'printing']
-                    ).count(),
-                    total_pages_printed=printer.print_jobs.filter(
-                        status='completed'
-                    ).aggregate(total=models.Sum('pages'))['total'] or 0,
-                )
+                is_online = liveness.get((printer.ip_address, printer.snmp_port), False)
                 
-                # Atualizar última conexão
-                printer.last_seen = timezone.now()
-                if printer.status == 'offline':
-                    printer.status = 'active'
-                printer.save()
+                # Obter status detalhado se online
+                if is_online:
+                    printer_status = snmp_service.get_printer_status()
+                    paper_status = snmp_service.get_paper_status()
+                    
+                    # Criar registro de status
+                    status_record = PrinterStatus.objects.create(
+                        printer=printer,
+                        is_online=True,
+                        paper_status=paper_status.get('status', 'unknown'),
+                        paper_level=paper_status.get('percentage', 0),
+                        queue_size=printer.print_jobs.filter(
+                            status__in=['pending', 'printing']
+                        ).count(),
+                        total_pages_printed=printer.print_jobs.filter(
+                            status='completed'
+                        ).aggregate(total=models.Sum('pages'))['total'] or 0,
+                    )
+                    metrics.ROWS_INGESTED.labels(table='printer_status').inc()
+                    
+                    # Atualizar última conexão
+                    printer.last_seen = timezone.now()
+                    if printer.status == 'offline':
+                        printer.status = 'active'
+                    printer.save()
+                    
+                else:
+                    # Impressora offline
+                    status_record = PrinterStatus.objects.create(
+                        printer=printer,
+                        is_online=False,
+                        paper_status='unknown',
+                        paper_level=0,
+                        queue_size=0
+                    )
+                    metrics.ROWS_INGESTED.labels(table='printer_status').inc()
+                    
+                    # Atualizar status se necessário
+                    if printer.status != 'offline':
+                        printer.status = 'offline'
+                        printer.save()
                 
-            else:
-                # Impressora offline
-                PrinterStatus.objects.create(
-                    printer=printer,
-                    is_online=False,
-                    paper_status='unknown',
-                    paper_level=0,
-                    queue_size=0
+                if printer.status != previous_status:
+                    deltas.append({
+                        'id': printer.pk,
+                        'status': printer.status,
+                        'is_online': is_online,
+                        'last_seen': printer.last_seen.isoformat() if printer.last_seen else None,
+                    })
+                
+                # Avaliar as regras afetadas pelas mudanças deste snapshot
+                streaming.on_snapshot(
+                    printer,
+                    status=printer.status,
+                    paper_status=status_record.paper_status,
+                    error_code=status_record.error_code,
+                    temperature=status_record.temperature,
+                    queue_size=status_record.queue_size,
                 )
                 
-                # Atualizar status se necessário
-                if printer.status != 'offline':
-                    printer.status = 'offline'
-                    printer.save()
-            
-            monitored_count += 1
+                monitored_count += 1
+                
+            except Exception as e:
+                logger.error(f"Error monitoring printer {printer.name}: {e}")
+                error_count += 1
             
-        except Exception as e:
-            logger.error(f"Error monitoring printer {printer.name}: {e}")
-            error_count += 1
+            if collect_timings:
+                timings.append(time.perf_counter() - started_at)
+    
+    # Mudanças de estado do ciclo publicadas em uma única mensagem
+    realtime.printers_updated(deltas)
     
+    metrics.POLL_CYCLE_DURATION.labels(task='monitor_printer_status').observe(
+        time.perf_counter() - cycle_started_at
+    )
     logger.info(f"Monitoring completed: {monitored_count} printers monitored, {error_count} errors")
-    return {
+    result = {
         'monitored_count': monitored_count,
         'error_count': error_count
     }
+    if collect_timings:
+        result['timings'] = timings
+    return result
 
 
 @shared_task
-def update_printer_supplies():
-    """Tarefa para atualizar suprimentos das impressoras"""
+def update_printer_supplies(printer_ids=None, collect_timings=False):
+    """Tarefa para atualizar suprimentos das impressoras
+    
+    Aceita os mesmos parâmetros de `monitor_printer_status`.
+    """
     from printers.models import Printer, PrinterSupplies
     from printers.services import SNMPService
+    from alerts import streaming
+    from hp_management import realtime
     
+    cycle_started_at = time.perf_counter()
     updated_count = 0
     error_count = 0
+    timings = []
+    deltas = []
     
-    for printer in Printer.objects.filter(is_monitored=True, status='active'):
+    printers = Printer.objects.filter(is_monitored=True, status='active')
+    if printer_ids is not None:
+        printers = printers.filter(id__in=printer_ids)
+    
+    for printer in printers:
+        started_at = time.perf_counter()
         try:
-            snmp_service = SNMPService(printer.ip_address, printer.snmp_community)
+            snmp_service = SNMPService(printer.ip_address, printer.snmp_community, printer.snmp_port)
             supplies_data = snmp_service.get_supplies_status()
+            changed_levels = {}
             
             for supply_type, data in supplies_data.items():
                 supply, created = PrinterSupplies.objects.get_or_create(
@@ -103,55 +177,92 @@ def update_printer_supplies():
                     }
                 )
                 
+                if created or supply.level != data.get('level', supply.level):
+                    changed_levels[supply_type] = data.get('level', supply.level)
+                
                 if not created:
                     supply.level = data.get('level', supply.level)
                     supply.current_capacity = data.get('current_capacity', supply.current_capacity)
                     supply.status = data.get('status', supply.status)
                     supply.save()
             
+            metrics.ROWS_INGESTED.labels(table='printer_supplies').inc(len(supplies_data))
+            
+            if changed_levels:
+                deltas.append({'id': printer.pk, 'toner_levels': changed_levels})
+            
+            if supplies_data:
+                streaming.on_snapshot(printer, supply_levels={
+                    supply_type: data.get('level', 0) for supply_type, data in supplies_data.items()
+                })
             updated_count += 1
             
         except Exception as e:
             logger.error(f"Error updating supplies for {printer.name}: {e}")
             error_count += 1
+        
+        if collect_timings:
+            timings.append(time.perf_counter() - started_at)
+    
+    realtime.printers_updated(deltas)
     
+    metrics.POLL_CYCLE_DURATION.labels(task='update_printer_supplies').observe(
+        time.perf_counter() - cycle_started_at
+    )
     logger.info(f"Supplies update completed: {updated_count} printers updated, {error_count} errors")
-    return {
+    result = {
         'updated_count': updated_count,
         'error_count': error_count
     }
+    if collect_timings:
+        result['timings'] = timings
+    return result
 
 
 @shared_task
 def check_alert_rules():
     """Tarefa para verificar regras de alertas"""
-    from alerts.models import AlertRule, Alert
+    from alerts.models import AlertRule
     from alerts.services import AlertService
+    from alerts import streaming
     
     alert_service = AlertService()
     alerts_generated = 0
+    streaming_enabled = streaming.streaming_enabled()
     
-    for rule in AlertRule.objects.filter(is_active=True):
-        try:
-            # Verificar se a regra foi disparada recentemente (cooldown)
-            recent_alerts = Alert.objects.filter(
-                rule=rule,
-                created_at__gte=timezone.now() - timedelta(minutes=rule.cooldown_minutes)
-            )
-            
-            if recent_alerts.exists():
-                continue  # Skip se ainda em cooldown
-            
-            # Verificar condições da regra
-            triggered_printers = alert_service.check_rule_conditions(rule)
-            
-            for printer in triggered_printers:
-                alert = alert_service.create_alert(rule, printer)
-                if alert:
-                    alerts_generated += 1
+    rules_to_check = []
+    for rule in AlertRule.objects.filter(is_active=True).prefetch_related('printers'):
+        # Com avaliação na ingestão, varrer só manutenção, regras novas ou alteradas
+        # e as que vencem a varredura periódica
+        if streaming_enabled and not streaming.needs_full_evaluation(rule):
+            continue
         
+        rules_to_check.append(rule)
+    
+    # Verificar condições de todas as regras sobre o mesmo estado da frota
+    try:
+        triggered_by_rule = alert_service.check_rules(rules_to_check)
+    except Exception as e:
+        logger.error(f"Error evaluating alert rules in batch, checking one by one: {e}")
+        triggered_by_rule = {}
+        for rule in rules_to_check:
+            try:
+                with metrics.ALERT_RULE_EVALUATION.labels(trigger_type=rule.trigger_type).time():
+                    triggered_by_rule[rule] = alert_service.check_rule_conditions(rule)
+            except Exception as e:
+                logger.error(f"Error checking alert rule {rule.name}: {e}")
+    
+    for rule, triggered_printers in triggered_by_rule.items():
+        try:
+            # Cooldown por (regra, impressora), consultado em lote
+            triggered_printers = alert_service.exclude_in_cooldown(rule, triggered_printers)
+            alerts_generated += len(alert_service.create_alerts(rule, triggered_printers))
         except Exception as e:
-            logger.error(f"Error checking alert rule {rule.name}: {e}")
+            logger.error(f"Error creating alerts for rule {rule.name}: {e}")
+            continue
+        
+        if streaming_enabled:
+            streaming.mark_evaluated(rule)
     
     logger.info(f"Alert check completed: {alerts_generated} alerts generated")
     return {
@@ -161,47 +272,124 @@ def check_alert_rules():
 
 @shared_task
 def process_alert_notifications():
-    """Tarefa para processar notificações de alertas pendentes"""
-    from alerts.models import NotificationLog
-    from alerts.services import NotificationService
+    """Tarefa para distribuir as notificações pendentes entre as filas de cada canal
     
-    notification_service = NotificationService()
-    processed_count = 0
+    Cada canal tem a própria tarefa e fila (notifications.<canal>); para
+    backlogs grandes são enfileiradas várias drenagens do mesmo canal, que
+    reservam lotes distintos com SKIP LOCKED, até o limite de drenagens em
+    andamento por canal (as de ciclos anteriores contam). Também atualiza as
+    métricas de profundidade e idade da fila por severidade.
+    """
+    from alerts import dispatch
     
-    # Buscar notificações pendentes
-    pending_notifications = NotificationLog.objects.filter(
-        status='pending',
-        attempts__lt=models.F('max_attempts')
-    )
+    dispatch.record_queue_metrics()
+    backlog = dispatch.backlog()
+    enqueued = {}
     
-    for notification in pending_notifications:
-        try:
-            success = notification_service.send_notification(notification)
-            if success:
-                notification.status = 'sent'
-                notification.sent_at = timezone.now()
-            else:
-                notification.attempts += 1
-                if notification.attempts >= notification.max_attempts:
-                    notification.status = 'failed'
-            
-            notification.save()
-            processed_count += 1
-            
-        except Exception as e:
-            logger.error(f"Error processing notification {notification.id}: {e}")
-            notification.attempts += 1
-            notification.error_message = str(e)
-            if notification.attempts >= notification.max_attempts:
-                notification.status = 'failed'
-            notification.save()
-    
-    logger.info(f"Notification processing completed: {processed_count} notifications processed")
+    for channel, pending in backlog.items():
+        task = CHANNEL_TASKS.get(channel)
+        if task is None or not pending:
+            continue
+        
+        slots = dispatch.acquire_drain_slots(channel, -(-pending // dispatch.batch_size()))
+        for slot in slots:
+            task.apply_async(kwargs={'slot': slot}, queue=dispatch.queue_name(channel))
+        enqueued[channel] = len(slots)
+    
+    logger.info(f"Notification processing dispatched: backlog={backlog} tasks={enqueued}")
     return {
-        'processed_count': processed_count
+        'backlog': backlog,
+        'enqueued': enqueued
     }
 
 
+@shared_task
+def process_escalations():
+    """Tarefa para escalar os alertas não reconhecidos cujo prazo venceu
+    
+    Lê apenas os vencidos no sorted set do Redis (ver alerts.escalation);
+    agendar a cada minuto no Celery Beat.
+    """
+    from redis import RedisError
+    from alerts import escalation
+    
+    if not escalation.escalation_enabled():
+        return {'escalated': 0, 'notifications': 0}
+    
+    try:
+        result = escalation.escalate_due()
+    except (RedisError, ValueError) as e:
+        logger.error(f"Alert escalation unavailable: {e}")
+        return {'escalated': 0, 'notifications': 0}
+    
+    # Entregar as notificações do escalonamento sem esperar o próximo ciclo
+    if result['notifications']:
+        process_alert_notifications.delay()
+    
+    return result
+
+
+def _drain_channel(task, channel, slot=None):
+    """Drenar a fila de um canal; reagenda a tarefa se o tempo acabar antes
+    
+    A vaga de drenagem (`slot`) passa para a tarefa reagendada ou é liberada.
+    """
+    from alerts import dispatch
+    
+    try:
+        result = dispatch.drain(channel)
+    except Exception:
+        if slot is not None:
+            dispatch.release_drain_slot(channel, slot)
+        raise
+    
+    if result['has_more']:
+        # Tempo esgotado, ou balde do canal vazio: retomar quando houver ficha
+        countdown = result.get('retry_in')
+        if slot is not None:
+            dispatch.hold_drain_slot(channel, slot, countdown or 0)
+        task.apply_async(kwargs={'slot': slot}, queue=dispatch.queue_name(channel), countdown=countdown)
+    elif slot is not None:
+        dispatch.release_drain_slot(channel, slot)
+    
+    logger.info(
+        f"{channel} notifications processed: {result['sent']} sent, {result['failed']} failed"
+    )
+    return result
+
+
+@shared_task(bind=True)
+def send_email_notifications(self, slot=None):
+    """Tarefa para enviar as notificações por email (fila notifications.email)"""
+    return _drain_channel(self, 'email', slot)
+
+
+@shared_task(bind=True)
+def send_sms_notifications(self, slot=None):
+    """Tarefa para enviar as notificações por SMS (fila notifications.sms)"""
+    return _drain_channel(self, 'sms', slot)
+
+
+@shared_task(bind=True)
+def send_system_notifications(self, slot=None):
+    """Tarefa para criar as notificações do sistema (fila notifications.system)"""
+    return _drain_channel(self, 'system', slot)
+
+
+@shared_task(bind=True)
+def send_webhook_notifications(self, slot=None):
+    """Tarefa para enviar os webhooks (fila notifications.webhook)"""
+    return _drain_channel(self, 'webhook', slot)
+
+
+CHANNEL_TASKS = {
+    'email': send_email_notifications,
+    'sms': send_sms_notifications,
+    'system': send_system_notifications,
+    'webhook': send_webhook_notifications,
+}
+
+
 @shared_task
 def generate_scheduled_reports():
     """Tarefa para gerar relatórios agendados"""
@@ -249,7 +437,7 @@ def cleanup_old_data():
     from users.models import UserActivity
     from alerts.models import Alert, NotificationLog
     
-    cutoff_date = timezone.now() - timedelta(days=90)  # Manter 90 dias
+    cutoff_date = timezone.now() - timedelta(days=settings.DATA_RETENTION_DAYS)
     
     # Limpar status antigos
     old_status_count = PrinterStatus.objects.filter(
@@ -272,6 +460,9 @@ def cleanup_old_data():
         status='resolved',
         resolved_at__lt=cutoff_date
     ).delete()
+    if old_alerts_count:
+        from alerts import stats
+        stats.invalidate()
     
     # Limpar logs de notificação antigos
     old_notifications_count = NotificationLog.objects.filter(
@@ -290,6 +481,40 @@ def cleanup_old_data():
     }
 
 
+@shared_task(bind=True)
+def bulk_update_alerts(self, action, filters, user_id, resolution_notes='', ip_address=None):
+    """Tarefa para reconhecer, resolver ou fechar os alertas de um filtro
+    
+    O progresso (processados/total) é publicado no estado da tarefa e
+    consultado em GET /alerts/bulk/<task_id>/.
+    """
+    from alerts import bulk
+    
+    def progress(done, total):
+        self.update_state(state='PROGRESS', meta={'done': done, 'total': total})
+    
+    result = bulk.run(action, filters, user_id, resolution_notes, progress=progress)
+    bulk.record_activity(action, filters, result['updated'], user_id, ip_address)
+    
+    logger.info(f"Bulk {action} of alerts completed: {result['updated']} of {result['total']} updated")
+    return result
+
+
+@shared_task
+def rebuild_alert_daily_counts(days=None):
+    """Tarefa para recalcular o rollup diário de alertas (carga inicial ou correção)"""
+    from alerts import rollup, stats
+    
+    days = rollup.rebuild_days(days)
+    rows = rollup.rebuild(days)
+    stats.invalidate()
+    
+    logger.info(f"Alert daily counts rebuilt: {rows} rows over {days} days")
+    return {
+        'rows': rows
+    }
+
+
 @shared_task
 def calculate_consumption_summaries():
     """Tarefa para calcular resumos de consumo periódicos"""
@@ -0,0 +1,155 @@
+"""Codificação BER mínima para mensagens SNMPv1/v2c.
+
+Cobre apenas o subconjunto de ASN.1 usado pelas mensagens SNMP com
+community (INTEGER, OCTET STRING, NULL, OBJECT IDENTIFIER, SEQUENCE e PDUs),
+sem depender do pysnmp. Usado nos caminhos quentes onde a pilha hlapi
+completa é cara demais.
+"""
+from typing import Tuple
+
+# Tags ASN.1 universais
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+
+# Tags de aplicação SNMP (SMIv2)
+TAG_IP_ADDRESS = 0x40
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_OPAQUE = 0x44
+TAG_COUNTER64 = 0x46
+
+# Exceções de varBind do SNMPv2c
+TAG_NO_SUCH_OBJECT = 0x80
+TAG_NO_SUCH_INSTANCE = 0x81
+TAG_END_OF_MIB_VIEW = 0x82
+
+# Tags de PDU SNMP (context-specific, construídas)
+PDU_GET_REQUEST = 0xA0
+PDU_GET_NEXT_REQUEST = 0xA1
+PDU_GET_RESPONSE = 0xA2
+PDU_SET_REQUEST = 0xA3
+PDU_GET_BULK_REQUEST = 0xA5
+
+# Versões do protocolo
+SNMP_V1 = 0
+SNMP_V2C = 1
+
+# error-status
+ERROR_NO_ERROR = 0
+ERROR_TOO_BIG = 1
+ERROR_NO_SUCH_NAME = 2
+ERROR_GEN_ERR = 5
+
+
+class BERDecodeError(ValueError):
+    """Mensagem BER malformada ou truncada"""
+
+
+def encode_length(length: int) -> bytes:
+    """Codificar comprimento no formato curto ou longo"""
+    if length < 0x80:
+        return bytes((length,))
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(encoded),)) + encoded
+
+
+def encode_tlv(tag: int, value: bytes) -> bytes:
+    """Codificar um elemento tag-length-value"""
+    return bytes((tag,)) + encode_length(len(value)) + value
+
+
+def encode_integer(value: int, tag: int = TAG_INTEGER) -> bytes:
+    """Codificar INTEGER em complemento de dois com o menor número de octetos"""
+    length = max(1, (value.bit_length() + 8) // 8)
+    return encode_tlv(tag, value.to_bytes(length, 'big', signed=True))
+
+
+def encode_unsigned(value: int, tag: int) -> bytes:
+    """Codificar inteiros sem sinal (Counter32, Gauge32, TimeTicks)"""
+    length = max(1, (value.bit_length() + 8) // 8)
+    return encode_tlv(tag, value.to_bytes(length, 'big', signed=False))
+
+
+def encode_octet_string(value: bytes) -> bytes:
+    return encode_tlv(TAG_OCTET_STRING, value)
+
+
+def encode_null() -> bytes:
+    return b'\x05\x00'
+
+
+def encode_oid(oid: str) -> bytes:
+    """Codificar OBJECT IDENTIFIER a partir da notação com pontos"""
+    arcs = [int(arc) for arc in oid.strip('.').split('.')]
+    if len(arcs) < 2:
+        raise ValueError(f"OID inválido: {oid}")
+
+    body = bytearray((arcs[0] * 40 + arcs[1],))
+    for arc in arcs[2:]:
+        chunk = bytearray((arc & 0x7F,))
+        arc >>= 7
+        while arc:
+            chunk.insert(0, 0x80 | (arc & 0x7F))
+            arc >>= 7
+        body.extend(chunk)
+
+    return encode_tlv(TAG_OID, bytes(body))
+
+
+def encode_sequence(*items: bytes, tag: int = TAG_SEQUENCE) -> bytes:
+    return encode_tlv(tag, b''.join(items))
+
+
+def decode_tlv(data: bytes, offset: int = 0) -> Tuple[int, int, int]:
+    """Ler um elemento TLV
+
+    Retorna (tag, início do valor, fim do valor).
+    """
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+
+        if length & 0x80:
+            num_octets = length & 0x7F
+            if not num_octets or num_octets > 4:
+                raise BERDecodeError("Comprimento BER não suportado")
+            length = int.from_bytes(data[offset:offset + num_octets], 'big')
+            offset += num_octets
+    except IndexError:
+        raise BERDecodeError("Mensagem truncada")
+
+    end = offset + length
+    if end > len(data):
+        raise BERDecodeError("Mensagem truncada")
+
+    return tag, offset, end
+
+
+def decode_integer(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], 'big', signed=True)
+
+
+def decode_unsigned(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], 'big', signed=False)
+
+
+def decode_oid(data: bytes, start: int, end: int) -> str:
+    """Decodificar OBJECT IDENTIFIER para a notação com pontos"""
+    if start >= end:
+        raise BERDecodeError("OID vazio")
+
+    first = data[start]
+    arcs = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+    value = 0
+    for octet in data[start + 1:end]:
+        value = (value << 7) | (octet & 0x7F)
+        if not octet & 0x80:
+            arcs.append(value)
+            value = 0
+
+    return '.'.join(str(arc) for arc in arcs)
@@ -0,0 +1,225 @@
+import logging
+import random
+import select
+import selectors
+import socket
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from .ber import (
+    BERDecodeError, PDU_GET_REQUEST, PDU_GET_RESPONSE, SNMP_V2C, TAG_INTEGER,
+    decode_integer, decode_tlv, encode_integer, encode_null, encode_octet_string,
+    encode_oid, encode_sequence, encode_tlv,
+)
+
+logger = logging.getLogger(__name__)
+
+# sysDescr.0 - respondido por qualquer agente SNMP
+SYS_DESCR_OID = '1.3.6.1.2.1.1.1.0'
+
+# Request-ids ficam nesta faixa para que o INTEGER ocupe sempre 4 octetos
+# e possa ser sobrescrito diretamente no pacote pré-codificado
+REQUEST_ID_MIN = 0x01000000
+REQUEST_ID_MAX = 0x7FFFFFFF
+
+Target = Tuple[str, int, str]
+
+
+@lru_cache(maxsize=256)
+def _get_request_template(community: str, version: int, oid: str) -> Tuple[bytes, int]:
+    """Pré-codificar o GET de uma community
+
+    Retorna o pacote e o offset dos 4 octetos do request-id.
+    """
+    pdu_body = (
+        encode_integer(REQUEST_ID_MIN)
+        + encode_integer(0)  # error-status
+        + encode_integer(0)  # error-index
+        + encode_sequence(encode_sequence(encode_oid(oid), encode_null()))
+    )
+    message = encode_sequence(
+        encode_integer(version),
+        encode_octet_string(community.encode('utf-8')),
+        encode_tlv(PDU_GET_REQUEST, pdu_body),
+    )
+    # O request-id é o primeiro elemento do corpo da PDU (tag + comprimento = 2 octetos)
+    return message, len(message) - len(pdu_body) + 2
+
+
+def parse_response_header(data: bytes) -> Tuple[int, int]:
+    """Extrair (request-id, error-status) de um GetResponse sem decodificar os varBinds"""
+    tag, start, end = decode_tlv(data)
+    if tag != 0x30:
+        raise BERDecodeError("Mensagem SNMP não é uma SEQUENCE")
+
+    # version
+    tag, start, offset = decode_tlv(data, start)
+    # community
+    tag, start, offset = decode_tlv(data, offset)
+
+    tag, offset, end = decode_tlv(data, offset)
+    if tag != PDU_GET_RESPONSE:
+        raise BERDecodeError(f"PDU inesperada: 0x{tag:02x}")
+
+    tag, start, offset = decode_tlv(data, offset)
+    if tag != TAG_INTEGER:
+        raise BERDecodeError("request-id ausente")
+    request_id = decode_integer(data, start, offset)
+
+    tag, start, offset = decode_tlv(data, offset)
+    if tag != TAG_INTEGER:
+        raise BERDecodeError("error-status ausente")
+    error_status = decode_integer(data, start, offset)
+
+    return request_id, error_status
+
+
+class SNMPLivenessProbe:
+    """Sonda leve de disponibilidade SNMP
+
+    Envia um GET de sysDescr pré-codificado por community e multiplexa
+    todas as impressoras em um único socket UDP não bloqueante, casando
+    as respostas pelo request-id. Não usa o pysnmp.
+    """
+
+    RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, timeout: float = 1.0, retries: int = 1,
+                 version: int = SNMP_V2C, oid: str = SYS_DESCR_OID):
+        self.timeout = timeout
+        self.retries = retries
+        self.version = version
+        self.oid = oid
+        self._last_request_id = random.randint(REQUEST_ID_MIN, REQUEST_ID_MAX)
+        # Alvos da última varredura que não responderam dentro do timeout
+        self.timed_out = set()
+
+    def probe_one(self, ip_address: str, port: int = 161, community: str = 'public') -> bool:
+        """Testar um único agente"""
+        return self.probe([(ip_address, port, community)]).get((ip_address, port), False)
+
+    def probe(self, targets: Iterable[Target]) -> Dict[Tuple[str, int], bool]:
+        """Testar vários agentes de uma vez
+
+        Retorna um dicionário (ip, porta) -> online. Os alvos que não
+        responderam (e não os que responderam com erro ou cujo envio falhou)
+        ficam em `timed_out`.
+        """
+        self.timed_out = set()
+        community_by_key = {}
+        for ip_address, port, community in targets:
+            community_by_key[(ip_address, int(port))] = community
+
+        results = {key: False for key in community_by_key}
+        if not results:
+            return results
+
+        sockets = {}
+        selector = selectors.DefaultSelector()
+        try:
+            remaining = set(results)
+            sent = set()
+            # request-id -> (ip, porta); mantido entre tentativas
+            # para aceitar respostas atrasadas da tentativa anterior
+            pending = {}
+
+            for attempt in range(self.retries + 1):
+                for key in remaining:
+                    sock = self._get_socket(sockets, selector, key[0])
+                    if sock is None:
+                        continue
+                    request_id = self._next_request_id()
+                    pending[request_id] = key
+                    if self._send(sock, key, community_by_key[key], request_id):
+                        sent.add(key)
+
+                deadline = time.monotonic() + self.timeout
+                while remaining:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        break
+                    for selector_key, _ in selector.select(wait):
+                        self._drain(selector_key.fileobj, pending, remaining, results)
+
+                if not remaining:
+                    break
+
+            self.timed_out = remaining & sent
+        finally:
+            selector.close()
+            for sock in sockets.values():
+                sock.close()
+
+        return results
+
+    def _next_request_id(self) -> int:
+        self._last_request_id += 1
+        if self._last_request_id > REQUEST_ID_MAX:
+            self._last_request_id = REQUEST_ID_MIN
+        return self._last_request_id
+
+    def _get_socket(self, sockets: Dict, selector, ip_address: str) -> Optional[socket.socket]:
+        """Obter (ou criar) o socket da família de endereço do alvo"""
+        family = socket.AF_INET6 if ':' in ip_address else socket.AF_INET
+        sock = sockets.get(family)
+        if sock is None:
+            try:
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RECEIVE_BUFFER_SIZE)
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.error(f"Error creating probe socket: {e}")
+                return None
+            sockets[family] = sock
+            selector.register(sock, selectors.EVENT_READ)
+        return sock
+
+    def _send(self, sock: socket.socket, key: Tuple[str, int], community: str, request_id: int) -> bool:
+        """Enviar o GET; retorna se o pacote saiu"""
+        template, offset = _get_request_template(community, self.version, self.oid)
+        packet = bytearray(template)
+        packet[offset:offset + 4] = request_id.to_bytes(4, 'big')
+
+        try:
+            sock.sendto(packet, key)
+            return True
+        except BlockingIOError:
+            # Buffer de envio cheio: aguardar brevemente e tentar de novo
+            select.select([], [sock], [], self.timeout)
+            try:
+                sock.sendto(packet, key)
+                return True
+            except OSError as e:
+                logger.debug(f"Probe send to {key[0]}:{key[1]} failed: {e}")
+        except OSError as e:
+            logger.debug(f"Probe send to {key[0]}:{key[1]} failed: {e}")
+        return False
+
+    def _drain(self, sock: socket.socket, pending: Dict, remaining: set, results: Dict):
+        """Ler todas as respostas disponíveis no socket"""
+        while True:
+            try:
+                data, address = sock.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # ICMP port unreachable de um alvo é reportado aqui em alguns sistemas
+                continue
+
+            try:
+                request_id, error_status = parse_response_header(data)
+            except BERDecodeError:
+                continue
+
+            key = pending.get(request_id)
+            if key is None or address[0] != key[0] or address[1] != key[1]:
+                continue
+
+            del pending[request_id]
+            if key in remaining:
+                remaining.discard(key)
+                results[key] = error_status == 0
@@ -1,9 +1,14 @@
 import ipaddress
 import socket
+from django.utils import timezone
 from pysnmp.hlapi import *
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
 
+from hp_management import metrics
+from .probe import SNMPLivenessProbe
+from .supplies import classify_supply, parse_supply_rows, supply_row, supply_status
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +33,8 @@ class SNMPService:
         'supply_max_capacity': '1.3.6.1.2.1.43.11.1.1.8.1',
         'supply_description': '1.3.6.1.2.1.43.11.1.1.6.1',
         'supply_type': '1.3.6.1.2.1.43.11.1.1.5.1',
+        'supply_colorant_index': '1.3.6.1.2.1.43.11.1.1.3.1',
+        'colorant_value': '1.3.6.1.2.1.43.12.1.1.4.1',
         
         # Papel
         'paper_input_status': '1.3.6.1.2.1.43.8.2.1.10.1',
@@ -51,31 +58,37 @@ class SNMPService:
     def test_connection(self) -> bool:
         """Testar conexão SNMP com a impressora"""
         try:
-            iterator = getCmd(
-                SnmpEngine(),
-                CommunityData(self.community),
-                UdpTransportTarget((self.ip_address, self.port)),
-                ContextData(),
-                ObjectType(ObjectIdentity(self.OIDS['system_description'])),
-                lexicographicMode=False
-            )
-            
-            errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
-            
-            if errorIndication:
-                logger.error(f"SNMP Error: {errorIndication}")
-                return False
-            
-            if errorStatus:
-                logger.error(f"SNMP Error: {errorStatus.prettyPrint()}")
-                return False
+            probe = SNMPLivenessProbe()
+            with metrics.observe_snmp(self.ip_address, 'liveness'):
+                is_online = probe.probe_one(self.ip_address, self.port, self.community)
             
-            return True
+            if probe.timed_out:
+                metrics.record_snmp_timeout(self.ip_address, 'liveness')
+            return is_online
         
         except Exception as e:
             logger.error(f"Exception testing SNMP connection: {e}")
             return False
     
+    @staticmethod
+    def test_connections(targets: List[Tuple[str, int, str]], timeout: float = 1.0,
+                         retries: int = 1) -> Dict[Tuple[str, int], bool]:
+        """Testar conexão de várias impressoras em uma única varredura
+        
+        Recebe tuplas (ip, porta, community) e retorna (ip, porta) -> online.
+        """
+        try:
+            probe = SNMPLivenessProbe(timeout=timeout, retries=retries)
+            with metrics.observe_snmp('sweep', 'liveness_sweep'):
+                results = probe.probe(targets)
+            
+            for ip_address, port in probe.timed_out:
+                metrics.record_snmp_timeout(ip_address, 'liveness')
+            return results
+        except Exception as e:
+            logger.error(f"Exception during SNMP liveness sweep: {e}")
+            return {(ip_address, int(port)): False for ip_address, port, community in targets}
+    
     def get_basic_info(self) -> Dict:
         """Obter informações básicas da impressora"""
         info = {}
@@ -101,7 +114,11 @@ class SNMPService:
                         lexicographicMode=False
                     )
                     
-                    errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+                    with metrics.observe_snmp(self.ip_address, 'basic_info'):
+                        errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+                    
+                    if metrics.is_timeout(errorIndication):
+                        metrics.record_snmp_timeout(self.ip_address, 'basic_info')
                     
                     if not errorIndication and not errorStatus:
                         for varBind in varBinds:
@@ -131,7 +148,11 @@ class SNMPService:
                 lexicographicMode=False
             )
             
-            errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+            with metrics.observe_snmp(self.ip_address, 'status'):
+                errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+            
+            if metrics.is_timeout(errorIndication):
+                metrics.record_snmp_timeout(self.ip_address, 'status')
             
             if not errorIndication and not errorStatus:
                 for varBind in varBinds:
@@ -160,39 +181,73 @@ class SNMPService:
                 ObjectType(ObjectIdentity(self.OIDS['supply_level'])),
                 ObjectType(ObjectIdentity(self.OIDS['supply_max_capacity'])),
                 ObjectType(ObjectIdentity(self.OIDS['supply_type'])),
+                ObjectType(ObjectIdentity(self.OIDS['supply_colorant_index'])),
                 lexicographicMode=False
             )
             
-            for errorIndication, errorStatus, errorIndex, varBinds in iterator:
+            with metrics.observe_snmp(self.ip_address, 'supplies'):
+                rows = list(iterator)
+            
+            supply_rows = []
+            for errorIndication, errorStatus, errorIndex, varBinds in rows:
                 if errorIndication:
+                    if metrics.is_timeout(errorIndication):
+                        metrics.record_snmp_timeout(self.ip_address, 'supplies')
                     break
                 
                 if errorStatus:
                     break
                 
-                # Processar dados dos suprimentos
-                if len(varBinds) >= 4:
-                    description = str(varBinds[0][1])
-                    level = int(varBinds[1][1]) if varBinds[1][1] != -1 else 0
-                    max_capacity = int(varBinds[2][1]) if varBinds[2][1] != -1 else 100
-                    supply_type_code = int(varBinds[3][1])
-                    
-                    supply_type = self._interpret_supply_type(description, supply_type_code)
-                    
-                    if supply_type:
-                        supplies[supply_type] = {
-                            'description': description,
-                            'level': level,
-                            'max_capacity': max_capacity,
-                            'current_capacity': int((level / 100) * max_capacity) if max_capacity > 0 else 0,
-                            'status': self._get_supply_status(level)
-                        }
+                if len(varBinds) >= 5:
+                    supply_rows.append(supply_row(varBinds[:5]))
+            
+            # Cores dos colorantes só são necessárias para toner e tinta
+            colorants = {}
+            if any(row[4] > 0 for row in supply_rows):
+                colorants = self.get_colorants()
+            
+            supplies = parse_supply_rows(supply_rows, colorants)
         
         except Exception as e:
             logger.error(f"Error getting supplies status: {e}")
         
         return supplies
     
+    def get_colorants(self) -> Dict[int, str]:
+        """Obter a tabela prtMarkerColorantValue (índice do colorante -> cor)"""
+        colorants = {}
+        prefix_length = len(self.OIDS['colorant_value'].split('.'))
+        
+        try:
+            iterator = nextCmd(
+                SnmpEngine(),
+                CommunityData(self.community),
+                UdpTransportTarget((self.ip_address, self.port)),
+                ContextData(),
+                ObjectType(ObjectIdentity(self.OIDS['colorant_value'])),
+                lexicographicMode=False
+            )
+            
+            with metrics.observe_snmp(self.ip_address, 'colorants'):
+                rows = list(iterator)
+            
+            for errorIndication, errorStatus, errorIndex, varBinds in rows:
+                if errorIndication:
+                    if metrics.is_timeout(errorIndication):
+                        metrics.record_snmp_timeout(self.ip_address, 'colorants')
+                    break
+                
+                if errorStatus:
+                    break
+                
+                for oid, value in varBinds:
+                    colorants[int(oid[prefix_length])] = str(value)
+        
+        except Exception as e:
+            logger.warning(f"Error getting colorants: {e}")
+        
+        return colorants
+    
     def get_paper_status(self) -> Dict:
         """Obter status do papel"""
         paper_status = {}
@@ -209,7 +264,11 @@ class SNMPService:
                 lexicographicMode=False
             )
             
-            errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+            with metrics.observe_snmp(self.ip_address, 'paper'):
+                errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
+            
+            if metrics.is_timeout(errorIndication):
+                metrics.record_snmp_timeout(self.ip_address, 'paper')
             
             if not errorIndication and not errorStatus:
                 if len(varBinds) >= 3:
@@ -241,47 +300,13 @@ class SNMPService:
         }
         return status_map.get(status_code, 'unknown')
     
-    def _interpret_supply_type(self, description: str, type_code: int) -> Optional[str]:
-        """Interpretar tipo de suprimento baseado na descrição"""
-        desc_lower = description.lower()
-        
-        if 'black' in desc_lower or 'preto' in desc_lower:
-            if 'toner' in desc_lower:
-                return 'toner_black'
-            elif 'ink' in desc_lower or 'tinta' in desc_lower:
-                return 'ink_black'
-        elif 'cyan' in desc_lower or 'ciano' in desc_lower:
-            if 'toner' in desc_lower:
-                return 'toner_cyan'
-            elif 'ink' in desc_lower or 'tinta' in desc_lower:
-                return 'ink_cyan'
-        elif 'magenta' in desc_lower:
-            if 'toner' in desc_lower:
-                return 'toner_magenta'
-            elif 'ink' in desc_lower or 'tinta' in desc_lower:
-                return 'ink_magenta'
-        elif 'yellow' in desc_lower or 'amarelo' in desc_lower:
-            if 'toner' in desc_lower:
-                return 'toner_yellow'
-            elif 'ink' in desc_lower or 'tinta' in desc_lower:
-                return 'ink_yellow'
-        elif 'drum' in desc_lower or 'cilindro' in desc_lower:
-            return 'drum'
-        elif 'fuser' in desc_lower or 'fusor' in desc_lower:
-            return 'fuser'
-        
-        return None
+    def _interpret_supply_type(self, description: str, type_code: int, colorant: str = '') -> Optional[str]:
+        """Interpretar tipo de suprimento (código de tipo, colorante e descrição)"""
+        return classify_supply(description, type_code, colorant)
     
     def _get_supply_status(self, level: int) -> str:
         """Determinar status do suprimento baseado no nível"""
-        if level <= 0:
-            return 'empty'
-        elif level <= 10:
-            return 'very_low'
-        elif level <= 25:
-            return 'low'
-        else:
-            return 'ok'
+        return supply_status(level)
     
     def _interpret_paper_status(self, status_code: int) -> str:
         """Interpretar status do papel"""
@@ -309,11 +334,14 @@ class PrinterDiscoveryService:
             # Converter string de range para objetos de rede
             network = ipaddress.IPv4Network(ip_range, strict=False)
             
-            for ip in network.hosts():
-                ip_str = str(ip)
-                
-                # Testar conexão SNMP
-                if self._test_snmp_connection(ip_str, snmp_community, timeout):
+            # Varredura de disponibilidade em paralelo para toda a faixa
+            hosts = [str(ip) for ip in network.hosts()]
+            liveness = SNMPService.test_connections(
+                [(ip_str, 161, snmp_community) for ip_str in hosts], timeout=timeout
+            )
+            
+            for ip_str in hosts:
+                if liveness.get((ip_str, 161)):
                     printer_info = self._get_printer_info(ip_str, snmp_community)
                     if printer_info:
                         printer_info['ip_address'] = ip_str
@@ -324,14 +352,6 @@ class PrinterDiscoveryService:
         
         return discovered_printers
     
-    def _test_snmp_connection(self, ip_address: str, community: str, timeout: int) -> bool:
-        """Testar conexão SNMP com um IP"""
-        try:
-            snmp_service = SNMPService(ip_address, community)
-            return snmp_service.test_connection()
-        except Exception:
-            return False
-    
     def _get_printer_info(self, ip_address: str, community: str) -> Optional[Dict]:
         """Obter informações da impressora via SNMP"""
         try:
@@ -0,0 +1,120 @@
+"""Classificação dos suprimentos reportados pela Printer-MIB (RFC 3805)
+
+A tabela de classificação é montada uma única vez na importação e a
+consulta descrição -> tipo é memoizada: uma frota reporta poucas dezenas
+de descrições distintas, repetidas a cada ciclo de polling.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+# prtMarkerSuppliesType -> família do suprimento
+SUPPLY_TYPE_FAMILIES = {
+    3: 'toner',    # toner
+    21: 'toner',   # tonerCartridge
+    5: 'ink',      # ink
+    6: 'ink',      # inkCartridge
+    9: 'drum',     # opc
+    15: 'fuser',   # fuser
+}
+
+# Famílias que precisam de cor para formar o tipo (toner_black, ink_cyan...)
+COLORED_FAMILIES = frozenset({'toner', 'ink'})
+
+# Palavras-chave em ordem de precedência, usadas quando o código de tipo
+# ou a cor do colorante não estão disponíveis
+COLOR_KEYWORDS = (
+    ('black', 'black'), ('preto', 'black'),
+    ('cyan', 'cyan'), ('ciano', 'cyan'),
+    ('magenta', 'magenta'),
+    ('yellow', 'yellow'), ('amarelo', 'yellow'),
+)
+
+FAMILY_KEYWORDS = (
+    ('toner', 'toner'),
+    ('ink', 'ink'), ('tinta', 'ink'),
+    ('drum', 'drum'), ('cilindro', 'drum'),
+    ('fuser', 'fuser'), ('fusor', 'fuser'),
+)
+
+# (descrição, nível, capacidade máxima, código de tipo, índice do colorante)
+SupplyRow = Tuple[str, int, int, int, int]
+
+
+def _match_keyword(text: str, keywords: Tuple[Tuple[str, str], ...]) -> Optional[str]:
+    for keyword, value in keywords:
+        if keyword in text:
+            return value
+    return None
+
+
+@lru_cache(maxsize=1024)
+def classify_supply(description: str, type_code: int, colorant: str = '') -> Optional[str]:
+    """Tipo do suprimento (choices de PrinterSupplies) ou None se não monitorado
+
+    O código prtMarkerSuppliesType define a família e o prtMarkerColorantValue
+    define a cor; a descrição só é analisada quando algum deles falta.
+    """
+    family = SUPPLY_TYPE_FAMILIES.get(type_code)
+    description = description.lower()
+
+    if family is None:
+        family = _match_keyword(description, FAMILY_KEYWORDS)
+        if family is None:
+            return None
+
+    if family not in COLORED_FAMILIES:
+        return family
+
+    color = _match_keyword(colorant.lower(), COLOR_KEYWORDS) if colorant else None
+    if color is None:
+        color = _match_keyword(description, COLOR_KEYWORDS)
+    if color is None:
+        return None
+
+    return f'{family}_{color}'
+
+
+def supply_status(level: int) -> str:
+    """Determinar status do suprimento baseado no nível"""
+    if level <= 0:
+        return 'empty'
+    elif level <= 10:
+        return 'very_low'
+    elif level <= 25:
+        return 'low'
+    else:
+        return 'ok'
+
+
+def supply_row(var_binds) -> SupplyRow:
+    """Converter uma linha da tabela de suprimentos em tipos nativos
+
+    Espera as colunas descrição, nível, capacidade, tipo e índice do
+    colorante, nesta ordem; cada valor SNMP é convertido uma única vez.
+    """
+    description, level, max_capacity, type_code, colorant_index = (value for _, value in var_binds)
+    return str(description), int(level), int(max_capacity), int(type_code), int(colorant_index)
+
+
+def parse_supply_rows(rows: Iterable[SupplyRow], colorants: Dict[int, str]) -> Dict[str, Dict]:
+    """Montar o snapshot de suprimentos a partir das linhas já convertidas"""
+    supplies = {}
+
+    for description, level, max_capacity, type_code, colorant_index in rows:
+        # Valores negativos são indicadores da MIB (-1 other, -2 unknown, -3 algum restante)
+        if level < 0:
+            level = 0
+        if max_capacity < 0:
+            max_capacity = 100
+
+        supply_type = classify_supply(description, type_code, colorants.get(colorant_index, ''))
+        if supply_type:
+            supplies[supply_type] = {
+                'description': description,
+                'level': level,
+                'max_capacity': max_capacity,
+                'current_capacity': int((level / 100) * max_capacity) if max_capacity > 0 else 0,
+                'status': supply_status(level)
+            }
+
+    return supplies
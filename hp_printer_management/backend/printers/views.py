@@ -49,7 +49,7 @@ class PrinterViewSet(viewsets.ModelViewSet):
         printer = self.get_object()
         
         try:
-            snmp_service = SNMPService(printer.ip_address, printer.snmp_community)
+            snmp_service = SNMPService(printer.ip_address, printer.snmp_community, printer.snmp_port)
             is_connected = snmp_service.test_connection()
             
             if is_connected:
@@ -139,6 +139,12 @@ class PrinterViewSet(viewsets.ModelViewSet):
                     supply.current_capacity = data.get('current_capacity', supply.current_capacity)
                     supply.save()
             
+            if supplies_data:
+                from alerts.streaming import on_snapshot
+                on_snapshot(printer, supply_levels={
+                    supply_type: data.get('level', 0) for supply_type, data in supplies_data.items()
+                })
+            
             return Response({'message': 'Suprimentos atualizados com sucesso'})
         
         except Exception as e:
@@ -0,0 +1,13 @@
+# Simulador de agentes SNMP Printer-MIB para testes e benchmarks
+from .agent import AgentProfile, SimulatedAgent
+from .fleet import SimulatedFleet
+from .walks import Walk, available_walks, load_walks
+
+__all__ = [
+    'AgentProfile',
+    'SimulatedAgent',
+    'SimulatedFleet',
+    'Walk',
+    'available_walks',
+    'load_walks',
+]
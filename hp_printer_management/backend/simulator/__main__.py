@@ -0,0 +1,66 @@
+"""Iniciar uma frota simulada a partir da linha de comando
+
+    python -m simulator --agents 100 --base-port 20161 --latency 0.005 --loss 0.01
+"""
+import argparse
+import json
+import logging
+import signal
+import threading
+
+from .fleet import SimulatedFleet
+from .walks import load_walks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frota de agentes SNMP Printer-MIB simulados')
+    parser.add_argument('--agents', type=int, default=10, help='Número de agentes')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--base-port', type=int, default=20161)
+    parser.add_argument('--community', default='public')
+    parser.add_argument('--walk', action='append', help='Arquivo de walk (pode repetir)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Atraso das respostas (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variação aleatória do atraso (s)')
+    parser.add_argument('--loss', type=float, default=0.0, help='Probabilidade de perda (0-1)')
+    parser.add_argument('--max-response-size', type=int, default=None,
+                        help='Tamanho máximo da resposta antes de tooBig (bytes)')
+    parser.add_argument('--offline-ratio', type=float, default=0.0,
+                        help='Fração de agentes que não respondem')
+    parser.add_argument('--drain-rate', type=float, default=0.0,
+                        help='Consumo dos suprimentos (%% da capacidade por hora)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--targets', help='Gravar os dados de cadastro dos agentes neste arquivo JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    walks = load_walks(args.walk)
+    fleet = SimulatedFleet(
+        args.agents,
+        walks=walks,
+        host=args.host,
+        base_port=args.base_port,
+        community=args.community,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        max_response_size=args.max_response_size,
+        offline_ratio=args.offline_ratio,
+        drain_rate=args.drain_rate,
+        seed=args.seed,
+    )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    with fleet:
+        if args.targets:
+            with open(args.targets, 'w', encoding='utf-8') as targets_file:
+                json.dump(fleet.targets(), targets_file, indent=2)
+        stop.wait()
+        print(json.dumps(fleet.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+import asyncio
+import bisect
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from printers.ber import (
+    BERDecodeError, ERROR_NO_SUCH_NAME, ERROR_TOO_BIG, PDU_GET_BULK_REQUEST,
+    PDU_GET_NEXT_REQUEST, PDU_GET_REQUEST, PDU_GET_RESPONSE, SNMP_V1, SNMP_V2C,
+    TAG_END_OF_MIB_VIEW, TAG_NO_SUCH_INSTANCE, TAG_NO_SUCH_OBJECT, TAG_TIMETICKS,
+    decode_integer, decode_oid, decode_tlv, encode_integer, encode_null,
+    encode_octet_string, encode_oid, encode_sequence, encode_tlv, encode_unsigned,
+)
+
+from .walks import OID, SYS_UPTIME_OID, Walk, format_oid, parse_oid
+
+logger = logging.getLogger(__name__)
+
+NO_SUCH_OBJECT = encode_tlv(TAG_NO_SUCH_OBJECT, b'')
+NO_SUCH_INSTANCE = encode_tlv(TAG_NO_SUCH_INSTANCE, b'')
+END_OF_MIB_VIEW = encode_tlv(TAG_END_OF_MIB_VIEW, b'')
+
+
+class AgentProfile:
+    """Comportamento de rede e de consumo de um agente simulado
+
+    - latency / jitter: atraso da resposta em segundos
+    - loss: probabilidade (0-1) de descartar uma requisição
+    - max_response_size: respostas maiores geram tooBig (None = sem limite)
+    - offline: o agente não responde
+    - drain_rate: consumo dos suprimentos em % da capacidade por hora
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, loss: float = 0.0,
+                 max_response_size: Optional[int] = None, offline: bool = False,
+                 drain_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.max_response_size = max_response_size
+        self.offline = offline
+        self.drain_rate = drain_rate
+
+
+class SNMPRequest:
+    """Requisição SNMPv1/v2c decodificada"""
+
+    def __init__(self, version: int, community: bytes, pdu_type: int, request_id: int,
+                 non_repeaters: int, max_repetitions: int, oids: List[str]):
+        self.version = version
+        self.community = community
+        self.pdu_type = pdu_type
+        self.request_id = request_id
+        self.non_repeaters = non_repeaters
+        self.max_repetitions = max_repetitions
+        self.oids = oids
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'SNMPRequest':
+        tag, start, end = decode_tlv(data)
+        if tag != 0x30:
+            raise BERDecodeError("Mensagem SNMP não é uma SEQUENCE")
+
+        tag, start, offset = decode_tlv(data, start)
+        version = decode_integer(data, start, offset)
+
+        tag, start, offset = decode_tlv(data, offset)
+        community = bytes(data[start:offset])
+
+        pdu_type, offset, pdu_end = decode_tlv(data, offset)
+
+        fields = []
+        for _ in range(3):
+            tag, start, offset = decode_tlv(data, offset)
+            fields.append(decode_integer(data, start, offset))
+
+        tag, position, varbinds_end = decode_tlv(data, offset)
+        oids = []
+        while position < varbinds_end:
+            tag, start, varbind_end = decode_tlv(data, position)
+            tag, start, oid_end = decode_tlv(data, start)
+            oids.append(decode_oid(data, start, oid_end))
+            position = varbind_end
+
+        return cls(version, community, pdu_type, fields[0], fields[1], fields[2], oids)
+
+
+class SimulatedAgent(asyncio.DatagramProtocol):
+    """Agente Printer-MIB falso servido a partir de um walk gravado"""
+
+    def __init__(self, walk: Walk, community: str = 'public',
+                 profile: Optional[AgentProfile] = None,
+                 overrides: Optional[Dict[str, bytes]] = None,
+                 rng: Optional[random.Random] = None):
+        self.walk = walk
+        self.community = community.encode('utf-8')
+        self.profile = profile or AgentProfile()
+        self.rng = rng or random.Random()
+        # Sobrescritas de valores já existentes no walk (número de série, nome...)
+        self.overrides = {parse_oid(oid): value for oid, value in (overrides or {}).items()}
+        self.transport = None
+        self.started_at = time.monotonic()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requests_received = 0
+        self.requests_dropped = 0
+        self.responses_sent = 0
+        self.too_big_responses = 0
+        self.first_request_at = None
+        self.last_response_at = None
+
+    # asyncio.DatagramProtocol
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, address: Tuple[str, int]):
+        now = time.monotonic()
+        self.requests_received += 1
+        if self.first_request_at is None:
+            self.first_request_at = now
+
+        if self.profile.offline or (self.profile.loss and self.rng.random() < self.profile.loss):
+            self.requests_dropped += 1
+            return
+
+        try:
+            request = SNMPRequest.decode(data)
+        except (BERDecodeError, ValueError):
+            self.requests_dropped += 1
+            return
+
+        if request.community != self.community or request.version not in (SNMP_V1, SNMP_V2C):
+            self.requests_dropped += 1
+            return
+
+        response = self.handle(request)
+        if response is None:
+            self.requests_dropped += 1
+            return
+
+        delay = self.profile.latency
+        if self.profile.jitter:
+            delay += self.rng.uniform(0, self.profile.jitter)
+
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._send, response, address)
+        else:
+            self._send(response, address)
+
+    def _send(self, response: bytes, address: Tuple[str, int]):
+        if self.transport is None or self.transport.is_closing():
+            return
+        self.transport.sendto(response, address)
+        self.responses_sent += 1
+        self.last_response_at = time.monotonic()
+
+    # Processamento SNMP
+
+    def handle(self, request: SNMPRequest) -> Optional[bytes]:
+        """Montar a resposta de uma requisição"""
+        if request.pdu_type == PDU_GET_REQUEST:
+            error_status, error_index, varbinds = self._get(request)
+        elif request.pdu_type == PDU_GET_NEXT_REQUEST:
+            error_status, error_index, varbinds = self._get_next(request)
+        elif request.pdu_type == PDU_GET_BULK_REQUEST and request.version == SNMP_V2C:
+            return self._get_bulk(request)
+        else:
+            return None
+
+        response = self._encode_response(request, error_status, error_index, varbinds)
+        if self.profile.max_response_size and len(response) > self.profile.max_response_size:
+            self.too_big_responses += 1
+            return self._too_big(request)
+        return response
+
+    def _value(self, oid: OID) -> bytes:
+        override = self.overrides.get(oid)
+        if override is not None:
+            return override
+
+        if oid == SYS_UPTIME_OID:
+            recorded = self.walk.values.get(oid, 0)
+            elapsed = int((time.monotonic() - self.started_at) * 100)
+            return encode_unsigned((recorded + elapsed) % 2 ** 32, TAG_TIMETICKS)
+
+        if self.profile.drain_rate and oid in self.walk.supply_levels:
+            level, max_capacity = self.walk.supply_levels[oid]
+            hours = (time.monotonic() - self.started_at) / 3600
+            drained = int(self.profile.drain_rate * hours * max_capacity / 100)
+            return encode_integer(max(0, level - drained))
+
+        return self.walk.encoded[oid]
+
+    def _varbind(self, oid: OID, value: bytes) -> bytes:
+        encoded_oid = self.walk.encoded_oids.get(oid) or encode_oid(format_oid(oid))
+        return encode_sequence(encoded_oid, value)
+
+    def _next_oid(self, oid: OID) -> Optional[OID]:
+        index = bisect.bisect_right(self.walk.oids, oid)
+        if index < len(self.walk.oids):
+            return self.walk.oids[index]
+        return None
+
+    def _get(self, request: SNMPRequest):
+        varbinds = []
+        for index, oid_str in enumerate(request.oids, start=1):
+            oid = parse_oid(oid_str)
+            if oid in self.walk.encoded:
+                varbinds.append(self._varbind(oid, self._value(oid)))
+            elif request.version == SNMP_V1:
+                return ERROR_NO_SUCH_NAME, index, self._echo(request)
+            else:
+                # noSuchObject quando nem o prefixo do objeto existe
+                next_oid = self._next_oid(oid[:-1])
+                exists = next_oid is not None and next_oid[:len(oid) - 1] == oid[:-1]
+                varbinds.append(self._varbind(oid, NO_SUCH_INSTANCE if exists else NO_SUCH_OBJECT))
+        return 0, 0, varbinds
+
+    def _get_next(self, request: SNMPRequest):
+        varbinds = []
+        for index, oid_str in enumerate(request.oids, start=1):
+            oid = parse_oid(oid_str)
+            next_oid = self._next_oid(oid)
+            if next_oid is not None:
+                varbinds.append(self._varbind(next_oid, self._value(next_oid)))
+            elif request.version == SNMP_V1:
+                return ERROR_NO_SUCH_NAME, index, self._echo(request)
+            else:
+                varbinds.append(self._varbind(oid, END_OF_MIB_VIEW))
+        return 0, 0, varbinds
+
+    def _get_bulk(self, request: SNMPRequest) -> bytes:
+        oids = [parse_oid(oid) for oid in request.oids]
+        non_repeaters = max(0, min(request.non_repeaters, len(oids)))
+        max_repetitions = max(0, request.max_repetitions)
+
+        varbinds = []
+        for oid in oids[:non_repeaters]:
+            next_oid = self._next_oid(oid)
+            if next_oid is None:
+                varbinds.append(self._varbind(oid, END_OF_MIB_VIEW))
+            else:
+                varbinds.append(self._varbind(next_oid, self._value(next_oid)))
+
+        cursors = oids[non_repeaters:]
+        limit = self.profile.max_response_size
+        for _ in range(max_repetitions):
+            if not cursors:
+                break
+            row = []
+            exhausted = True
+            for position, oid in enumerate(cursors):
+                next_oid = self._next_oid(oid)
+                if next_oid is None:
+                    row.append(self._varbind(oid, END_OF_MIB_VIEW))
+                else:
+                    exhausted = False
+                    row.append(self._varbind(next_oid, self._value(next_oid)))
+                    cursors[position] = next_oid
+
+            # Agentes reais truncam o GETBULK em vez de responder tooBig
+            if limit and len(self._encode_response(request, 0, 0, varbinds + row)) > limit:
+                self.too_big_responses += 1
+                break
+            varbinds.extend(row)
+            if exhausted:
+                break
+
+        response = self._encode_response(request, 0, 0, varbinds)
+        if limit and len(response) > limit:
+            return self._too_big(request)
+        return response
+
+    def _echo(self, request: SNMPRequest) -> List[bytes]:
+        return [encode_sequence(encode_oid(oid), encode_null()) for oid in request.oids]
+
+    def _too_big(self, request: SNMPRequest) -> bytes:
+        # v1 devolve os varBinds da requisição; v2c devolve a lista vazia (RFC 3416)
+        varbinds = self._echo(request) if request.version == SNMP_V1 else []
+        return self._encode_response(request, ERROR_TOO_BIG, 0, varbinds)
+
+    def _encode_response(self, request: SNMPRequest, error_status: int, error_index: int,
+                         varbinds: List[bytes]) -> bytes:
+        return encode_sequence(
+            encode_integer(request.version),
+            encode_octet_string(request.community),
+            encode_tlv(PDU_GET_RESPONSE, (
+                encode_integer(request.request_id)
+                + encode_integer(error_status)
+                + encode_integer(error_index)
+                + encode_sequence(*varbinds)
+            )),
+        )
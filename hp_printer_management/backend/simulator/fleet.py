@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Dict, List, Optional
+
+from printers.ber import encode_octet_string
+
+from .agent import AgentProfile, SimulatedAgent
+from .walks import SERIAL_NUMBER_OID, SYS_NAME_OID, Walk, format_oid, load_walks
+
+logger = logging.getLogger(__name__)
+
+
+def _raise_file_limit(required: int):
+    """Elevar o limite de descritores abertos (um socket por agente)"""
+    try:
+        import resource
+    except ImportError:
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY or soft >= required:
+        return
+
+    target = required if hard == resource.RLIM_INFINITY else min(required, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not raise open file limit to {required}: {e}")
+
+
+class SimulatedFleet:
+    """Frota de agentes Printer-MIB falsos em portas locais
+
+    Cada agente escuta em `host:base_port + i` e responde a partir de um dos
+    walks gravados (distribuídos em rodízio), com número de série e nome
+    próprios. Os agentes rodam em um event loop asyncio em uma thread
+    dedicada; use como context manager ou chame start()/stop().
+    """
+
+    def __init__(self, size: int, walks: Optional[List[Walk]] = None,
+                 host: str = '127.0.0.1', base_port: int = 20161,
+                 community: str = 'public', latency: float = 0.0, jitter: float = 0.0,
+                 loss: float = 0.0, max_response_size: Optional[int] = None,
+                 offline_ratio: float = 0.0, drain_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.size = size
+        self.walks = walks or load_walks()
+        self.host = host
+        self.base_port = base_port
+        self.community = community
+
+        rng = random.Random(seed)
+        offline = set(rng.sample(range(size), int(round(size * offline_ratio))))
+
+        self.agents: List[SimulatedAgent] = []
+        for index in range(size):
+            walk = self.walks[index % len(self.walks)]
+            profile = AgentProfile(
+                latency=latency,
+                jitter=jitter,
+                loss=loss,
+                max_response_size=max_response_size,
+                offline=index in offline,
+                drain_rate=drain_rate,
+            )
+            overrides = {
+                format_oid(SERIAL_NUMBER_OID): encode_octet_string(self.serial_number(index).encode()),
+                format_oid(SYS_NAME_OID): encode_octet_string(self.agent_name(index).encode()),
+            }
+            self.agents.append(SimulatedAgent(
+                walk,
+                community=community,
+                profile=profile,
+                overrides=overrides,
+                rng=random.Random(rng.random()),
+            ))
+
+        self._loop = None
+        self._thread = None
+        self._transports = []
+
+    @staticmethod
+    def serial_number(index: int) -> str:
+        return f'SIM{index:07d}'
+
+    @staticmethod
+    def agent_name(index: int) -> str:
+        return f'SIM-PRN-{index:05d}'
+
+    def port(self, index: int) -> int:
+        return self.base_port + index
+
+    def start(self):
+        """Abrir os sockets e iniciar o event loop"""
+        if self._thread is not None:
+            return
+
+        _raise_file_limit(self.size + 256)
+
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        errors = []
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._bind_all())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='snmp-simulator', daemon=True)
+        self._thread.start()
+        started.wait()
+
+        if errors:
+            self.stop()
+            raise errors[0]
+
+        logger.info(f"SNMP simulator started: {self.size} agents on "
+                    f"{self.host}:{self.base_port}-{self.base_port + self.size - 1}")
+
+    async def _bind_all(self):
+        loop = asyncio.get_running_loop()
+        for index, agent in enumerate(self.agents):
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda agent=agent: agent,
+                local_addr=(self.host, self.port(index)),
+            )
+            self._transports.append(transport)
+
+    def stop(self):
+        """Fechar os sockets e encerrar o event loop"""
+        if self._loop is None:
+            return
+
+        def shutdown():
+            for transport in self._transports:
+                transport.close()
+            self._loop.stop()
+
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(shutdown)
+            self._thread.join()
+        else:
+            for transport in self._transports:
+                transport.close()
+
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+        self._transports = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def set_offline(self, index: int, offline: bool = True):
+        self.agents[index].profile.offline = offline
+
+    def targets(self) -> List[Dict]:
+        """Dados de cadastro de cada agente (compatíveis com o modelo Printer)"""
+        return [
+            {
+                'name': self.agent_name(index),
+                'model': agent.walk.model,
+                'serial_number': self.serial_number(index),
+                'ip_address': self.host,
+                'snmp_port': self.port(index),
+                'snmp_community': self.community,
+                'online': not agent.profile.offline,
+            }
+            for index, agent in enumerate(self.agents)
+        ]
+
+    def reset_stats(self):
+        for agent in self.agents:
+            agent.reset_stats()
+
+    def stats(self) -> Dict:
+        """Contadores agregados de todos os agentes"""
+        return {
+            'agents': self.size,
+            'requests_received': sum(agent.requests_received for agent in self.agents),
+            'requests_dropped': sum(agent.requests_dropped for agent in self.agents),
+            'responses_sent': sum(agent.responses_sent for agent in self.agents),
+            'too_big_responses': sum(agent.too_big_responses for agent in self.agents),
+        }
@@ -0,0 +1,141 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from printers.ber import (
+    TAG_COUNTER32, TAG_COUNTER64, TAG_GAUGE32, TAG_IP_ADDRESS,
+    TAG_TIMETICKS, encode_integer, encode_octet_string, encode_oid, encode_tlv,
+    encode_unsigned,
+)
+
+WALKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'walks')
+
+OID = Tuple[int, ...]
+
+# Colunas da prtMarkerSuppliesTable usadas no consumo simulado
+SUPPLY_MAX_CAPACITY_PREFIX = (1, 3, 6, 1, 2, 1, 43, 11, 1, 1, 8)
+SUPPLY_LEVEL_PREFIX = (1, 3, 6, 1, 2, 1, 43, 11, 1, 1, 9)
+
+SYS_UPTIME_OID = (1, 3, 6, 1, 2, 1, 1, 3, 0)
+SYS_NAME_OID = (1, 3, 6, 1, 2, 1, 1, 5, 0)
+SERIAL_NUMBER_OID = (1, 3, 6, 1, 2, 1, 43, 5, 1, 1, 17, 1)
+MODEL_OID = (1, 3, 6, 1, 2, 1, 25, 3, 2, 1, 3, 1)
+
+# Linha no formato de `snmpwalk -On`: .1.3.6... = TIPO: valor
+LINE_RE = re.compile(r'^\s*(\.?\d+(?:\.\d+)+)\s*=\s*(?:([A-Za-z][\w-]*):\s*)?(.*?)\s*$')
+PAREN_NUMBER_RE = re.compile(r'\((-?\d+)\)')
+
+
+def parse_oid(oid: str) -> OID:
+    return tuple(int(arc) for arc in oid.strip('.').split('.'))
+
+
+def format_oid(oid: OID) -> str:
+    return '.'.join(str(arc) for arc in oid)
+
+
+def _parse_number(value: str) -> int:
+    """Ler inteiros como `idle(3)`, `(12345) 0:02:03.45` ou `42`"""
+    match = PAREN_NUMBER_RE.search(value)
+    if match:
+        return int(match.group(1))
+    return int(value.split()[0])
+
+
+def _parse_string(value: str) -> bytes:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1].replace('\\"', '"')
+    return value.encode('utf-8')
+
+
+def encode_value(type_name: Optional[str], value: str) -> Tuple[bytes, object]:
+    """Codificar o valor de uma linha do walk
+
+    Retorna o TLV codificado e o valor Python correspondente.
+    """
+    type_name = (type_name or 'STRING').upper()
+
+    if type_name == 'INTEGER':
+        number = _parse_number(value)
+        return encode_integer(number), number
+
+    if type_name in ('COUNTER32', 'GAUGE32', 'TIMETICKS', 'COUNTER64'):
+        tag = {
+            'COUNTER32': TAG_COUNTER32,
+            'GAUGE32': TAG_GAUGE32,
+            'TIMETICKS': TAG_TIMETICKS,
+            'COUNTER64': TAG_COUNTER64,
+        }[type_name]
+        number = _parse_number(value)
+        return encode_unsigned(number, tag), number
+
+    if type_name == 'OID':
+        return encode_oid(value), value.strip('.')
+
+    if type_name == 'IPADDRESS':
+        octets = bytes(int(part) for part in value.split('.'))
+        return encode_tlv(TAG_IP_ADDRESS, octets), value
+
+    if type_name == 'HEX-STRING':
+        raw = bytes.fromhex(value.replace(' ', ''))
+        return encode_octet_string(raw), raw
+
+    raw = _parse_string(value)
+    return encode_octet_string(raw), raw.decode('utf-8', errors='replace')
+
+
+class Walk:
+    """Snapshot gravado de um agente SNMP (saída de `snmpwalk -On`)"""
+
+    def __init__(self, name: str, entries: Dict[OID, Tuple[bytes, object]]):
+        self.name = name
+        self.oids: List[OID] = sorted(entries)
+        self.encoded: Dict[OID, bytes] = {oid: entry[0] for oid, entry in entries.items()}
+        self.values: Dict[OID, object] = {oid: entry[1] for oid, entry in entries.items()}
+        self.encoded_oids: Dict[OID, bytes] = {oid: encode_oid(format_oid(oid)) for oid in self.oids}
+
+        # Suprimentos com nível numérico: oid do nível -> (nível gravado, capacidade máxima)
+        self.supply_levels: Dict[OID, Tuple[int, int]] = {}
+        for oid, level in self.values.items():
+            if oid[:len(SUPPLY_LEVEL_PREFIX)] != SUPPLY_LEVEL_PREFIX or not isinstance(level, int):
+                continue
+            if level < 0:
+                # -2 (desconhecido) e -3 (há algum restante) não são drenados
+                continue
+            max_oid = SUPPLY_MAX_CAPACITY_PREFIX + oid[len(SUPPLY_LEVEL_PREFIX):]
+            max_capacity = self.values.get(max_oid)
+            if isinstance(max_capacity, int) and max_capacity > 0:
+                self.supply_levels[oid] = (level, max_capacity)
+
+    @property
+    def model(self) -> str:
+        return str(self.values.get(MODEL_OID, self.name))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Walk':
+        entries = {}
+        with open(path, encoding='utf-8') as walk_file:
+            for line in walk_file:
+                if not line.strip() or line.lstrip().startswith('#'):
+                    continue
+                match = LINE_RE.match(line)
+                if not match:
+                    continue
+                oid, type_name, value = match.groups()
+                entries[parse_oid(oid)] = encode_value(type_name, value)
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls(name, entries)
+
+
+def available_walks() -> List[str]:
+    """Listar os walks gravados que acompanham o simulador"""
+    return sorted(
+        os.path.join(WALKS_DIR, filename)
+        for filename in os.listdir(WALKS_DIR)
+        if filename.endswith('.walk')
+    )
+
+
+def load_walks(paths: Optional[List[str]] = None) -> List[Walk]:
+    return [Walk.from_file(path) for path in (paths or available_walks())]
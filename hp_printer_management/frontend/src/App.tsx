@@ -12,8 +12,15 @@ import Users from './pages/Users';
 import Settings from './pages/Settings';
 import Login from './pages/Login';
 import { useAuth } from './hooks/useAuth';
+import { useRealtime } from './hooks/useRealtime';
 import LoadingSpinner from './components/LoadingSpinner';
 
+// Montado só com usuário autenticado: a conexão usa o token salvo no login
+function RealtimeConnection() {
+  useRealtime();
+  return null;
+}
+
 function App() {
   const { isAuthenticated, isLoading } = useAuth();
 
@@ -27,6 +34,7 @@ function App() {
 
   return (
     <Box sx={{ display: 'flex' }}>
+      <RealtimeConnection />
       <Layout>
         <Routes>
           <Route path="/" element={<Navigate to="/dashboard" replace />} />
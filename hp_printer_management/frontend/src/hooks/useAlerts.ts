@@ -1,13 +1,16 @@
 import { useQuery, useMutation, useQueryClient } from 'react-query';
 import { alertsService } from '../services/alertsService';
 import { Alert, AlertRule, AlertFilters } from '../types/alert';
+import { FALLBACK_REFETCH_INTERVAL, useRealtimeConnected } from './useRealtime';
 
 export const useAlerts = (filters?: AlertFilters) => {
+  const realtimeConnected = useRealtimeConnected();
   const query = useQuery(
     ['alerts', filters],
     () => alertsService.getAlerts(filters),
     {
-      refetchInterval: 30000, // Atualizar a cada 30 segundos
+      // Atualizado pelos eventos em tempo real; polling só sem WebSocket
+      refetchInterval: realtimeConnected ? false : FALLBACK_REFETCH_INTERVAL,
       keepPreviousData: true,
     }
   );
@@ -118,11 +121,12 @@ export const useTestAlertRule = () => {
 };
 
 export const useAlertStatistics = () => {
+  const realtimeConnected = useRealtimeConnected();
   return useQuery(
     'alert-statistics',
     alertsService.getStatistics,
     {
-      refetchInterval: 60000, // Atualizar a cada minuto
+      refetchInterval: realtimeConnected ? false : FALLBACK_REFETCH_INTERVAL,
     }
   );
 };
@@ -1,25 +1,29 @@
 import { useQuery, useMutation, useQueryClient } from 'react-query';
 import { printersService } from '../services/printersService';
 import { Printer, PrinterFilters } from '../types/printer';
+import { FALLBACK_REFETCH_INTERVAL, useRealtimeConnected } from './useRealtime';
 
 export const usePrinters = (filters?: PrinterFilters) => {
+  const realtimeConnected = useRealtimeConnected();
   return useQuery(
     ['printers', filters],
     () => printersService.getPrinters(filters),
     {
-      refetchInterval: 30000, // Atualizar a cada 30 segundos
+      // Deltas de estado chegam pelo WebSocket; polling só sem conexão
+      refetchInterval: realtimeConnected ? false : FALLBACK_REFETCH_INTERVAL,
       keepPreviousData: true,
     }
   );
 };
 
 export const usePrinter = (id: number) => {
+  const realtimeConnected = useRealtimeConnected();
   return useQuery(
     ['printer', id],
     () => printersService.getPrinter(id),
     {
       enabled: !!id,
-      refetchInterval: 10000, // Atualizar a cada 10 segundos para detalhes
+      refetchInterval: realtimeConnected ? false : FALLBACK_REFETCH_INTERVAL,
     }
   );
 };
@@ -75,11 +79,12 @@ export const useRefreshSupplies = () => {
 };
 
 export const usePrinterStatistics = () => {
+  const realtimeConnected = useRealtimeConnected();
   return useQuery(
     'printer-statistics',
     printersService.getStatistics,
     {
-      refetchInterval: 60000, // Atualizar a cada minuto
+      refetchInterval: realtimeConnected ? false : FALLBACK_REFETCH_INTERVAL,
     }
   );
 };
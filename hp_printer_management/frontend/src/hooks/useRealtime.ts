@@ -0,0 +1,74 @@
+import { useEffect, useState } from 'react';
+import { useQueryClient } from 'react-query';
+import { realtimeClient, RealtimeMessage } from '../services/realtime';
+import { Printer } from '../types/printer';
+
+// Polling de segurança apenas enquanto o WebSocket estiver desconectado
+export const FALLBACK_REFETCH_INTERVAL = 60000;
+
+// Os deltas usam os nomes de campo da API REST (snake_case), como o cache do React Query
+const applyPrinterDeltas = (printer: any, deltas: Map<number, any>): Printer => {
+  const delta = deltas.get(printer.id);
+  if (!delta) {
+    return printer;
+  }
+
+  const { toner_levels, ...fields } = delta;
+  return {
+    ...printer,
+    ...fields,
+    toner_levels: toner_levels ? { ...printer.toner_levels, ...toner_levels } : printer.toner_levels,
+  };
+};
+
+// Conectar ao canal em tempo real e refletir os eventos no cache do React Query
+export const useRealtime = () => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    const handleMessage = ({ event, payload }: RealtimeMessage) => {
+      switch (event) {
+        case 'alerts.created':
+        case 'alerts.updated':
+          queryClient.invalidateQueries('alerts');
+          queryClient.invalidateQueries('alert-statistics');
+          break;
+
+        case 'printers.updated': {
+          const deltas = new Map<number, any>(payload.map((delta: any) => [delta.id, delta]));
+
+          // Atualizar listas e detalhes em memória, sem nova requisição
+          queryClient.setQueriesData('printers', (data: any) =>
+            data?.results
+              ? { ...data, results: data.results.map((printer: Printer) => applyPrinterDeltas(printer, deltas)) }
+              : data
+          );
+          deltas.forEach((_, id) => {
+            queryClient.setQueryData(['printer', id], (printer: Printer | undefined) =>
+              printer ? applyPrinterDeltas(printer, deltas) : (printer as any)
+            );
+          });
+
+          if (payload.some((delta: any) => delta.status !== undefined)) {
+            queryClient.invalidateQueries('printer-statistics');
+          }
+          break;
+        }
+
+        case 'notification':
+          queryClient.invalidateQueries('notifications');
+          break;
+      }
+    };
+
+    return realtimeClient.subscribe(handleMessage);
+  }, [queryClient]);
+};
+
+export const useRealtimeConnected = () => {
+  const [connected, setConnected] = useState(realtimeClient.connected);
+
+  useEffect(() => realtimeClient.onStatusChange(setConnected), []);
+
+  return connected;
+};
@@ -0,0 +1,129 @@
+// Conexão WebSocket única por aba com os eventos em tempo real do backend
+
+export type RealtimeEventType =
+  | 'alerts.created'
+  | 'alerts.updated'
+  | 'printers.updated'
+  | 'notification'
+  | 'pong';
+
+export interface RealtimeMessage {
+  event: RealtimeEventType;
+  payload: any;
+}
+
+type MessageListener = (message: RealtimeMessage) => void;
+type StatusListener = (connected: boolean) => void;
+
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
+
+const buildSocketUrl = (token: string): string => {
+  const base = process.env.REACT_APP_WS_URL || API_BASE_URL.replace(/^http/, 'ws').replace(/\/api\/?$/, '');
+  return `${base}/ws/notifications/?token=${encodeURIComponent(token)}`;
+};
+
+const PING_INTERVAL = 25000;
+const MAX_RECONNECT_DELAY = 30000;
+
+class RealtimeClient {
+  private socket: WebSocket | null = null;
+  private messageListeners = new Set<MessageListener>();
+  private statusListeners = new Set<StatusListener>();
+  private reconnectAttempts = 0;
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+  private pingTimer: ReturnType<typeof setInterval> | null = null;
+  private subscribers = 0;
+  connected = false;
+
+  subscribe(onMessage: MessageListener): () => void {
+    this.messageListeners.add(onMessage);
+    this.subscribers += 1;
+    this.connect();
+
+    return () => {
+      this.messageListeners.delete(onMessage);
+      this.subscribers -= 1;
+      if (this.subscribers === 0) {
+        this.close();
+      }
+    };
+  }
+
+  onStatusChange(listener: StatusListener): () => void {
+    this.statusListeners.add(listener);
+    return () => {
+      this.statusListeners.delete(listener);
+    };
+  }
+
+  private connect() {
+    const token = localStorage.getItem('token');
+    if (!token || this.socket) {
+      return;
+    }
+
+    const socket = new WebSocket(buildSocketUrl(token));
+    this.socket = socket;
+
+    socket.onopen = () => {
+      this.reconnectAttempts = 0;
+      this.setConnected(true);
+      this.pingTimer = setInterval(() => {
+        socket.send(JSON.stringify({ type: 'ping' }));
+      }, PING_INTERVAL);
+    };
+
+    socket.onmessage = (event) => {
+      const message: RealtimeMessage = JSON.parse(event.data);
+      this.messageListeners.forEach((listener) => listener(message));
+    };
+
+    socket.onclose = (event) => {
+      this.cleanup();
+      // 4401: token inválido ou expirado, não insistir
+      if (this.subscribers > 0 && event.code !== 4401) {
+        this.scheduleReconnect();
+      }
+    };
+  }
+
+  private scheduleReconnect() {
+    // Backoff exponencial com jitter para não sincronizar as abas após uma queda
+    const delay = Math.min(MAX_RECONNECT_DELAY, 1000 * 2 ** this.reconnectAttempts);
+    this.reconnectAttempts += 1;
+    this.reconnectTimer = setTimeout(() => {
+      this.reconnectTimer = null;
+      this.connect();
+    }, delay / 2 + Math.random() * (delay / 2));
+  }
+
+  private cleanup() {
+    if (this.pingTimer) {
+      clearInterval(this.pingTimer);
+      this.pingTimer = null;
+    }
+    this.socket = null;
+    this.setConnected(false);
+  }
+
+  private close() {
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer);
+      this.reconnectTimer = null;
+    }
+    if (this.socket) {
+      this.socket.onclose = null;
+      this.socket.close();
+    }
+    this.cleanup();
+  }
+
+  private setConnected(connected: boolean) {
+    if (this.connected !== connected) {
+      this.connected = connected;
+      this.statusListeners.forEach((listener) => listener(connected));
+    }
+  }
+}
+
+export const realtimeClient = new RealtimeClient();